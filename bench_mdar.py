@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark of DataManager queries on different storage backends.
+
+Constants:
+    CONFIG_PATHS: paths to config files, one for each compared backend, see
+    'backend' value in config_sample.json.
+    K_FOLD_SIZE: number of k parts for cross-validation.
+    REPEAT: number of calls of each benchmarked query.
+
+Association relationships are rewritten at the end of the benchmark, the same
+way as in OrderAssociationRecommender training. The result cache of DataManager
+is disabled, so every call reaches the backend.
+
+Usage:
+    $ python bench_mdar.py
+"""
+
+import time
+from mdar.data_manager import DataManager
+
+CONFIG_PATHS = ['config.json', 'config_local.json']
+K_FOLD_SIZE = 3
+REPEAT = 10
+
+def get_queries(data_manager):
+    """Benchmarked queries for given DataManager.
+
+    Returns:
+        list: contains tuples with query name(0) and function(1).
+    """
+    popular_items = data_manager.get_popular_items(None, 'train')
+    items = [item['item'] for item in popular_items[:2]]
+    orders_count = data_manager.get_orders_count('train')
+
+    return [
+        ('orders count', lambda: data_manager.get_orders_count('train')),
+        ('support', lambda: data_manager.get_support(items, orders_count, 'train')),
+        ('popular items', lambda: data_manager.get_popular_items(orders_count, 'train')),
+        ('items by time', lambda: data_manager.get_items_by_time('morning', None, None, 'train')),
+        ('user items', lambda: data_manager.get_user_items(None, 'train')),
+        ('associated items', lambda: data_manager.get_associated_items(items, data_type='train')),
+        ('association rules', lambda: data_manager.get_association_rules(.02, 2)),
+        ('orders', lambda: data_manager.get_orders('train')),
+    ]
+
+def benchmark():
+    """Run each query REPEAT times on every backend defined by CONFIG_PATHS and
+    print calls per second."""
+    print 'backend\t query\t calls/s'
+    for config_path in CONFIG_PATHS:
+        start = time.time()
+        data_manager = DataManager(config_path, K_FOLD_SIZE)
+        data_manager.testing_part_index = 0
+        data_manager.result_cache = None
+        print '%s\t init\t %f' % (config_path, 1 / (time.time() - start))
+
+        for name, query in get_queries(data_manager):
+            start = time.time()
+            for _ in range(0, REPEAT):
+                query()
+            print '%s\t %s\t %f' % (config_path, name, REPEAT / (time.time() - start))
+
+        # association relationships are rewritten on each training anyway
+        rules = data_manager.get_association_rules(.02, 2, use_confidence=True)
+        for name, write in [
+                ('delete associations', data_manager.delete_associations),
+                ('write associations', lambda: data_manager.write_associations(rules))]:
+            print '%s\t %s\t %f rows/s' % (config_path, name, write()['rows_per_sec'])
+        print '-' * 22
+
+benchmark()
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+from itertools import islice
+
+
+class BaseBackend(object):
+    """Storage backend interface used by QueryManager and DataManager. Covers
+    orders with their time frames, products, users, and association
+    (ASSOCIATED/GROUPED) relationships between products.
+
+    Backends that support Cypher queries (supports_cypher is True) are queried
+    directly by QueryManager, others are answered from the in-memory
+    TransactionStore which is loaded through the getters defined here.
+    """
+
+    supports_cypher = False
+
+    def query(self, query, parameters=None):
+        """Execute given Cypher query and return its rows.
+
+        Args:
+            query(string)
+            parameters(dict, optional): query parameters.
+
+        Returns:
+            list: contains dicts, one for each returned row.
+        """
+        raise NotImplementedError('%s does not support Cypher queries' \
+            % self.__class__.__name__)
+
+    def iter_query(self, query, parameters=None):
+        """Execute given Cypher query and generate its rows one by one. Rows
+        are fetched all at once unless the backend streams them.
+
+        Args:
+            query(string)
+            parameters(dict, optional): query parameters.
+
+        Yields:
+            dict: one returned row.
+        """
+        for row in self.query(query, parameters):
+            yield row
+
+    def get_orders_count(self):
+        """Return the number of orders which contain at least one item.
+
+        Returns:
+            int
+        """
+        raise NotImplementedError
+
+    def get_timestamps_range(self):
+        """Return timestamps of the first and the last order which contain at
+        least one item.
+
+        Returns:
+            string: first timestamp, None if there are no such orders.
+            string: last timestamp.
+        """
+        raise NotImplementedError
+
+    def get_k_fold_tfs(self, k_fold_size):
+        """Return TIME_FRAMEs which should act as boundary between k data
+        partitions, i.e. timestamps of every (orders count / k)-th order
+        which contains at least one item, sorted by timestamp.
+
+        Args:
+            k_fold_size(int): number of data partitions.
+
+        Returns:
+            list: contains dicts(or nodes) with 'timestamp' key. Length of
+            k_fold_size - 1.
+        """
+        raise NotImplementedError
+
+    def get_time_frames(self):
+        """Return time frame of each order sorted by timestamp.
+
+        Returns:
+            list: contains dicts with the following structure:
+                {
+                    'order': int
+                    'timestamp': string
+                    'part_of_day': string
+                    'day_in_week': string
+                    'month': int
+                }
+        """
+        raise NotImplementedError
+
+    def get_order_users(self):
+        """Return users of orders.
+
+        Returns:
+            list: contains dicts with the following structure:
+                {
+                    'order': int
+                    'user': int
+                }
+        """
+        raise NotImplementedError
+
+    def get_order_items(self):
+        """Return items of orders.
+
+        Returns:
+            list: contains dicts with the following structure:
+                {
+                    'order': int
+                    'items': list of IDs(int)
+                }
+        """
+        raise NotImplementedError
+
+    def get_product_cats(self):
+        """Return categories of products.
+
+        Returns:
+            list: contains dicts with the following structure:
+                {
+                    'item': int
+                    'cats': list of category IDs(int)
+                }
+        """
+        raise NotImplementedError
+
+    def get_products(self):
+        """Return products with timestamps of their time frames.
+
+        Returns:
+            list: contains dicts with the following structure:
+                {
+                    'item': int
+                    'timestamp': string
+                }
+        """
+        raise NotImplementedError
+
+    def get_associations(self, items):
+        """Return items associated with given items through ASSOCIATED
+        relationships, sorted by support and confidence.
+
+        Args:
+            items(list): contains item IDs(int)
+
+        Returns:
+            list: contains dicts with the following structure:
+                {
+                    'item': int
+                    'support': float
+                    'confidence': float
+                }
+        """
+        raise NotImplementedError
+
+    def write_relationships(self, relationships, batch_size=1000):
+        """Write association relationships between products in batches, each
+        batch is committed separately.
+
+        Args:
+            relationships(iterable): contains dicts with the following structure:
+                {
+                    'type': 'ASSOCIATED' or 'GROUPED'
+                    'x': int (start item ID)
+                    'y': int (end item ID)
+                    'properties': dict
+                }
+            batch_size(int, optional): number of relationships written at once.
+            Defaults to 1000.
+
+        Returns:
+            dict: see get_write_stats.
+        """
+        raise NotImplementedError
+
+    def delete_relationships(self, relationships, batch_size=1000):
+        """Delete given association relationships in batches, a relationship
+        is matched by its type, items and properties. Each given relationship
+        deletes one matching relationship.
+
+        Args:
+            relationships(iterable): see write_relationships.
+            batch_size(int, optional): number of relationships deleted at once.
+            Defaults to 1000.
+
+        Returns:
+            dict: see get_write_stats.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _count_relationships(relationships):
+        """Merge equal relationships.
+
+        Args:
+            relationships(list): see write_relationships.
+
+        Returns:
+            list: contains tuples with relationship(0) and number of its
+            occurrences(1).
+        """
+        counts = OrderedDict()
+        for relationship in relationships:
+            properties = relationship['properties']
+            key = (
+                relationship['type'], relationship['x'], relationship['y'],
+                properties['support'], properties['confidence'],
+                properties.get('single'), properties.get('rel_id'))
+            if key in counts:
+                counts[key][1] += 1
+            else:
+                counts[key] = [relationship, 1]
+        return [tuple(relationship_count) for relationship_count in counts.values()]
+
+    def delete_associations(self, batch_size=1000):
+        """Delete all the ASSOCIATED and GROUPED relationships in batches.
+
+        Args:
+            batch_size(int, optional): number of relationships deleted at once.
+            Defaults to 1000.
+
+        Returns:
+            dict: see get_write_stats.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def get_write_stats(rows, seconds):
+        """Return statistics of a write or delete operation.
+
+        Args:
+            rows(int): number of written or deleted rows.
+            seconds(float): time used for the operation.
+
+        Returns:
+            dict: with the following structure:
+                {
+                    'rows': int
+                    'time': float
+                    'rows_per_sec': float
+                }
+        """
+        return {
+            'rows': rows,
+            'time': seconds,
+            'rows_per_sec': rows / seconds if seconds > 0 else 0.0,
+        }
+
+    @staticmethod
+    def _iter_batches(rows, batch_size):
+        """Split given rows into lists of batch_size length, the last one can
+        be shorter.
+
+        Args:
+            rows(iterable)
+            batch_size(int)
+
+        Yields:
+            list
+        """
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield batch
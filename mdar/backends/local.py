@@ -0,0 +1,369 @@
+# -*- coding: utf-8 -*-
+
+import sqlite3
+import time
+from itertools import groupby
+from operator import itemgetter
+from mdar.backends.base import BaseBackend
+
+
+class LocalBackend(BaseBackend):
+    """Embedded backend which stores the dataset in a local SQLite database
+    file, so training and testing can run on a single machine without Neo4j
+    server. Queries are answered by DataManager from the TransactionStore which
+    is loaded from this backend.
+
+    The dataset can be copied from any other backend with import_from, e.g.
+    from the Neo4j database created by DB Importer.
+
+    Args:
+        path(string): path to the SQLite database file or ':memory:'.
+    """
+
+    _nonempty_order = 'EXISTS (SELECT 1 FROM order_items WHERE order_oid = orders.oid)'
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.create_schema()
+
+    def create_schema(self):
+        """Create tables and indices if missing."""
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS orders (
+                oid INTEGER PRIMARY KEY,
+                user_oid INTEGER,
+                timestamp TEXT,
+                part_of_day TEXT,
+                day_in_week TEXT,
+                month INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS orders_timestamp ON orders (timestamp, oid);
+            CREATE TABLE IF NOT EXISTS order_items (
+                order_oid INTEGER,
+                product_oid INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS order_items_order ON order_items (order_oid);
+            CREATE TABLE IF NOT EXISTS products (
+                oid INTEGER PRIMARY KEY,
+                timestamp TEXT
+            );
+            CREATE TABLE IF NOT EXISTS product_cats (
+                product_oid INTEGER,
+                cat_oid INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS associated (
+                x_oid INTEGER,
+                y_oid INTEGER,
+                support REAL,
+                confidence REAL,
+                single INTEGER,
+                rel_id TEXT
+            );
+            CREATE INDEX IF NOT EXISTS associated_x ON associated (x_oid);
+            CREATE TABLE IF NOT EXISTS grouped (
+                x_oid INTEGER,
+                y_oid INTEGER,
+                support REAL,
+                confidence REAL,
+                rel_id TEXT
+            );
+        """)
+        self.connection.commit()
+
+    def import_from(self, backend):
+        """Copy the whole dataset(orders, users, items, products and their
+        categories) from the given backend.
+
+        Args:
+            backend(BaseBackend)
+        """
+        self.add_time_frames(backend.get_time_frames())
+        self.add_order_users(backend.get_order_users())
+        self.add_order_items(backend.get_order_items())
+        self.add_products(backend.get_products())
+        self.add_product_cats(backend.get_product_cats())
+
+    def add_time_frames(self, time_frames):
+        """Insert orders with their time frames.
+
+        Args:
+            time_frames(list): see BaseBackend.get_time_frames.
+        """
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO orders (oid, timestamp, part_of_day, day_in_week, month)'
+            + ' VALUES (?, ?, ?, ?, ?)',
+            ((tf['order'], tf['timestamp'], tf['part_of_day'], tf['day_in_week'], tf['month'])
+             for tf in time_frames))
+        self.connection.commit()
+
+    def add_order_users(self, order_users):
+        """Define users of already inserted orders.
+
+        Args:
+            order_users(list): see BaseBackend.get_order_users.
+        """
+        self.connection.executemany(
+            'UPDATE orders SET user_oid = ? WHERE oid = ?',
+            ((order_user['user'], order_user['order']) for order_user in order_users))
+        self.connection.commit()
+
+    def add_order_items(self, order_items):
+        """Insert items of orders.
+
+        Args:
+            order_items(list): see BaseBackend.get_order_items.
+        """
+        self.connection.executemany(
+            'INSERT INTO order_items (order_oid, product_oid) VALUES (?, ?)',
+            ((order_item['order'], item)
+             for order_item in order_items for item in order_item['items']))
+        self.connection.commit()
+
+    def add_products(self, products):
+        """Insert products with their timestamps.
+
+        Args:
+            products(list): see BaseBackend.get_products.
+        """
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO products (oid, timestamp) VALUES (?, ?)',
+            ((product['item'], product['timestamp']) for product in products))
+        self.connection.commit()
+
+    def add_product_cats(self, product_cats):
+        """Insert categories of products.
+
+        Args:
+            product_cats(list): see BaseBackend.get_product_cats.
+        """
+        self.connection.executemany(
+            'INSERT INTO product_cats (product_oid, cat_oid) VALUES (?, ?)',
+            ((product_cat['item'], cat)
+             for product_cat in product_cats for cat in product_cat['cats']))
+        self.connection.commit()
+
+    def get_orders_count(self):
+        """Return the number of orders which contain at least one item.
+
+        Returns:
+            int
+        """
+        return self.connection.execute(
+            'SELECT count(*) FROM orders WHERE %s' % self._nonempty_order).fetchone()[0]
+
+    def get_timestamps_range(self):
+        """Return timestamps of the first and the last order which contain at
+        least one item.
+
+        Returns:
+            string: first timestamp, None if there are no such orders.
+            string: last timestamp.
+        """
+        return tuple(self.connection.execute(
+            'SELECT min(timestamp), max(timestamp) FROM orders WHERE %s'
+            % self._nonempty_order).fetchone())
+
+    def get_k_fold_tfs(self, k_fold_size):
+        """Return time frames which should act as boundary between k data
+        partitions.
+
+        Args:
+            k_fold_size(int): number of data partitions.
+
+        Returns:
+            list: contains dicts with 'timestamp' key. Length of k_fold_size - 1.
+        """
+        where = 'WHERE %s' % self._nonempty_order
+        part_size = self.get_orders_count() / k_fold_size
+        if part_size == 0:
+            return []
+
+        k_fold_tfs = []
+        for i in range(1, k_fold_size):
+            row = self.connection.execute(
+                'SELECT timestamp FROM orders %s ORDER BY timestamp, oid LIMIT 1 OFFSET ?'
+                % where, (i * part_size - 1,)).fetchone()
+            k_fold_tfs.append({'timestamp': row[0]})
+
+        return k_fold_tfs
+
+    def get_time_frames(self):
+        """Return time frame of each order sorted by timestamp.
+
+        Returns:
+            list: see BaseBackend.get_time_frames.
+        """
+        return self._fetch(
+            'SELECT oid AS "order", timestamp, part_of_day, day_in_week, month'
+            + ' FROM orders ORDER BY timestamp, oid')
+
+    def get_order_users(self):
+        """Return users of orders.
+
+        Returns:
+            list: see BaseBackend.get_order_users.
+        """
+        return self._fetch(
+            'SELECT oid AS "order", user_oid AS user FROM orders WHERE user_oid IS NOT NULL')
+
+    def get_order_items(self):
+        """Return items of orders.
+
+        Returns:
+            list: see BaseBackend.get_order_items.
+        """
+        rows = self.connection.execute(
+            'SELECT order_oid, product_oid FROM order_items ORDER BY order_oid, rowid')
+        return [
+            {'order': order_id, 'items': [row[1] for row in order_rows]}
+            for order_id, order_rows in groupby(rows, itemgetter(0))]
+
+    def get_product_cats(self):
+        """Return categories of products.
+
+        Returns:
+            list: see BaseBackend.get_product_cats.
+        """
+        rows = self.connection.execute(
+            'SELECT product_oid, cat_oid FROM product_cats ORDER BY product_oid, rowid')
+        return [
+            {'item': item_id, 'cats': [row[1] for row in item_rows]}
+            for item_id, item_rows in groupby(rows, itemgetter(0))]
+
+    def get_products(self):
+        """Return products with timestamps of their time frames.
+
+        Returns:
+            list: see BaseBackend.get_products.
+        """
+        return self._fetch(
+            'SELECT oid AS item, timestamp FROM products WHERE timestamp IS NOT NULL')
+
+    def get_associations(self, items):
+        """Return items associated with given items through ASSOCIATED
+        relationships, sorted by support and confidence.
+
+        Args:
+            items(list): contains item IDs(int)
+
+        Returns:
+            list: see BaseBackend.get_associations.
+        """
+        placeholders = ', '.join('?' * len(items))
+        return self._fetch(
+            'SELECT y_oid AS item, support, confidence FROM associated'
+            + ' WHERE x_oid IN (%s) AND y_oid NOT IN (%s)' % (placeholders, placeholders)
+            + ' ORDER BY support, confidence', list(items) * 2)
+
+    def write_relationships(self, relationships, batch_size=1000):
+        """Write association relationships between products in batches.
+
+        Args:
+            relationships(iterable): see BaseBackend.write_relationships.
+            batch_size(int, optional): number of relationships written at once.
+            Defaults to 1000.
+
+        Returns:
+            dict: see BaseBackend.get_write_stats.
+        """
+        start = time.time()
+        rows_count = 0
+        for batch in self._iter_batches(relationships, batch_size):
+            associated = []
+            grouped = []
+            for relationship in batch:
+                properties = relationship['properties']
+                if relationship['type'] == 'ASSOCIATED':
+                    associated.append((
+                        relationship['x'], relationship['y'], properties['support'],
+                        properties['confidence'], properties['single'],
+                        properties.get('rel_id')))
+                else:
+                    grouped.append((
+                        relationship['x'], relationship['y'], properties['support'],
+                        properties['confidence'], properties['rel_id']))
+
+            self.connection.executemany(
+                'INSERT INTO associated (x_oid, y_oid, support, confidence, single, rel_id)'
+                + ' VALUES (?, ?, ?, ?, ?, ?)', associated)
+            self.connection.executemany(
+                'INSERT INTO grouped (x_oid, y_oid, support, confidence, rel_id)'
+                + ' VALUES (?, ?, ?, ?, ?)', grouped)
+            self.connection.commit()
+            rows_count += len(batch)
+
+        return self.get_write_stats(rows_count, time.time() - start)
+
+    def delete_relationships(self, relationships, batch_size=1000):
+        """Delete given association relationships in batches.
+
+        Args:
+            relationships(iterable): see BaseBackend.write_relationships.
+            batch_size(int, optional): number of relationships deleted at once.
+            Defaults to 1000.
+
+        Returns:
+            dict: see BaseBackend.get_write_stats.
+        """
+        start = time.time()
+        rows_count = 0
+        for batch in self._iter_batches(relationships, batch_size):
+            for relationship, count in self._count_relationships(batch):
+                properties = relationship['properties']
+                if relationship['type'] == 'ASSOCIATED':
+                    rows_count += self.connection.execute(
+                        'DELETE FROM associated WHERE rowid IN (SELECT rowid FROM associated'
+                        + ' WHERE x_oid = ? AND y_oid = ? AND support = ? AND confidence = ?'
+                        + ' AND single = ? AND rel_id IS ? LIMIT ?)', (
+                            relationship['x'], relationship['y'], properties['support'],
+                            properties['confidence'], properties['single'],
+                            properties.get('rel_id'), count)).rowcount
+                else:
+                    rows_count += self.connection.execute(
+                        'DELETE FROM grouped WHERE rowid IN (SELECT rowid FROM grouped'
+                        + ' WHERE x_oid = ? AND y_oid = ? AND support = ? AND confidence = ?'
+                        + ' AND rel_id IS ? LIMIT ?)', (
+                            relationship['x'], relationship['y'], properties['support'],
+                            properties['confidence'], properties['rel_id'], count)).rowcount
+            self.connection.commit()
+
+        return self.get_write_stats(rows_count, time.time() - start)
+
+    def delete_associations(self, batch_size=1000):
+        """Delete all the ASSOCIATED and GROUPED relationships in batches.
+
+        Args:
+            batch_size(int, optional): number of relationships deleted at once.
+            Defaults to 1000.
+
+        Returns:
+            dict: see BaseBackend.get_write_stats.
+        """
+        start = time.time()
+        rows_count = 0
+        for table in ['associated', 'grouped']:
+            while True:
+                deleted = self.connection.execute(
+                    'DELETE FROM %s WHERE rowid IN (SELECT rowid FROM %s LIMIT ?)'
+                    % (table, table), (batch_size,)).rowcount
+                self.connection.commit()
+                rows_count += deleted
+                if deleted < batch_size:
+                    break
+
+        return self.get_write_stats(rows_count, time.time() - start)
+
+    def _fetch(self, query, parameters=()):
+        """Execute given SQL query and return its rows as dicts.
+
+        Args:
+            query(string)
+            parameters(tuple, optional)
+
+        Returns:
+            list: contains dicts, one for each returned row.
+        """
+        cursor = self.connection.execute(query, parameters)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
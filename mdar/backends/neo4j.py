@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+
+import time
+from mdar.backends.base import BaseBackend
+
+try:
+    from py2neo import authenticate, Graph
+except ImportError:
+    authenticate = Graph = None
+
+
+class Neo4jBackend(BaseBackend):
+    """Backend which stores the data in Neo4j graph database and is queried
+    with Cypher through py2neo.
+
+    Args:
+        host(dict): 'host' part of the config file, see config_sample.json.
+    """
+
+    supports_cypher = True
+
+    def __init__(self, host):
+        if Graph is None:
+            raise ImportError('py2neo is required for the Neo4j backend')
+
+        if host['use_ssl']:
+            db_url = 'https://'
+        elif host['use_bolt']:
+            db_url = 'bolt://'
+        else:
+            db_url = 'http://'
+        db_url += '%s:%d/%s' % (host['address'], host['port'], host['data_path'])
+
+        authenticate(
+            host['address'] + ':' + str(host['port']),
+            user=host['username'], password=host['password'])
+        self.graph = Graph(db_url)
+
+    def query(self, query, parameters=None):
+        """Execute given Cypher query and return its rows.
+
+        Args:
+            query(string)
+            parameters(dict, optional): query parameters.
+
+        Returns:
+            list: contains dicts, one for each returned row.
+        """
+        return self.graph.data(query, parameters)
+
+    def iter_query(self, query, parameters=None):
+        """Execute given Cypher query and generate its rows as they are pulled
+        from the result cursor, so they are never held in memory at once.
+
+        Args:
+            query(string)
+            parameters(dict, optional): query parameters.
+
+        Yields:
+            dict: one returned row.
+        """
+        for record in self.graph.run(query, parameters):
+            yield dict(zip(record.keys(), record.values()))
+
+    def get_orders_count(self):
+        """Return the number of orders which contain at least one item.
+
+        Returns:
+            int
+        """
+        orders_count = self.query(
+            'MATCH (o:ORDER) WHERE (o)-[:CONTAINS]->() RETURN count(o) AS orders_count')
+        return orders_count[0]['orders_count']
+
+    def get_timestamps_range(self):
+        """Return timestamps of the first and the last order which contain at
+        least one item.
+
+        Returns:
+            string: first timestamp, None if there are no such orders.
+            string: last timestamp.
+        """
+        timestamps = self.query(
+            'MATCH (o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME) WHERE (o)-[:CONTAINS]->()'
+            + ' RETURN min(tf.timestamp) AS first, max(tf.timestamp) AS last')
+        return timestamps[0]['first'], timestamps[0]['last']
+
+    def get_k_fold_tfs(self, k_fold_size):
+        """Return time frames which should act as boundary between k data
+        partitions. Each boundary is fetched with its own ordered SKIP/LIMIT
+        query, so only k - 1 rows are returned.
+
+        Args:
+            k_fold_size(int): number of data partitions.
+
+        Returns:
+            list: contains dicts with 'timestamp' key. Length of k_fold_size - 1.
+        """
+        part_size = self.get_orders_count() / k_fold_size
+        if part_size == 0:
+            return []
+
+        k_fold_tfs = []
+        for i in range(1, k_fold_size):
+            time_frame = self.query(
+                'MATCH (o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME) WHERE (o)-[:CONTAINS]->()'
+                + ' RETURN tf.timestamp AS timestamp ORDER BY timestamp, o.oid'
+                + ' SKIP $skip LIMIT 1', {'skip': i * part_size - 1})
+            k_fold_tfs.append(time_frame[0])
+
+        return k_fold_tfs
+
+    def get_time_frames(self):
+        """Return time frame of each order sorted by timestamp.
+
+        Returns:
+            list: see BaseBackend.get_time_frames.
+        """
+        return self.query(
+            'MATCH (o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME) RETURN o.oid AS order,'
+            + ' tf.timestamp AS timestamp, tf.part_of_day AS part_of_day,'
+            + ' tf.day_in_week AS day_in_week, tf.month AS month ORDER BY timestamp')
+
+    def get_order_users(self):
+        """Return users of orders.
+
+        Returns:
+            list: see BaseBackend.get_order_users.
+        """
+        return self.query(
+            'MATCH (u:USER)-[:PURCHASED]->(o:ORDER) RETURN o.oid AS order, u.oid AS user')
+
+    def get_order_items(self):
+        """Return items of orders.
+
+        Returns:
+            list: see BaseBackend.get_order_items.
+        """
+        return self.query(
+            'MATCH (o:ORDER)-[:CONTAINS]->(p:PRODUCT)'
+            + ' RETURN o.oid AS order, collect(p.oid) AS items')
+
+    def get_product_cats(self):
+        """Return categories of products.
+
+        Returns:
+            list: see BaseBackend.get_product_cats.
+        """
+        return self.query(
+            'MATCH (p:PRODUCT)-[:DEFINED]->(c:CAT) RETURN p.oid AS item, collect(c.oid) AS cats')
+
+    def get_products(self):
+        """Return products with timestamps of their time frames.
+
+        Returns:
+            list: see BaseBackend.get_products.
+        """
+        return self.query(
+            'MATCH (p:PRODUCT)-[:CREATED_AT]->(tf:TIME_FRAME)'
+            + ' RETURN p.oid AS item, tf.timestamp AS timestamp')
+
+    def get_associations(self, items):
+        """Return items associated with given items through ASSOCIATED
+        relationships, sorted by support and confidence.
+
+        Args:
+            items(list): contains item IDs(int)
+
+        Returns:
+            list: see BaseBackend.get_associations.
+        """
+        return self.query(
+            'MATCH (tf:TIME_FRAME)<-[:CREATED_AT]-(p:PRODUCT)-[a_rel:ASSOCIATED]->(p1:PRODUCT)'
+            + ' WHERE p.oid IN $items AND NOT p1.oid IN $items'
+            + ' RETURN p1.oid AS item, a_rel.support AS support,'
+            + ' a_rel.confidence AS confidence ORDER BY support, confidence',
+            {'items': list(items)})
+
+    def write_relationships(self, relationships, batch_size=1000):
+        """Write association relationships between PRODUCT nodes with UNWIND
+        queries in batches, each batch is committed separately. Nodes are
+        looked up by their internal IDs which are obtained once for each oid.
+
+        Args:
+            relationships(iterable): see BaseBackend.write_relationships.
+            batch_size(int, optional): number of relationships written at once.
+            Defaults to 1000.
+
+        Returns:
+            dict: see BaseBackend.get_write_stats.
+        """
+        start = time.time()
+        rows_count = 0
+        node_ids = {}
+        for batch in self._iter_batches(relationships, batch_size):
+            self._update_node_ids(node_ids, batch)
+
+            rows = {}
+            for relationship in batch:
+                x_node_id = node_ids.get(relationship['x'])
+                y_node_id = node_ids.get(relationship['y'])
+                if x_node_id is not None and y_node_id is not None:
+                    rows.setdefault(relationship['type'], []).append({
+                        'x': x_node_id,
+                        'y': y_node_id,
+                        'properties': relationship['properties']
+                    })
+
+            # relationship type can't be a parameter
+            for relationship_type, type_rows in rows.items():
+                self.query(
+                    'UNWIND $rows AS row MATCH (x) WHERE id(x) = row.x'
+                    + ' MATCH (y) WHERE id(y) = row.y'
+                    + ' CREATE (x)-[r:%s]->(y) SET r = row.properties' % relationship_type,
+                    {'rows': type_rows})
+                rows_count += len(type_rows)
+
+        return self.get_write_stats(rows_count, time.time() - start)
+
+    def delete_relationships(self, relationships, batch_size=1000):
+        """Delete given association relationships with UNWIND queries in
+        batches, equal relationships are merged and deleted with one row.
+
+        Args:
+            relationships(iterable): see BaseBackend.write_relationships.
+            batch_size(int, optional): number of relationships deleted at once.
+            Defaults to 1000.
+
+        Returns:
+            dict: see BaseBackend.get_write_stats.
+        """
+        start = time.time()
+        rows_count = 0
+        node_ids = {}
+        for batch in self._iter_batches(relationships, batch_size):
+            self._update_node_ids(node_ids, batch)
+
+            rows = {}
+            for relationship, count in self._count_relationships(batch):
+                x_node_id = node_ids.get(relationship['x'])
+                y_node_id = node_ids.get(relationship['y'])
+                if x_node_id is not None and y_node_id is not None:
+                    rows.setdefault(relationship['type'], []).append({
+                        'x': x_node_id,
+                        'y': y_node_id,
+                        'properties': relationship['properties'],
+                        'count': count
+                    })
+
+            # relationship type can't be a parameter
+            for relationship_type, type_rows in rows.items():
+                deleted = self.query(
+                    'UNWIND $rows AS row MATCH (x)-[r:%s]->(y)' % relationship_type
+                    + ' WHERE id(x) = row.x AND id(y) = row.y'
+                    + ' AND r.support = row.properties.support'
+                    + ' AND r.confidence = row.properties.confidence'
+                    + " AND coalesce(r.rel_id, '') = coalesce(row.properties.rel_id, '')"
+                    + ' WITH row, collect(r)[..row.count] AS rels UNWIND rels AS r'
+                    + ' DELETE r RETURN count(r) AS deleted', {'rows': type_rows})
+                rows_count += deleted[0]['deleted'] if deleted else 0
+
+        return self.get_write_stats(rows_count, time.time() - start)
+
+    def delete_associations(self, batch_size=1000):
+        """Delete all the ASSOCIATED and GROUPED relationships in batches, so
+        the deletion doesn't run in one huge transaction.
+
+        Args:
+            batch_size(int, optional): number of relationships deleted at once.
+            Defaults to 1000.
+
+        Returns:
+            dict: see BaseBackend.get_write_stats.
+        """
+        start = time.time()
+        rows_count = 0
+        for relationship_type in ['ASSOCIATED', 'GROUPED']:
+            while True:
+                deleted = self.query(
+                    'MATCH ()-[r:%s]->() WITH r LIMIT $limit DELETE r' % relationship_type
+                    + ' RETURN count(r) AS deleted', {'limit': batch_size})
+                deleted = deleted[0]['deleted'] if deleted else 0
+                rows_count += deleted
+                if deleted < batch_size:
+                    break
+
+        return self.get_write_stats(rows_count, time.time() - start)
+
+    def _update_node_ids(self, node_ids, relationships):
+        """Add internal IDs of PRODUCT nodes used in given relationships to the
+        node_ids index, if not already there.
+
+        Args:
+            node_ids(dict): product oid -> internal node ID or None if the
+            product doesn't exist.
+            relationships(list): see BaseBackend.write_relationships.
+        """
+        items = set()
+        for relationship in relationships:
+            items.update([relationship['x'], relationship['y']])
+        items = [item for item in items if item not in node_ids]
+
+        if items:
+            # products which are not found aren't looked up again
+            node_ids.update(dict.fromkeys(items))
+            for row in self.query(
+                    'MATCH (p:PRODUCT) WHERE p.oid IN $items RETURN p.oid AS oid, id(p) AS node_id',
+                    {'items': items}):
+                node_ids[row['oid']] = row['node_id']
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+from threading import Lock
+
+
+class Connection(object):
+    """Storage backend of one dataset with data which doesn't depend on the
+    testing part index, so it can be shared by all the DataManagers with the
+    same host config: fold boundaries for each k_fold_size and the
+    TransactionStore.
+
+    Args:
+        backend(BaseBackend)
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.transaction_store = None
+        self._k_fold_tfs = {}
+
+    def get_k_fold_tfs(self, k_fold_size, cache_path=None):
+        """Return fold boundaries for given number of data partitions. They
+        are computed only once, from the TransactionStore if loaded or with
+        the backend otherwise, and persisted in the cache file if given.
+
+        Args:
+            k_fold_size(int): number of data partitions.
+            cache_path(string, optional): path to JSON file with boundaries of
+            this dataset. The file is valid while the number of orders and
+            timestamps of the first and the last order are the same.
+
+        Returns:
+            list: see BaseBackend.get_k_fold_tfs.
+        """
+        if k_fold_size in self._k_fold_tfs:
+            return self._k_fold_tfs[k_fold_size]
+
+        cache = None
+        if cache_path is not None:
+            cache = self._load_k_fold_tfs_cache(cache_path)
+            if str(k_fold_size) in cache['k_fold_tfs']:
+                self._k_fold_tfs[k_fold_size] = cache['k_fold_tfs'][str(k_fold_size)]
+                return self._k_fold_tfs[k_fold_size]
+
+        if self.transaction_store is not None:
+            k_fold_tfs = self.transaction_store.get_k_fold_tfs(k_fold_size)
+        else:
+            k_fold_tfs = self.backend.get_k_fold_tfs(k_fold_size)
+        self._k_fold_tfs[k_fold_size] = [
+            {'timestamp': time_frame['timestamp']} for time_frame in k_fold_tfs]
+
+        if cache is not None:
+            cache['k_fold_tfs'][str(k_fold_size)] = self._k_fold_tfs[k_fold_size]
+            self._save_k_fold_tfs_cache(cache_path, cache)
+
+        return self._k_fold_tfs[k_fold_size]
+
+    def get_orders_count(self):
+        """Return the number of orders which contain at least one item.
+
+        Returns:
+            int
+        """
+        if self.transaction_store is not None:
+            return self.transaction_store.get_nonempty_orders_count()
+        return self.backend.get_orders_count()
+
+    def get_timestamps_range(self):
+        """Return timestamps of the first and the last order which contain at
+        least one item, see BaseBackend.get_timestamps_range.
+
+        Returns:
+            string: first timestamp.
+            string: last timestamp.
+        """
+        if self.transaction_store is not None:
+            return self.transaction_store.get_timestamps_range()
+        return self.backend.get_timestamps_range()
+
+    @staticmethod
+    def _save_k_fold_tfs_cache(cache_path, cache):
+        """Write fold boundaries cache file, its directory is created if
+        missing. The cache is best-effort, so if it can't be written the
+        boundaries are kept in memory only.
+
+        Args:
+            cache_path(string)
+            cache(dict): see _load_k_fold_tfs_cache.
+        """
+        try:
+            cache_dir = os.path.dirname(cache_path)
+            if cache_dir and not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir)
+            with open(cache_path, 'w') as cache_file:
+                json.dump(cache, cache_file)
+        except (IOError, OSError):
+            pass
+
+    def _load_k_fold_tfs_cache(self, cache_path):
+        """Return content of fold boundaries cache file, or an empty cache
+        if the file is missing or made for a different dataset, i.e. with a
+        different number of orders or timestamps of the first and the last
+        order.
+
+        Args:
+            cache_path(string)
+
+        Returns:
+            dict: with the following structure:
+                {
+                    'orders_count': int
+                    'first_timestamp': string
+                    'last_timestamp': string
+                    'k_fold_tfs': dict with k_fold_size(string) keys and
+                    values as returned by get_k_fold_tfs
+                }
+        """
+        first_timestamp, last_timestamp = self.get_timestamps_range()
+        dataset = {
+            'orders_count': self.get_orders_count(),
+            'first_timestamp': first_timestamp,
+            'last_timestamp': last_timestamp
+        }
+        if os.path.isfile(cache_path):
+            with open(cache_path) as cache_file:
+                try:
+                    cache = json.load(cache_file)
+                except ValueError:
+                    cache = None
+            if cache is not None \
+                and all(cache.get(key) == value for key, value in dataset.items()):
+                return cache
+
+        return dict(dataset, k_fold_tfs={})
+
+
+class ConnectionRegistry(object):
+    """Process-wide registry of Connections keyed by the host part of the
+    config, so each database is connected to only once, whatever the number
+    of config files or DataManagers using it.
+    """
+
+    def __init__(self):
+        self._connections = {}
+        self._lock = Lock()
+
+    def get(self, host, create_backend):
+        """Return connection for the given host config, create it if missing.
+
+        Args:
+            host(dict): 'host' part of the config file.
+            create_backend(function): returns BaseBackend for the host, called
+            only if the connection is missing.
+
+        Returns:
+            Connection
+        """
+        key = json.dumps(host, sort_keys=True)
+
+        with self._lock:
+            connection = self._connections.get(key)
+            if connection is None:
+                connection = Connection(create_backend(host))
+                self._connections[key] = connection
+
+        return connection
+
+    def clear(self):
+        """Remove all the connections."""
+        with self._lock:
+            self._connections = {}
@@ -1,10 +1,24 @@
 # -*- coding: utf-8 -*-
 
+from collections import defaultdict
+import copy
 import hashlib
 from itertools import combinations
 from operator import itemgetter
-from py2neo import Relationship, Node
+import random
+import numpy as np
+from mdar.mining.counting import ItemsetCounter
+from mdar.mining.fup import FUPMiner
+from mdar.mining.lossy_counting import LossyCounter
+from mdar.mining.parallel import fp_growth_parallel
+from mdar.mining.rule_table import RuleTable
+from mdar.mining.rules import get_rules, sort_rules
+from mdar.mining.toivonen import get_negative_border, verify_itemsets
 from mdar.query_manager import QueryManager
+from mdar.query_stats import QueryStats
+from mdar.result_cache import ResultCache, cached_result
+from mdar.time_cube import TimeCube
+from mdar.transaction_store import TransactionStore
 
 
 class DataManager(QueryManager):
@@ -15,6 +29,102 @@ class DataManager(QueryManager):
         config_path(string): path to a config.json file.
         k_fold_size(int, optional): number of data partitions. Defaults to 3.
     """
+    transaction_store = None
+    result_cache = None
+    mining_processes = 1
+    lossy_counting_error = None
+    lossy_counting_max_length = 3
+    sample_ratio = .1
+    sample_support_ratio = .8
+
+    def __init__(self, config_path=None, k_fold_size=3):
+        super(DataManager, self).__init__(config_path, k_fold_size)
+
+        data = self.config.get('data', {}) if self.config is not None else {}
+        self.result_cache = ResultCache(data.get('cache_size', 1024))
+        self.mining_processes = data.get('mining_processes', self.mining_processes)
+        self.lossy_counting_error = data.get('lossy_counting_error', self.lossy_counting_error)
+        self.lossy_counting_max_length = data.get(
+            'lossy_counting_max_length', self.lossy_counting_max_length)
+        self.sample_ratio = data.get('sample_ratio', self.sample_ratio)
+        self.sample_support_ratio = data.get('sample_support_ratio', self.sample_support_ratio)
+
+        if self.backend is not None and not self.backend.supports_cypher:
+            self.load_transaction_store()
+
+    def load_transaction_store(self, reload=False):
+        """Load all the orders into an in-memory TransactionStore which is
+        then used for answering queries without querying the storage backend.
+        Loaded automatically for backends without Cypher support. The store is
+        shared by all the DataManagers with the same connection.
+
+        Args:
+            reload(bool, optional): load the store from the backend even if
+            already loaded by other DataManager. Defaults to False.
+
+        Returns:
+            TransactionStore
+        """
+        transaction_store = None
+        if self.connection is not None and not reload:
+            transaction_store = self.connection.transaction_store
+
+        if transaction_store is None:
+            transaction_store = TransactionStore(
+                self.backend.get_time_frames(),
+                self.backend.get_order_users(),
+                self.backend.get_order_items(),
+                self.backend.get_product_cats(),
+                self.backend.get_products())
+            if self.connection is not None:
+                self.connection.transaction_store = transaction_store
+
+        if self.config is not None:
+            data = self.config.get('data', {})
+            transaction_store.use_bitsets = data.get(
+                'use_bitsets', transaction_store.use_bitsets)
+            transaction_store.use_cooccurrence = data.get(
+                'use_cooccurrence', transaction_store.use_cooccurrence)
+        self.transaction_store = transaction_store
+        self.clear_cache()
+        return self.transaction_store
+
+    def get_fold_view(self, testing_part_index):
+        """Return DataManager for given testing part which shares backend,
+        fold boundaries and TransactionStore with this one, but has its own
+        result cache and query statistics.
+
+        Args:
+            testing_part_index(int)
+
+        Returns:
+            DataManager
+        """
+        view = copy.copy(self)
+        if self.result_cache is not None:
+            view.result_cache = ResultCache(
+                self.result_cache.max_size, self.result_cache.max_rows)
+        if self.query_stats is not None:
+            view.query_stats = QueryStats(
+                self.query_stats.slow_query_threshold, self.query_stats.max_slow_queries)
+        view.testing_part_index = testing_part_index
+        return view
+
+    def clear_cache(self):
+        """Remove all the cached query results."""
+        if self.result_cache is not None:
+            self.result_cache.clear()
+
+    @QueryManager.testing_part_index.setter
+    def testing_part_index(self, value):
+        QueryManager.testing_part_index.fset(self, value)
+        self.clear_cache()
+
+    @QueryManager.k_fold_size.setter
+    def k_fold_size(self, value):
+        QueryManager.k_fold_size.fset(self, value)
+        self.clear_cache()
+
     def get_orders(self, data_type='all'):
         """Return all orders in defined data partition.
 
@@ -34,6 +144,52 @@ class DataManager(QueryManager):
                     'month': int
                 }
         """
+        if self.transaction_store is not None:
+            return self.transaction_store.get_orders(self.get_tf_ranges(data_type))
+
+        match, return_values = self._get_orders_query_clauses()
+        return self._query_db(match, return_values + ' ORDER BY timestamp', None, data_type)
+
+    def iter_orders(self, data_type='all'):
+        """Generate orders in defined data partition one by one, sorted by
+        timestamp. Order items are streamed from the cursor of one query, so
+        only one order is held in memory at once.
+
+        Args:
+            data_type(string, optional): 'train', 'test', or 'all' which is default.
+
+        Yields:
+            list: order items of one order, contains dicts with the same
+            structure as the ones returned by get_orders.
+        """
+        if self.transaction_store is not None:
+            for order_items in self.transaction_store.iter_orders(
+                    self.get_tf_ranges(data_type)):
+                yield order_items
+            return
+
+        match, return_values = self._get_orders_query_clauses()
+        return_values += ' ORDER BY timestamp, `order`, item'
+
+        order_items = []
+        for row in self._iter_query_db(match, return_values, None, data_type):
+            if order_items and row['order'] != order_items[0]['order']:
+                yield order_items
+                order_items = []
+            order_items.append(row)
+
+        if order_items:
+            yield order_items
+
+    @staticmethod
+    def _get_orders_query_clauses():
+        """Return MATCH and RETURN parts of Cypher query for obtaining order
+        items.
+
+        Returns:
+            string: MATCH part
+            string: RETURN values
+        """
         match = (
             '(tf:TIME_FRAME)<-[:CREATED_AT]-(o:ORDER)-[cr:CONTAINS]->(p:PRODUCT)'
             + '-[df:DEFINED]->(c:CAT), (o)<-[pr:PURCHASED]-(u:USER)')
@@ -41,10 +197,31 @@ class DataManager(QueryManager):
         return_values = (
             'u.oid AS user, o.oid AS order, p.oid AS item, collect(c.oid) AS cats, '
             + 'tf.timestamp AS timestamp, tf.day_in_week AS day_in_week, '
-            + 'tf.part_of_day AS part_of_day, tf.month AS month ORDER BY timestamp',)
+            + 'tf.part_of_day AS part_of_day, tf.month AS month')
+
+        return match, return_values
+
+    @cached_result
+    def get_max_order_items_count(self, data_type='all'):
+        """Return maximum number of items found in one order.
+
+        Args:
+            data_type(string, optional): 'train', 'test', or 'all' which is default.
+
+        Returns:
+            int
+        """
+        if self.transaction_store is not None:
+            return self.transaction_store.get_max_order_items_count(
+                self.get_tf_ranges(data_type))
 
-        return self._query_db(match, return_values, None, data_type)
+        order = self._query_db(
+            '(o:ORDER)-[:CONTAINS]->(p:PRODUCT), (o)-[:CREATED_AT]->(tf:TIME_FRAME)',
+            'o.oid AS order, count(p) AS items_count ORDER BY items_count DESC LIMIT 1',
+            None, data_type)
+        return order[0]['items_count'] if order else 0
 
+    @cached_result
     def get_associated_items(self, items_x, part_of_day=None, day_in_week=None, \
         month=None, search_for_n_itemset=False, data_type='all'):
         """Get items associated with given items as being part of the same rule
@@ -70,13 +247,18 @@ class DataManager(QueryManager):
         """
         orders_count = self.get_orders_count(data_type)
         return_values = (
-            'p.oid AS item_x, p1.oid AS item, toFloat(count(o)/%f) AS support' % orders_count
+            'p.oid AS item_x, p1.oid AS item, toFloat(count(o))/$orders_count AS support'
             + ' ORDER BY support DESC')
 
         if not search_for_n_itemset:
-            items_list = self._list_to_string(items_x)
-
-            where = 'p.oid IN %s AND NOT p1.oid IN %s' % (items_list, items_list)
+            if self.transaction_store is not None:
+                connected_items = self.transaction_store.get_connected_items(
+                    items_x, orders_count, self.get_tf_ranges(data_type),
+                    part_of_day, day_in_week, month)
+                return self._append_x_support(
+                    items_x, connected_items, orders_count, data_type)
+
+            where = 'p.oid IN $items AND NOT p1.oid IN $items'
             time_constraints = self._get_time_constraints(part_of_day, day_in_week, month)
             if time_constraints:
                 where += ' AND %s' % time_constraints
@@ -85,32 +267,39 @@ class DataManager(QueryManager):
                 '(p:PRODUCT)<-[:CONTAINS]-(o:ORDER)-[:CONTAINS]->(p1:PRODUCT),'
                 + ' (o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME)')
 
-            connected_items = self._query_db(match, return_values, where, data_type)
+            parameters = self._get_time_parameters(part_of_day, day_in_week, month)
+            parameters.update({'items': list(items_x), 'orders_count': orders_count})
+
+            connected_items = self._query_db(match, return_values, where, data_type, parameters)
             return self._append_x_support(items_x, connected_items, orders_count, data_type)
         else:
             max_combination_length = len(items_x) + 1
             if max_combination_length > 3:
                 max_combination_length = 3
 
-            item_combinations = sum([map(list, combinations(items_x, i)) \
-                for i in range(1, max_combination_length)], [])
-
+            # combinations are queried in rounds by their length, combinations
+            # which contain an item without connected items are pruned
             connected_items = []
             unprosperous_items = []
-            for item_combination in item_combinations:
-                is_unprosperous = False
-                for i in item_combination:
-                    if [i] in unprosperous_items:
-                        is_unprosperous = True
-                        break
-                if is_unprosperous:
-                    continue
-                new_connected_items = self._get_connected_items(
-                    item_combination, orders_count, data_type)
-                if new_connected_items:
-                    connected_items += new_connected_items
-                else:
-                    unprosperous_items.append(item_combination)
+            for combination_length in range(1, max_combination_length):
+                item_combinations = []
+                for item_combination in map(list, combinations(items_x, combination_length)):
+                    is_unprosperous = False
+                    for i in item_combination:
+                        if [i] in unprosperous_items:
+                            is_unprosperous = True
+                            break
+                    if not is_unprosperous:
+                        item_combinations.append(item_combination)
+
+                connected_itemsets = self._get_connected_itemsets(
+                    item_combinations, orders_count, data_type)
+                for item_combination, new_connected_items in \
+                    zip(item_combinations, connected_itemsets):
+                    if new_connected_items:
+                        connected_items += new_connected_items
+                    else:
+                        unprosperous_items.append(item_combination)
 
             connected_items_all = []
 
@@ -126,9 +315,37 @@ class DataManager(QueryManager):
 
             return connected_items_all
 
+    def get_pair_measures(self, item_x, item_y, part_of_day=None, day_in_week=None, \
+        data_type='all'):
+        """Return support, confidence and lift of the rule item_x -> item_y from
+        the co-occurrence matrix of the data partition, loads the
+        TransactionStore if needed.
+
+        Args:
+            item_x(int)
+            item_y(int)
+            part_of_day(string, optional)
+            day_in_week(string, optional)
+            data_type(string, optional): 'train', 'test', or 'all' which is default.
+
+        Returns:
+            dict: with the following structure:
+                {
+                    'support': float
+                    'confidence': float
+                    'lift': float
+                }
+        """
+        if self.transaction_store is None:
+            self.load_transaction_store()
+
+        return self.transaction_store.get_pair_measures(
+            item_x, item_y, self.get_orders_count(data_type), self.get_tf_ranges(data_type),
+            part_of_day, day_in_week)
+
     def get_association_rules(self, min_support, max_x_count=2, \
         use_part_of_day=False, use_day_in_week=False, use_month=False, \
-        use_confidence=False, data_type='train'):
+        use_confidence=False, data_type='train', algorithm=None):
         """Generates and returns a list of association rules with all the enabled
         measures with all the time attributes that are enabled via method args.
 
@@ -141,6 +358,14 @@ class DataManager(QueryManager):
             use_month(bool, optional): defaults to False.
             use_confidence(bool, optional): defaults to False.
             data_type(string, optional): 'train', 'test', or 'all' which is default.
+            algorithm(string, optional): 'fp_growth' mines rules in process from
+            transactions of the data partition, 'eclat' mines them on bit
+            arrays of the TransactionStore (loaded if needed), 'lossy_counting'
+            counts itemsets approximately in one pass over the transactions
+            and verifies the candidates in a second one, 'toivonen' mines a
+            sample and verifies it, rules are mined with FP-Growth if the
+            sample misses some of them. By default rules are queried with
+            Cypher, or mined with FP-Growth if the TransactionStore is loaded.
 
         Returns:
             list: contains dicts with the following structure:
@@ -151,6 +376,35 @@ class DataManager(QueryManager):
                     'confidence': float
                 }
         """
+        if algorithm == 'fp_growth':
+            return self._get_fp_growth_rules(
+                min_support, max_x_count, use_part_of_day, use_day_in_week,
+                use_month, use_confidence, data_type)
+        elif algorithm == 'eclat':
+            return self._get_eclat_rules(
+                min_support, max_x_count, use_part_of_day, use_day_in_week,
+                use_month, use_confidence, data_type)
+        elif algorithm == 'lossy_counting':
+            return self._get_lossy_counting_rules(
+                min_support, max_x_count, use_part_of_day, use_day_in_week,
+                use_month, use_confidence, data_type)
+        elif algorithm == 'toivonen':
+            rules, is_exact = self.get_sampled_association_rules(
+                min_support, max_x_count, use_part_of_day, use_day_in_week,
+                use_month, use_confidence, data_type)
+            if is_exact:
+                return rules
+            return self._get_fp_growth_rules(
+                min_support, max_x_count, use_part_of_day, use_day_in_week,
+                use_month, use_confidence, data_type)
+
+        # transactions of a loaded store are mined in process, instead of
+        # counting combinations of items of each order
+        if self.transaction_store is not None:
+            return self._get_fp_growth_rules(
+                min_support, max_x_count, use_part_of_day, use_day_in_week,
+                use_month, use_confidence, data_type)
+
         rules = []
         orders_count = self.get_orders_count(data_type)
 
@@ -159,7 +413,8 @@ class DataManager(QueryManager):
                 x_count, orders_count, use_part_of_day,
                 use_day_in_week, use_month)
 
-            current_rules = self._query_db(match, return_values, where, data_type)
+            parameters = {'orders_count': orders_count}
+            current_rules = self._query_db(match, return_values, where, data_type, parameters)
             if current_rules[0]['support'] >= min_support:
                 if use_confidence:
                     match = '(p0:PRODUCT)<-[:CONTAINS]-(o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME)'
@@ -174,14 +429,20 @@ class DataManager(QueryManager):
                     return_values += '] AS x, '
                     return_values += self._get_tf_props(use_part_of_day, use_day_in_week, use_month)
                     return_values += (
-                        'toFloat(count(o)/%f) AS support_x ORDER BY support_x DESC'
-                        % orders_count)
-
-                    items_x = self._query_db(match, return_values, where, data_type)
-                    for j in range(0, len(current_rules)):
-                        current_rules[j]['confidence'] = \
-                            current_rules[j]['support'] / (item['support_x'] \
-                            for item in items_x if item['x'] == current_rules[j]['x']).next()
+                        'toFloat(count(o))/$orders_count AS support_x ORDER BY support_x DESC')
+
+                    # bodies are looked up by items and time attributes values
+                    time_attribute_names = self._get_time_attribute_names(
+                        use_part_of_day, use_day_in_week, use_month)
+                    supports_x = {}
+                    for item in self._query_db(
+                            match, return_values, where, data_type, parameters):
+                        supports_x.setdefault(
+                            tuple(item['x'] + [item[name] for name in time_attribute_names]),
+                            item['support_x'])
+                    for rule in current_rules:
+                        rule['confidence'] = rule['support'] / supports_x[
+                            tuple(rule['x'] + [rule[name] for name in time_attribute_names])]
 
                 rules += current_rules
 
@@ -190,6 +451,369 @@ class DataManager(QueryManager):
 
         return rules
 
+    def _get_fp_growth_rules(self, min_support, max_x_count, use_part_of_day, \
+        use_day_in_week, use_month, use_confidence, data_type):
+        """Mine association rules with FP-Growth, separately for transactions
+        of each combination of enabled time attributes. Conditional trees are
+        mined in mining_processes processes.
+
+        Args:
+            see get_association_rules.
+
+        Returns:
+            list: see get_association_rules, sorted by body length and support.
+        """
+        orders_count = self.get_orders_count(data_type)
+        min_count = min_support * orders_count
+
+        transactions_groups = self.get_transactions(
+            use_part_of_day, use_day_in_week, use_month, data_type)
+        itemsets_counts_groups = fp_growth_parallel(
+            [transactions for _, transactions in transactions_groups], min_count,
+            max_x_count + 1, self.mining_processes)
+
+        rules = []
+        for (time_attributes, _), itemsets_counts in zip(
+                transactions_groups, itemsets_counts_groups):
+            rules += get_rules(
+                itemsets_counts, orders_count, min_count, use_confidence, time_attributes)
+
+        return sort_rules(rules)
+
+    def _get_eclat_rules(self, min_support, max_x_count, use_part_of_day, \
+        use_day_in_week, use_month, use_confidence, data_type):
+        """Mine association rules with Eclat on the bit arrays of the
+        TransactionStore, separately for each combination of enabled time
+        attributes. Prefixes are mined in mining_processes processes.
+
+        Args:
+            see get_association_rules.
+
+        Returns:
+            list: see get_association_rules, sorted by body length and support.
+        """
+        if self.transaction_store is None:
+            self.load_transaction_store()
+
+        orders_count = self.get_orders_count(data_type)
+        min_count = min_support * orders_count
+
+        rules = []
+        for time_attributes, itemsets_counts in self.transaction_store.get_frequent_itemsets(
+                min_count, max_x_count + 1, use_part_of_day, use_day_in_week, use_month,
+                self.get_tf_ranges(data_type), self.mining_processes):
+            rules += get_rules(
+                itemsets_counts, orders_count, min_count, use_confidence, time_attributes)
+
+        return sort_rules(rules)
+
+    def _get_lossy_counting_rules(self, min_support, max_x_count, use_part_of_day, \
+        use_day_in_week, use_month, use_confidence, data_type):
+        """Mine association rules with Lossy Counting, separately for
+        transactions of each combination of enabled time attributes. Itemsets
+        are counted approximately in one pass over the streamed transactions,
+        with bounded memory, and candidates which can be frequent are counted
+        exactly in a second pass, so the rules are the same as the ones mined
+        with FP-Growth. Error of the approximate counts is lossy_counting_error
+        relative to the number of transactions, a tenth of min_support if not
+        set. Itemsets are counted up to lossy_counting_max_length items, so
+        rule bodies can have one item less, longer bodies have to be mined
+        with 'fp_growth' or 'eclat'.
+
+        Args:
+            see get_association_rules.
+
+        Returns:
+            list: see get_association_rules, sorted by body length and support.
+
+        Raises:
+            ValueError: if max_x_count + 1 is greater than
+            lossy_counting_max_length.
+        """
+        if max_x_count + 1 > self.lossy_counting_max_length:
+            raise ValueError(
+                'Lossy Counting counts itemsets up to %d items, rule bodies of %d items '
+                'need a greater lossy_counting_max_length or another algorithm'
+                % (self.lossy_counting_max_length, max_x_count))
+
+        orders_count = self.get_orders_count(data_type)
+        min_count = min_support * orders_count
+        error = self.lossy_counting_error
+        if error is None:
+            error = min_support / 10.0
+        flags = (use_part_of_day, use_day_in_week, use_month)
+
+        groups = {}
+        for time_attributes, items in self.iter_transactions(*flags, data_type=data_type):
+            key = tuple(sorted(time_attributes.items()))
+            if key not in groups:
+                groups[key] = (time_attributes, LossyCounter(error, max_x_count + 1))
+            groups[key][1].add(items)
+
+        counters = dict(
+            (key, ItemsetCounter(lossy_counter.get_candidates(min_count)))
+            for key, (_, lossy_counter) in groups.iteritems())
+        for time_attributes, items in self.iter_transactions(*flags, data_type=data_type):
+            counters[tuple(sorted(time_attributes.items()))].add(items)
+
+        rules = []
+        for key, (time_attributes, _) in sorted(groups.iteritems()):
+            itemsets_counts = dict(
+                (itemset, count) for itemset, count in counters[key].counts.iteritems()
+                if count >= min_count and count > 0)
+            rules += get_rules(
+                itemsets_counts, orders_count, min_count, use_confidence, time_attributes)
+
+        return sort_rules(rules)
+
+    def get_sampled_association_rules(self, min_support, max_x_count=2, \
+        use_part_of_day=False, use_day_in_week=False, use_month=False, \
+        use_confidence=False, data_type='train', seed=None):
+        """Mine association rules with Toivonen's sampling algorithm: a random
+        sample of sample_ratio transactions is mined with FP-Growth at
+        sample_support_ratio of the minimum support, then the sample frequent
+        itemsets, their negative border and all the items are counted in one
+        pass over all the transactions. If no item or itemset of the negative
+        border is frequent, no frequent itemset was missed.
+
+        Args:
+            min_support(float): minimum support for a rule to be accepted.
+            max_x_count(int, optional): maximum number of items in rule's body.
+            Defaults to 2.
+            use_part_of_day(bool, optional): defaults to False.
+            use_day_in_week(bool, optional): defaults to False.
+            use_month(bool, optional): defaults to False.
+            use_confidence(bool, optional): defaults to False.
+            data_type(string, optional): 'train', 'test', or 'all'. Defaults
+            to 'train'.
+            seed(int, optional): seed of the sample, random if None.
+
+        Returns:
+            list: see get_association_rules, sorted by body length and support.
+            Supports and confidences are exact, but some rules can be missing.
+            bool: True if the rules are known to be all the rules.
+        """
+        orders_count = self.get_orders_count(data_type)
+        min_count = min_support * orders_count
+        flags = (use_part_of_day, use_day_in_week, use_month)
+        generator = random.Random(seed)
+
+        groups = {}
+        transactions_count = 0
+        for time_attributes, items in self.iter_transactions(*flags, data_type=data_type):
+            key = tuple(sorted(time_attributes.items()))
+            if key not in groups:
+                groups[key] = (time_attributes, [])
+            if generator.random() < self.sample_ratio:
+                groups[key][1].append(items)
+            transactions_count += 1
+
+        keys = sorted(groups)
+        sample_count = sum(len(groups[key][1]) for key in keys)
+        sample_min_count = self.sample_support_ratio * min_count * sample_count \
+            / max(transactions_count, 1)
+        sample_itemsets_groups = [
+            set(tuple(sorted(itemset)) for itemset in itemsets_counts)
+            for itemsets_counts in fp_growth_parallel(
+                [groups[key][1] for key in keys], max(sample_min_count, 1),
+                max_x_count + 1, self.mining_processes)]
+
+        counters = {}
+        items_counts = {}
+        for key, sample_itemsets in zip(keys, sample_itemsets_groups):
+            counters[key] = ItemsetCounter(
+                [itemset for itemset in sample_itemsets if len(itemset) > 1]
+                + get_negative_border(sample_itemsets, max_x_count + 1))
+            items_counts[key] = defaultdict(int)
+        for time_attributes, items in self.iter_transactions(*flags, data_type=data_type):
+            key = tuple(sorted(time_attributes.items()))
+            counters[key].add(items)
+            for item in set(items):
+                items_counts[key][item] += 1
+
+        rules = []
+        is_exact = True
+        for key, sample_itemsets in zip(keys, sample_itemsets_groups):
+            itemsets_counts, is_group_exact = verify_itemsets(
+                sample_itemsets, items_counts[key], counters[key].counts, min_count)
+            is_exact = is_exact and is_group_exact
+            rules += get_rules(
+                itemsets_counts, orders_count, min_count, use_confidence, groups[key][0])
+
+        return sort_rules(rules), is_exact
+
+    def iter_transactions(self, use_part_of_day=False, use_day_in_week=False, \
+        use_month=False, data_type='train'):
+        """Generate unique items of each order one by one, orders are streamed
+        from the cursor of one query, so they are never held in memory at once.
+
+        Args:
+            use_part_of_day(bool, optional): defaults to False.
+            use_day_in_week(bool, optional): defaults to False.
+            use_month(bool, optional): defaults to False.
+            data_type(string, optional): 'train', 'test', or 'all'. Defaults
+            to 'train'.
+
+        Yields:
+            tuple: time attributes(0, dict with enabled 'part_of_day',
+            'day_in_week' and 'month' values) and item IDs(1, list of int) of
+            one order.
+        """
+        if self.transaction_store is not None:
+            for transaction in self.transaction_store.iter_transactions(
+                    use_part_of_day, use_day_in_week, use_month,
+                    self.get_tf_ranges(data_type)):
+                yield transaction
+            return
+
+        time_attribute_names = self._get_time_attribute_names(
+            use_part_of_day, use_day_in_week, use_month)
+        tf_props = self._get_tf_props(use_part_of_day, use_day_in_week, use_month)
+
+        rows = self._iter_query_db(
+            '(o:ORDER)-[:CONTAINS]->(p:PRODUCT), (o)-[:CREATED_AT]->(tf:TIME_FRAME)',
+            'o.oid AS `order`, %scollect(DISTINCT p.oid) AS items' % tf_props,
+            None, data_type)
+        for row in rows:
+            yield dict((name, row[name]) for name in time_attribute_names), row['items']
+
+    def get_transactions(self, use_part_of_day=False, use_day_in_week=False, \
+        use_month=False, data_type='train'):
+        """Return unique items of each order, grouped by values of enabled
+        time attributes.
+
+        Args:
+            use_part_of_day(bool, optional): defaults to False.
+            use_day_in_week(bool, optional): defaults to False.
+            use_month(bool, optional): defaults to False.
+            data_type(string, optional): 'train', 'test', or 'all'. Defaults
+            to 'train'.
+
+        Returns:
+            list: contains tuples with time attributes(0, dict with enabled
+            'part_of_day', 'day_in_week' and 'month' values) and list of
+            transactions(1), each is a list of item IDs(int).
+        """
+        if self.transaction_store is not None:
+            return self.transaction_store.get_transactions(
+                use_part_of_day, use_day_in_week, use_month, self.get_tf_ranges(data_type))
+
+        tf_props = self._get_tf_props(use_part_of_day, use_day_in_week, use_month)
+        orders = self._query_db(
+            '(o:ORDER)-[:CONTAINS]->(p:PRODUCT), (o)-[:CREATED_AT]->(tf:TIME_FRAME)',
+            'o.oid AS order, %scollect(DISTINCT p.oid) AS items' % tf_props, None, data_type)
+
+        return self._group_transactions(orders, use_part_of_day, use_day_in_week, use_month)
+
+    def get_orders_transactions(self, orders, use_part_of_day=False, \
+        use_day_in_week=False, use_month=False):
+        """Return unique items of given orders, grouped by values of enabled
+        time attributes.
+
+        Args:
+            orders(list): contains lists of order items, see iter_orders.
+            use_part_of_day(bool, optional): defaults to False.
+            use_day_in_week(bool, optional): defaults to False.
+            use_month(bool, optional): defaults to False.
+
+        Returns:
+            list: see get_transactions.
+        """
+        rows = []
+        for order_items in orders:
+            if order_items:
+                row = dict(order_items[0])
+                row['items'] = list(set(order_item['item'] for order_item in order_items))
+                rows.append(row)
+
+        return self._group_transactions(rows, use_part_of_day, use_day_in_week, use_month)
+
+    @staticmethod
+    def _group_transactions(orders, use_part_of_day, use_day_in_week, use_month):
+        """Group items of orders by values of enabled time attributes.
+
+        Args:
+            orders(list): contains dicts with 'items' and time attributes keys.
+            use_part_of_day(bool)
+            use_day_in_week(bool)
+            use_month(bool)
+
+        Returns:
+            list: see get_transactions.
+        """
+        time_attribute_names = DataManager._get_time_attribute_names(
+            use_part_of_day, use_day_in_week, use_month)
+
+        transactions = {}
+        for order in orders:
+            key = tuple(order[name] for name in time_attribute_names)
+            transactions.setdefault(key, []).append(order['items'])
+
+        return [
+            (dict(zip(time_attribute_names, key)), key_transactions)
+            for key, key_transactions in sorted(transactions.iteritems())]
+
+    def get_rule_table(self, rules, data_type='train'):
+        """Return RuleTable of given rules with lift, conviction and leverage
+        computed from supports of the heads in the data partition.
+
+        Args:
+            rules(list): see get_association_rules, with confidence.
+            data_type(string, optional): 'train', 'test', or 'all'. Defaults
+            to 'train'.
+
+        Returns:
+            RuleTable
+        """
+        rule_table = RuleTable.from_rules(rules)
+        items_y = np.unique(rule_table.rules['y']).tolist()
+        rule_table.set_measures(dict(zip(items_y, self.get_supports(
+            items_y, self.get_orders_count(data_type), data_type))))
+        return rule_table
+
+    def get_rule_miner(self, min_support, max_x_count=2, use_part_of_day=False, \
+        use_day_in_week=False, use_month=False, data_type='train'):
+        """Mine frequent itemsets of the data partition into FUPMiner, which
+        can be updated with new orders without mining all the orders again.
+
+        Args:
+            min_support(float): minimum support for a rule to be accepted.
+            max_x_count(int, optional): maximum number of items in rule's body.
+            Defaults to 2.
+            use_part_of_day(bool, optional): defaults to False.
+            use_day_in_week(bool, optional): defaults to False.
+            use_month(bool, optional): defaults to False.
+            data_type(string, optional): 'train', 'test', or 'all'. Defaults
+            to 'train'.
+
+        Returns:
+            FUPMiner
+        """
+        time_attributes = self._get_time_attribute_names(
+            use_part_of_day, use_day_in_week, use_month)
+
+        return FUPMiner(
+            self.get_transactions(use_part_of_day, use_day_in_week, use_month, data_type),
+            self.get_orders_count(data_type), min_support, max_x_count + 1,
+            time_attributes, self.mining_processes)
+
+    def update_rule_miner(self, rule_miner, orders):
+        """Update frequent itemsets of the rule miner with new orders.
+
+        Args:
+            rule_miner(FUPMiner): see get_rule_miner.
+            orders(list): contains lists of order items, see iter_orders.
+
+        Returns:
+            list: see FUPMiner.update.
+        """
+        time_attributes = rule_miner.time_attributes
+        transactions_groups = self.get_orders_transactions(
+            orders, 'part_of_day' in time_attributes, 'day_in_week' in time_attributes,
+            'month' in time_attributes)
+        return rule_miner.update(
+            transactions_groups, len([order_items for order_items in orders if order_items]))
+
     def _get_association_rules_query_clauses(self, x_count, orders_count, \
         use_part_of_day, use_day_in_week, use_month):
         """Generate MATCH, WHERE and RETURN parts of Cypher query for obtaining
@@ -232,37 +856,62 @@ class DataManager(QueryManager):
 
         return_values = '%s AS x, p.oid AS y, ' % p_oid_list
         return_values += self._get_tf_props(use_part_of_day, use_day_in_week, use_month)
-        return_values += 'toFloat(count(o)/%f) AS support ORDER BY support DESC' % orders_count
+        return_values += 'toFloat(count(o))/$orders_count AS support ORDER BY support DESC'
 
         return match, where, return_values
 
-    def _get_connected_items(self, items, orders_count, data_type):
-        """Return items connected to a given items via association rules.
+    def _get_connected_itemsets(self, itemsets, orders_count, data_type):
+        """Return items connected to each of the given sets of items via
+        association rules. Connected items and supports of all the itemsets
+        are fetched with one bulk query each.
+
         Args:
-            items_x(list): contains item IDs(int)
+            itemsets(list): contains lists of item IDs(int)
             orders_count(int)
             data_type(string): 'train', 'test' or 'all'
         Returns:
-            list: contains dict with the following structure:
+            list: contains a list for each itemset, in the same order, with
+            dicts of the following structure:
                 {
                     'item': int
-                    'item_x': int
+                    'item_x': list of IDs(int)
                     'support': float
                     'support_x': float
                 }
         """
-        items_string = self._list_to_string(items)
-
-        match = (
-            '(p:PRODUCT)<-[:CONTAINS]-(o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME),'
-            + ' (o:ORDER)-[:CONTAINS]->(p1:PRODUCT)')
-        where = 'p.oid IN %s AND NOT p1.oid IN %s' % (items_string, items_string)
-        return_values = (
-            '%s AS item_x, p1.oid AS item,' % items_string
-            + 'toFloat(count(o.oid)/%d) AS support ORDER BY support DESC' % orders_count)
-
-        connected_items = self._query_db(match, return_values, where, data_type)
-        return self._append_x_support(items, connected_items, orders_count, data_type)
+        if not itemsets:
+            return []
+
+        if self.transaction_store is not None:
+            connected_itemsets = [
+                self.transaction_store.get_connected_items(
+                    itemset, orders_count, self.get_tf_ranges(data_type), merge_items_x=True)
+                for itemset in itemsets]
+        else:
+            match = (
+                '(p:PRODUCT)<-[:CONTAINS]-(o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME),'
+                + ' (o:ORDER)-[:CONTAINS]->(p1:PRODUCT)')
+            where = 'p.oid IN itemset AND NOT p1.oid IN itemset'
+            return_values = (
+                'itemset AS item_x, p1.oid AS item,'
+                + 'toFloat(count(o.oid))/$orders_count AS support ORDER BY support DESC')
+
+            parameters = {'itemsets': itemsets, 'orders_count': orders_count}
+            rows = self._query_db(
+                match, return_values, where, data_type, parameters, '$itemsets AS itemset')
+
+            connected_items = {}
+            for row in rows:
+                connected_items.setdefault(tuple(row['item_x']), []).append(row)
+            connected_itemsets = [
+                connected_items.get(tuple(itemset), []) for itemset in itemsets]
+
+        supports_x = self.get_supports(itemsets, orders_count, data_type)
+        for connected_items, support_x in zip(connected_itemsets, supports_x):
+            for connected_item in connected_items:
+                connected_item['support_x'] = support_x
+
+        return connected_itemsets
 
     def _append_x_support(self, items_x, items, orders_count, data_type):
         """Calcuate support for items_x and append it to items list.
@@ -284,12 +933,18 @@ class DataManager(QueryManager):
         return items
 
     def delete_associations(self):
-        """Delete all the association relationships in the graph database."""
-        self.graph.data('MATCH ()-[r:ASSOCIATED]->() DELETE r')
-        self.graph.data('MATCH ()-[r:GROUPED]->() DELETE r')
+        """Delete all the association relationships in the storage backend,
+        batch_size relationships at once.
+
+        Returns:
+            dict: see BaseBackend.get_write_stats.
+        """
+        stats = self.backend.delete_associations(self.batch_size)
+        self.clear_cache()
+        return stats
 
     def write_associations(self, rules, neighbourhood_size=20):
-        """Write rules to the graph database as relationships between PRODUCT
+        """Write rules to the storage backend as relationships between PRODUCT
         nodes with all the measure values.
 
         Args:
@@ -302,65 +957,176 @@ class DataManager(QueryManager):
                 }
             neighbourhood_size(int, optional): maximum number of items connected
             to a single item. Defaults to 20.
+
+        Returns:
+            dict: see BaseBackend.get_write_stats.
+        """
+        stats = self.backend.write_relationships(
+            self._get_association_relationships(rules, neighbourhood_size), self.batch_size)
+        self.clear_cache()
+        return stats
+
+    def update_associations(self, written_rules, rules, neighbourhood_size=20, \
+        tolerance=.01):
+        """Patch association relationships in the storage backend after the
+        rules were updated. Relationships are rewritten only for head items
+        whose rules were added, removed or changed their support or confidence
+        by more than tolerance (relative), so written measures of the other
+        heads can differ from the rules by up to the tolerance.
+
+        Args:
+            written_rules(list): rules whose relationships are in the backend,
+            see write_associations, sorted by the head item.
+            rules(list): updated rules, sorted the same way.
+            neighbourhood_size(int, optional): maximum number of items connected
+            to a single item. Defaults to 20.
+            tolerance(float, optional): relative change of measures which is
+            ignored. Defaults to .01.
+
+        Returns:
+            list: rules whose relationships are in the backend now, sorted
+            by the head item.
+            dict: with the following structure:
+                {
+                    'heads': int, number of patched head items
+                    'deleted': dict, see BaseBackend.get_write_stats
+                    'written': dict, see BaseBackend.get_write_stats
+                }
+        """
+        written_heads = self._group_rules_by_head(written_rules)
+        heads = self._group_rules_by_head(rules)
+
+        changed_heads = set(
+            y for y in set(written_heads).union(heads)
+            if self._are_rules_changed(
+                written_heads.get(y, []), heads.get(y, []), tolerance))
+
+        delete_stats = self.backend.delete_relationships(
+            self._get_association_relationships([
+                rule for y in written_heads if y in changed_heads
+                for rule in written_heads[y]], neighbourhood_size),
+            self.batch_size)
+        write_stats = self.backend.write_relationships(
+            self._get_association_relationships([
+                rule for y in heads if y in changed_heads
+                for rule in heads[y]], neighbourhood_size),
+            self.batch_size)
+        self.clear_cache()
+
+        updated_rules = []
+        for y in sorted(set(written_heads).union(heads), reverse=True):
+            updated_rules += heads.get(y, []) if y in changed_heads else written_heads[y]
+
+        return updated_rules, {
+            'heads': len(changed_heads),
+            'deleted': delete_stats,
+            'written': write_stats
+        }
+
+    @staticmethod
+    def _group_rules_by_head(rules):
+        """Return rules of each head item, in the order of given rules.
+
+        Args:
+            rules(list): see write_associations.
+
+        Returns:
+            dict: head item ID -> list of rules
+        """
+        heads = {}
+        for rule in rules:
+            heads.setdefault(rule['y'], []).append(rule)
+        return heads
+
+    @staticmethod
+    def _are_rules_changed(old_rules, new_rules, tolerance):
+        """Check if rules of one head differ in items, time attributes or in
+        support or confidence by more than tolerance.
+
+        Args:
+            old_rules(list)
+            new_rules(list)
+            tolerance(float)
+
+        Returns:
+            bool
         """
-        batch = self.graph.begin()
+        if len(old_rules) != len(new_rules):
+            return True
 
-        item_ids = set(map(itemgetter('y'), rules))
-        item_nodes_generator = self.graph.find(
-            label='PRODUCT', property_key='oid', property_value=item_ids)
+        for old_rule, new_rule in zip(old_rules, new_rules):
+            for key in ['x', 'part_of_day', 'day_in_week', 'month']:
+                if old_rule.get(key) != new_rule.get(key):
+                    return True
+            for key in ['support', 'confidence']:
+                if abs(new_rule.get(key, 0) - old_rule.get(key, 0)) \
+                    > tolerance * abs(old_rule.get(key, 0)):
+                    return True
 
-        item_nodes = []
-        for item_node in item_nodes_generator:
-            item_nodes.append(item_node)
+        return False
+
+    @staticmethod
+    def _get_association_relationships(rules, neighbourhood_size):
+        """Generate relationships which represent given rules. Single item body
+        is ASSOCIATED with the rule head, while multiple body items are chained
+        with GROUPED relationships and the last one is ASSOCIATED with the head.
 
-        y_current = Node()
+        Args:
+            rules(list): see write_associations, sorted by the head item.
+            neighbourhood_size(int): maximum number of items connected to a
+            single item.
+
+        Yields:
+            dict: with the following structure:
+                {
+                    'type': 'ASSOCIATED' or 'GROUPED'
+                    'x': int
+                    'y': int
+                    'properties': dict
+                }
+        """
+        y_current = None
         neighbourhood_counter = 0
         for rule in rules:
-            if not y_current or y_current['oid'] != rule['y']:
-                for item_node in item_nodes:
-                    if item_node['oid'] == rule['y']:
-                        y_current = item_node
-                        neighbourhood_counter = 0
-                        break
+            if rule['y'] != y_current:
+                y_current = rule['y']
+                neighbourhood_counter = 0
 
             if neighbourhood_counter >= neighbourhood_size:
                 continue
             else:
                 neighbourhood_counter += 1
 
-            # obtain X node/s
-            x_nodes = []
-            for x_oid in rule['x']:
-                for item_node in item_nodes:
-                    if item_node['oid'] == x_oid:
-                        x_nodes.append(item_node)
-
-            x_nodes_count = len(x_nodes)
-            if x_nodes_count:
-                if x_nodes_count == 1:
-                    batch.create(Relationship(
-                        x_nodes[0], 'ASSOCIATED',
-                        y_current, support=rule['support'],
-                        confidence=rule['confidence'], single=True))
-                else:
-                    associated_id = str(y_current['oid'])
-                    for x_node in x_nodes:
-                        associated_id += str(x_node['oid'])
-                    associated_id = hashlib.sha224(associated_id).hexdigest()
-
-                    x_node_index = 0
-                    for x_node_index in range(0, len(x_nodes) - 1):
-                        batch.create(Relationship(
-                            x_nodes[x_node_index], 'GROUPED', x_nodes[x_node_index + 1],
-                            support=rule['support'],
-                            confidence=rule['confidence'], rel_id=associated_id))
-
-                    batch.create(Relationship(
-                        x_nodes[x_node_index + 1], 'ASSOCIATED', y_current,
-                        support=rule['support'], confidence=rule['confidence'],
-                        rel_id=associated_id, single=False))
-
-        batch.commit()
+            if not rule['x']:
+                continue
+            if len(rule['x']) == 1:
+                yield {
+                    'type': 'ASSOCIATED', 'x': rule['x'][0], 'y': rule['y'],
+                    'properties': {
+                        'support': rule['support'], 'confidence': rule['confidence'],
+                        'single': True
+                    }
+                }
+            else:
+                associated_id = str(rule['y'])
+                for x_oid in rule['x']:
+                    associated_id += str(x_oid)
+                associated_id = hashlib.sha224(associated_id).hexdigest()
+
+                properties = {
+                    'support': rule['support'], 'confidence': rule['confidence'],
+                    'rel_id': associated_id
+                }
+                for x_index in range(0, len(rule['x']) - 1):
+                    yield {
+                        'type': 'GROUPED', 'x': rule['x'][x_index],
+                        'y': rule['x'][x_index + 1], 'properties': properties
+                    }
+
+                yield {
+                    'type': 'ASSOCIATED', 'x': rule['x'][-1], 'y': rule['y'],
+                    'properties': dict(properties, single=False)
+                }
 
     def get_associations(self, items):
         """Return associated items with given one sorted by support and confidence.
@@ -371,15 +1137,7 @@ class DataManager(QueryManager):
         Returns:
             list: contains item IDs(int)
         """
-        return_values = (
-            'p1.oid AS item, a_rel.support AS support,'
-            + ' a_rel.confidence AS confidence ORDER BY support, confidence')
-
-        items_string = self._list_to_string(items)
-        associated_items = self._query_db(
-            '(tf:TIME_FRAME)<-[:CREATED_AT]-(p:PRODUCT)-[a_rel:ASSOCIATED]->(p1:PRODUCT)',
-            return_values,
-            'p.oid IN %s AND NOT p1.oid IN %s' % (items_string, items_string))
+        associated_items = self.backend.get_associations(items)
 
         associations = []
         for associated_item in associated_items:
@@ -403,18 +1161,32 @@ class DataManager(QueryManager):
         """
         where = ''
         if part_of_day is not None:
-            where = 'tf.part_of_day="%s"' % part_of_day
+            where = 'tf.part_of_day=$part_of_day'
         if day_in_week is not None:
             if where:
                 where += ' AND '
-            where += 'tf.day_in_week="%s"' % day_in_week
+            where += 'tf.day_in_week=$day_in_week'
         if month is not None:
             if where:
                 where += ' AND '
-            where += 'tf.month=%d' % month
-        print where
+            where += 'tf.month=$month'
         return where
 
+    @staticmethod
+    def _get_time_parameters(part_of_day=None, day_in_week=None, month=None):
+        """Return values of parameters used in time attributes constraints
+        returned by _get_time_constraints.
+
+        Args:
+            part_of_day(string, optional)
+            day_in_week(string, optional)
+            month(int, optional)
+
+        Returns:
+            dict
+        """
+        return {'part_of_day': part_of_day, 'day_in_week': day_in_week, 'month': month}
+
     @staticmethod
     def append_confidence(items):
         """Calculate and append confidence to each dict of provided items list.
@@ -432,8 +1204,10 @@ class DataManager(QueryManager):
             list: contains dicts with the same structure as the items arg but now
             with the confidence(float)
         """
-        for i in range(0, len(items)):
-            items[i]['confidence'] = items[i]['support'] / items[i]['support_x']
+        confidences = np.array([item['support'] for item in items], dtype=np.float64) \
+            / np.array([item['support_x'] for item in items], dtype=np.float64)
+        for item, confidence in zip(items, confidences.tolist()):
+            item['confidence'] = confidence
         return items
 
     def append_lift(self, items, data_type='all'):
@@ -454,9 +1228,14 @@ class DataManager(QueryManager):
             with the lift(float)
         """
         orders_count = self.get_orders_count(data_type)
-        for i in range(0, len(items)):
-            support_y = self.get_support(items[i]['item'], orders_count, data_type)
-            items[i]['lift'] = items[i]['support'] / (items[i]['support_x'] * support_y)
+        items_y = list(set(item['item'] for item in items))
+        supports_y = dict(zip(items_y, self.get_supports(items_y, orders_count, data_type)))
+
+        lifts = np.array([item['support'] for item in items], dtype=np.float64) / (
+            np.array([item['support_x'] for item in items], dtype=np.float64)
+            * np.array([supports_y[item['item']] for item in items], dtype=np.float64))
+        for item, lift in zip(items, lifts.tolist()):
+            item['lift'] = lift
         return items
 
     @staticmethod
@@ -481,6 +1260,26 @@ class DataManager(QueryManager):
             tf_props += 'tf.month AS month, '
         return tf_props
 
+    @staticmethod
+    def _get_time_attribute_names(use_part_of_day, use_day_in_week, use_month):
+        """Return names of the used time attributes, in the order of
+        _get_tf_props.
+
+        Args:
+            use_part_of_day(bool)
+            use_day_in_week(bool)
+            use_month(bool)
+
+        Returns:
+            list
+        """
+        return [
+            name for name, is_used in [
+                ('part_of_day', use_part_of_day),
+                ('day_in_week', use_day_in_week),
+                ('month', use_month)] if is_used]
+
+    @cached_result
     def get_support(self, item, orders_count, data_type='all'):
         """Return a support for an item or set of items.
 
@@ -492,17 +1291,51 @@ class DataManager(QueryManager):
         Returns:
             float
         """
-        if isinstance(item, list):
-            where = 'p.oid IN %s' % self._list_to_string(item)
-        elif isinstance(item, int):
-            where = 'p.oid=%d' % item
+        if self.transaction_store is not None:
+            return self.transaction_store.get_support(
+                item, orders_count, self.get_tf_ranges(data_type))
+
+        if not isinstance(item, list):
+            item = [item]
 
         support = self._query_db(
             '(p:PRODUCT)<-[:CONTAINS]-(o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME)',
-            'toFloat(count(o)/%f) AS support' % orders_count, where, data_type)
+            'toFloat(count(o))/$orders_count AS support', 'p.oid IN $items', data_type,
+            {'items': item, 'orders_count': orders_count})
 
         return support[0]['support']
 
+    def get_supports(self, itemsets, orders_count, data_type='all'):
+        """Return supports of all the given items or sets of items with one
+        bulk query.
+
+        Args:
+            itemsets(list): contains item IDs(int) or lists of item IDs.
+            orders_count(int): total number of orders.
+            data_type(string, optional): 'train', 'test', or 'all' which is default.
+
+        Returns:
+            list: contains supports(float) in the same order as itemsets.
+        """
+        if not itemsets:
+            return []
+
+        if self.transaction_store is not None:
+            return self.transaction_store.get_supports(
+                itemsets, orders_count, self.get_tf_ranges(data_type))
+
+        itemsets = [itemset if isinstance(itemset, list) else [itemset] for itemset in itemsets]
+        rows = self._query_db(
+            '(p:PRODUCT)<-[:CONTAINS]-(o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME)',
+            'itemset AS items, toFloat(count(o))/$orders_count AS support',
+            'p.oid IN itemset', data_type,
+            {'itemsets': itemsets, 'orders_count': orders_count}, '$itemsets AS itemset')
+
+        # itemsets without any order are not returned by MATCH
+        supports = dict((tuple(row['items']), row['support']) for row in rows)
+        return [supports.get(tuple(itemset), 0.0) for itemset in itemsets]
+
+    @cached_result
     def get_orders_count(self, data_type='all'):
         """ Return the number of orders in the system for given data type.
 
@@ -512,11 +1345,15 @@ class DataManager(QueryManager):
         Returns:
             float
         """
+        if self.transaction_store is not None:
+            return self.transaction_store.get_orders_count(self.get_tf_ranges(data_type))
+
         order = self._query_db(
             '(o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME)', 'count(o) AS orders_count',
             None, data_type)
         return float(order[0]['orders_count'])
 
+    @cached_result
     def get_items_count(self, data_type='all'):
         """ Return the number of items in the system for given data type.
 
@@ -526,11 +1363,15 @@ class DataManager(QueryManager):
         Returns:
             int
         """
+        if self.transaction_store is not None:
+            return self.transaction_store.get_items_count(self.get_tf_ranges(data_type))
+
         item = self._query_db(
             '(p:PRODUCT)-[:CREATED_AT]->(tf:TIME_FRAME)', 'count(p) AS items_count',
             None, data_type)
         return item[0]['items_count']
 
+    @cached_result
     def get_user_items(self, user_id=None, data_type='all'):
         """Return items for the user if provided or all the items for each user
         in the system.
@@ -551,6 +1392,10 @@ class DataManager(QueryManager):
                     'items': list of IDs(int)
                 }
         """
+        if self.transaction_store is not None:
+            return self.transaction_store.get_user_items(
+                user_id, self.get_tf_ranges(data_type))
+
         match = (
             '(u:USER)-[:PURCHASED]->(o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME)'
             + ', (o)-[:CONTAINS]->(p:PRODUCT)')
@@ -562,8 +1407,31 @@ class DataManager(QueryManager):
 
         return self._query_db(
             match, 'p.oid AS item, count(p.oid) AS num ORDER BY num DESC',
-            'u.oid=%d' % user_id, data_type)
+            'u.oid=$user', data_type, {'user': user_id})
 
+    def get_purchasing_users(self, user_ids, data_type='all'):
+        """Return those of given users who purchased any item, answered by one
+        query for all of them.
+
+        Args:
+            user_ids(list): contains user IDs(int).
+            data_type(string, optional): 'train', 'test', or 'all' which is default.
+
+        Returns:
+            list: user IDs(int).
+        """
+        if self.transaction_store is not None:
+            return self.transaction_store.get_purchasing_users(
+                user_ids, self.get_tf_ranges(data_type))
+
+        rows = self._query_db(
+            '(u:USER)-[:PURCHASED]->(o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME)'
+            + ', (o)-[:CONTAINS]->(p:PRODUCT)',
+            'DISTINCT u.oid AS user', 'u.oid IN $users', data_type,
+            {'users': list(user_ids)})
+        return [row['user'] for row in rows]
+
+    @cached_result
     def get_popular_items(self, orders_count=None, data_type='all'):
         """Return all the items in the system sorted by their support.
 
@@ -581,11 +1449,16 @@ class DataManager(QueryManager):
         if orders_count is None:
             orders_count = float(self.get_orders_count(data_type))
 
+        if self.transaction_store is not None:
+            return self.transaction_store.get_popular_items(
+                orders_count, self.get_tf_ranges(data_type))
+
         return self._query_db(
             '(p:PRODUCT)<-[:CONTAINS]-(o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME)',
-            'p.oid AS item, toFloat(count(o)/%f) AS support ORDER BY support DESC' % orders_count,
-            None, data_type)
+            'p.oid AS item, toFloat(count(o))/$orders_count AS support ORDER BY support DESC',
+            None, data_type, {'orders_count': orders_count})
 
+    @cached_result
     def get_items_by_time(self, part_of_day=None, day_in_week=None, month=None, data_type='all'):
         """Return items with their support for given time args.
 
@@ -601,16 +1474,46 @@ class DataManager(QueryManager):
                     'support': float
                 }
         """
+        if self.transaction_store is not None:
+            return self.transaction_store.get_items_by_time(
+                part_of_day, day_in_week, month, self.get_tf_ranges(data_type))
+
         where = self._get_time_constraints(part_of_day, day_in_week, month)
+        parameters = self._get_time_parameters(part_of_day, day_in_week, month)
         orders_count = self._query_db(
             '(o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME)', 'count(o) AS orders_count',
-            where, data_type)
+            where, data_type, parameters)
         orders_count = float(orders_count[0]['orders_count'])
 
+        parameters['orders_count'] = orders_count
         return self._query_db(
             '(p:PRODUCT)<-[:CONTAINS]-(o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME)',
-            'p.oid AS item, toFloat(count(o)/%f) AS support ORDER BY support DESC' % orders_count,
-            where, data_type)
+            'p.oid AS item, toFloat(count(o))/$orders_count AS support ORDER BY support DESC',
+            where, data_type, parameters)
+
+    @cached_result
+    def get_time_cube(self, data_type='all'):
+        """Return TimeCube with counts of orders and items for each combination
+        of time attributes values, built from the TransactionStore or from two
+        aggregating queries.
+
+        Args:
+            data_type(string, optional): 'train', 'test', or 'all' which is default.
+
+        Returns:
+            TimeCube
+        """
+        if self.transaction_store is not None:
+            return self.transaction_store.get_time_cube(self.get_tf_ranges(data_type))
+
+        tf_props = self._get_tf_props(True, True, True)
+        orders_counts = self._query_db(
+            '(o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME)',
+            tf_props + 'count(o) AS orders_count', None, data_type)
+        items_counts = self._query_db(
+            '(p:PRODUCT)<-[:CONTAINS]-(o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME)',
+            tf_props + 'p.oid AS item, count(o) AS items_count', None, data_type)
+        return TimeCube.from_counts(orders_counts, items_counts)
 
     def get_all_items_by_time(self, use_part_of_day, use_day_in_week, use_month, data_type='all'):
         """Return item IDs segmented by the time attributes which are defined by
@@ -631,6 +1534,10 @@ class DataManager(QueryManager):
                     'items': list of IDs(int)
                 }
         """
+        if self.transaction_store is not None:
+            return self.transaction_store.get_all_items_by_time(
+                use_part_of_day, use_day_in_week, use_month, self.get_tf_ranges(data_type))
+
         return_values = ''
         if use_part_of_day:
             return_values += 'tf.part_of_day AS part_of_day, '
@@ -646,6 +1553,7 @@ class DataManager(QueryManager):
             '(tf:TIME_FRAME)<-[:CREATED_AT]-(o:ORDER)-[:CONTAINS]->(p:PRODUCT)',
             return_values, None, data_type)
 
+    @cached_result
     def get_item_rpr(self, item_id=None, data_type='all'):
         """Return repeated purchase rate (RPR) for the given data type globally
         or for certain item if ID is provided.
@@ -657,14 +1565,18 @@ class DataManager(QueryManager):
         Returns:
             float
         """
+        if self.transaction_store is not None:
+            return self.transaction_store.get_item_rpr(item_id, self.get_tf_ranges(data_type))
+
         if item_id is None:
             where = None
         else:
-            where = 'p.oid=%s' % item_id
+            where = 'p.oid=$item'
+        parameters = {'item': item_id}
 
         purchases_total = self._query_db(
             '(p:PRODUCT)-[c_r:CONTAINS]-(o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME)',
-            'count(c_r) AS purchases_total', where, data_type)
+            'count(c_r) AS purchases_total', where, data_type, parameters)
         purchases_total = purchases_total[0]['purchases_total']
         if purchases_total == 0:
             return 0
@@ -676,11 +1588,12 @@ class DataManager(QueryManager):
         rpt_items = self._query_db(
             match,
             'u.oid AS user, p.oid AS item, count(u.oid)-1 AS repeated_purchases',
-            where, data_type)
+            where, data_type, parameters)
         rpt = sum(item['repeated_purchases'] for item in rpt_items)
 
         return rpt / float(purchases_total)
 
+    @cached_result
     def get_user_rpr(self, user_id=None, data_type='all'):
         """Return repeated purchase rate (RPR) for the given data type globally
         or for certain user if ID is provided.
@@ -692,24 +1605,28 @@ class DataManager(QueryManager):
         Returns:
             float
         """
+        if self.transaction_store is not None:
+            return self.transaction_store.get_user_rpr(user_id, self.get_tf_ranges(data_type))
+
         if user_id is None:
             where = None
         else:
-            where = 'u.oid=%d' % user_id
+            where = 'u.oid=$user'
+        parameters = {'user': user_id}
 
         match = (
             '(u:USER)-[:PURCHASED]->(o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME)'
             + ', (o)-[:CONTAINS]->(p:PRODUCT)')
 
         purchases_total = self._query_db(
-            match, 'count(p) AS purchases_total', where, data_type)
+            match, 'count(p) AS purchases_total', where, data_type, parameters)
         purchases_total = purchases_total[0]['purchases_total']
         if purchases_total == 0:
             return 0
 
         rpt_items = self._query_db(
             match, 'u.oid AS user, p.oid AS item, count(u.oid)-1 AS repeated_purchases',
-            where, data_type)
+            where, data_type, parameters)
         rpt = sum(item['repeated_purchases'] for item in rpt_items)
 
         return rpt / float(purchases_total)
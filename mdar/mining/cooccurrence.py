@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from scipy.sparse import csr_matrix, diags
+
+
+class CooccurrenceMatrix(object):
+    """Sparse item x item co-occurrence matrix (X^T * X) of the order-item
+    incidence matrix X restricted to selected orders. Entry (x, y) is the
+    number of (order, x, y) matches, same as counted by Cypher pattern
+    (p:PRODUCT)<-[:CONTAINS]-(o:ORDER)-[:CONTAINS]->(p1:PRODUCT).
+
+    Args:
+        indptr(numpy.ndarray): CSR order pointers, see TransactionStore.
+        indices(numpy.ndarray): CSR item codes, see TransactionStore.
+        items_count(int)
+        order_mask(numpy.ndarray): boolean mask of selected orders.
+    """
+
+    def __init__(self, indptr, indices, items_count, order_mask):
+        orders = np.flatnonzero(order_mask)
+        incidence = csr_matrix(
+            (np.ones(len(indices), dtype=np.int64), indices, indptr),
+            shape=(len(indptr) - 1, items_count))[orders]
+
+        self.orders_count = len(orders)
+        self.item_counts = np.asarray(incidence.sum(axis=0)).ravel()
+        matrix = (incidence.T * incidence).tocsr()
+        self.matrix = (matrix - diags(matrix.diagonal())).tocsr()
+        self.matrix.eliminate_zeros()
+
+    def get_pair_count(self, x_code, y_code):
+        """Return number of orders(matches) which contain both items.
+
+        Args:
+            x_code(int)
+            y_code(int)
+
+        Returns:
+            int
+        """
+        return int(self.matrix[x_code, y_code])
+
+    def get_pair_measures(self, x_code, y_code, orders_count):
+        """Return support, confidence and lift of rule x -> y. Lift is
+        relative to the selected orders only.
+
+        Args:
+            x_code(int)
+            y_code(int)
+            orders_count(int): total number of orders, support denominator.
+
+        Returns:
+            dict: with the following structure:
+                {
+                    'support': float
+                    'confidence': float
+                    'lift': float
+                }
+        """
+        pair_count = float(self.get_pair_count(x_code, y_code))
+        x_count = self.item_counts[x_code]
+        y_count = self.item_counts[y_code]
+        return {
+            'support': pair_count / orders_count,
+            'confidence': pair_count / x_count if x_count else 0.0,
+            'lift': pair_count * self.orders_count / (x_count * y_count) \
+                if x_count and y_count else 0.0
+        }
+
+    def get_connected_counts(self, x_codes):
+        """Return co-occurrence counts of each item with given items summed
+        up, counts of the given items are set to 0.
+
+        Args:
+            x_codes(numpy.ndarray)
+
+        Returns:
+            numpy.ndarray: count for each item code.
+        """
+        counts = np.asarray(self.matrix[x_codes].sum(axis=0)).ravel()
+        counts[x_codes] = 0
+        return counts
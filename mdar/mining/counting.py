@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+
+
+class ItemsetCounter(object):
+    """Exact counter of given itemsets in a stream of transactions. Itemsets
+    are indexed by their first item, so only itemsets which can be contained
+    in a transaction are checked.
+
+    Args:
+        itemsets(iterable): contains sorted tuples of items.
+    """
+
+    def __init__(self, itemsets):
+        self.counts = dict.fromkeys(itemsets, 0)
+        self._first_items = defaultdict(list)
+        for itemset in self.counts:
+            self._first_items[itemset[0]].append(itemset)
+
+    def add(self, items):
+        """Count one transaction.
+
+        Args:
+            items(list): items of the transaction.
+        """
+        items = set(items)
+        for item in items.intersection(self._first_items):
+            for itemset in self._first_items[item]:
+                if items.issuperset(itemset):
+                    self.counts[itemset] += 1
+
+
+def count_itemsets(itemsets, transactions):
+    """Return number of transactions which contain each of given itemsets.
+
+    Args:
+        itemsets(list): contains sorted tuples of items.
+        transactions(iterable)
+
+    Returns:
+        dict: itemset(tuple) -> count(int)
+    """
+    counter = ItemsetCounter(itemsets)
+    if counter.counts:
+        for items in transactions:
+            counter.add(items)
+    return counter.counts
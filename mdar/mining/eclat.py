@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+# number of set bits of each byte value
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+class BitsetIndex(object):
+    """Vertical representation of orders: a packed bit array of orders for
+    each item and each value of a time attribute. Bit i of an array is set if
+    i-th order contains the item (or was created in the time attribute
+    value). Supports are then counted with AND and popcount operations.
+
+    Item bit arrays take items count * orders count / 8 bytes.
+
+    Args:
+        orders_count(int)
+        entry_orders(numpy.ndarray): order index of each order item.
+        entry_items(numpy.ndarray): item code of each order item.
+        items_count(int)
+        time_codes(dict): time attribute name -> tuple with its distinct
+        values(0, list) and value code of each order(1, numpy.ndarray).
+    """
+
+    # number of item rows processed at once when counting all the items
+    CHUNK_SIZE = 1024
+
+    def __init__(self, orders_count, entry_orders, entry_items, items_count, time_codes):
+        self.orders_count = orders_count
+        self.items_count = items_count
+        self.bytes_count = (orders_count + 7) / 8
+
+        self.item_bits = np.zeros((items_count, self.bytes_count), dtype=np.uint8)
+        np.bitwise_or.at(
+            self.item_bits, (entry_items, entry_orders >> 3),
+            (128 >> (entry_orders & 7)).astype(np.uint8))
+
+        self.time_bits = {}
+        for name, (values, codes) in time_codes.iteritems():
+            self.time_bits[name] = dict(
+                (value, self.pack(codes == code)) for code, value in enumerate(values))
+
+    @staticmethod
+    def pack(mask):
+        """Return packed bit array of given boolean mask of orders.
+
+        Args:
+            mask(numpy.ndarray)
+
+        Returns:
+            numpy.ndarray
+        """
+        return np.packbits(mask)
+
+    def get_time_bits(self, part_of_day=None, day_in_week=None, month=None):
+        """Return bit array of orders created in given time attributes values.
+
+        Args:
+            part_of_day(string, optional)
+            day_in_week(string, optional)
+            month(int, optional)
+
+        Returns:
+            numpy.ndarray or None if no time attribute is given.
+        """
+        bits = None
+        for name, value in [
+                ('part_of_day', part_of_day), ('day_in_week', day_in_week), ('month', month)]:
+            if value is None:
+                continue
+            value_bits = self.time_bits[name].get(value)
+            if value_bits is None:
+                return np.zeros(self.bytes_count, dtype=np.uint8)
+            bits = value_bits if bits is None else bits & value_bits
+        return bits
+
+    def get_items_counts(self, bits, codes=None):
+        """Return number of orders in given bit array which contain each item.
+
+        Args:
+            bits(numpy.ndarray)
+            codes(numpy.ndarray, optional): counted item codes, all the items
+            if not given.
+
+        Returns:
+            numpy.ndarray: count for each item code in codes.
+        """
+        item_bits = self.item_bits if codes is None else self.item_bits[codes]
+        counts = np.empty(len(item_bits), dtype=np.int64)
+        for start in xrange(0, len(item_bits), self.CHUNK_SIZE):
+            chunk = item_bits[start:start + self.CHUNK_SIZE] & bits
+            counts[start:start + len(chunk)] = POPCOUNT[chunk].sum(axis=1)
+        return counts
+
+    @staticmethod
+    def count(bits):
+        """Return number of set bits in given bit array.
+
+        Args:
+            bits(numpy.ndarray)
+
+        Returns:
+            int
+        """
+        return int(POPCOUNT[bits].sum())
+
+
+def eclat(index, bits, min_count, max_length=None):
+    """Find all frequent itemsets of orders in given bit array with Eclat,
+    depth first intersection of item bit arrays.
+
+    Args:
+        index(BitsetIndex)
+        bits(numpy.ndarray): orders which are mined.
+        min_count(float): minimum number of orders which contain an itemset
+        for it to be frequent.
+        max_length(int, optional): maximum number of items in an itemset,
+        None for no limit.
+
+    Returns:
+        dict: itemset of item codes sorted ascending(tuple) -> number of
+        orders(int)
+    """
+    prefixes = get_prefixes(index, bits, min_count)
+    return mine_prefixes(prefixes, range(len(prefixes)), min_count, max_length)
+
+
+def get_prefixes(index, bits, min_count):
+    """Return one item prefixes of frequent items of orders in given bit
+    array, the starting points of Eclat.
+
+    Args:
+        index(BitsetIndex)
+        bits(numpy.ndarray)
+        min_count(float)
+
+    Returns:
+        list: see _mine_prefixes.
+    """
+    counts = index.get_items_counts(bits)
+    frequent_codes = np.flatnonzero(counts >= max(min_count, 1))
+    return [((int(code),), index.item_bits[code] & bits, int(counts[code]))
+            for code in frequent_codes]
+
+
+def mine_prefixes(prefixes, positions, min_count, max_length=None):
+    """Find frequent itemsets which start with the prefixes at given
+    positions. Itemsets of disjoint positions are disjoint, so the search is
+    split by the prefixes.
+
+    Args:
+        prefixes(list): see get_prefixes.
+        positions(list): indices of mined prefixes.
+        min_count(float)
+        max_length(int, optional): None for no limit.
+
+    Returns:
+        dict: see eclat.
+    """
+    itemsets_counts = {}
+    for i in positions:
+        _mine_prefix(prefixes, i, min_count, max_length, itemsets_counts)
+    return itemsets_counts
+
+
+def _mine_prefixes(prefixes, min_count, max_length, itemsets_counts):
+    """Add frequent itemsets with given prefixes to itemsets_counts and extend
+    each prefix with items of the following prefixes.
+
+    Args:
+        prefixes(list): contains tuples with itemset(0), its bit array(1) and
+        count(2), all of the same length and sharing all but the last item.
+        min_count(float)
+        max_length(int): None for no limit.
+        itemsets_counts(dict): see eclat.
+    """
+    for i in range(len(prefixes)):
+        _mine_prefix(prefixes, i, min_count, max_length, itemsets_counts)
+
+
+def _mine_prefix(prefixes, i, min_count, max_length, itemsets_counts):
+    """Add frequent itemset of i-th prefix and all its frequent extensions
+    with items of the following prefixes to itemsets_counts.
+
+    Args:
+        see _mine_prefixes.
+        i(int): position of the prefix.
+    """
+    itemset, itemset_bits, count = prefixes[i]
+    itemsets_counts[itemset] = count
+    if max_length is not None and len(itemset) >= max_length:
+        return
+
+    extensions = []
+    for other_itemset, other_bits, _ in prefixes[i + 1:]:
+        extension_bits = itemset_bits & other_bits
+        extension_count = BitsetIndex.count(extension_bits)
+        if extension_count >= min_count and extension_count > 0:
+            extensions.append(
+                (itemset + other_itemset[-1:], extension_bits, extension_count))
+
+    if extensions:
+        _mine_prefixes(extensions, min_count, max_length, itemsets_counts)
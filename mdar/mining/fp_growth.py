@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+
+
+class FPNode(object):
+    """Node of FPTree, holds an item and number of transactions which share
+    the path from the root to this node.
+
+    Args:
+        item(int): None for the root.
+        parent(FPNode): None for the root.
+    """
+    __slots__ = ('item', 'count', 'parent', 'children')
+
+    def __init__(self, item=None, parent=None):
+        self.item = item
+        self.count = 0
+        self.parent = parent
+        self.children = {}
+
+
+class FPTree(object):
+    """Frequent pattern tree of weighted transactions. Only frequent items are
+    kept and items of each transaction are ordered by their count, so common
+    prefixes of transactions share nodes.
+
+    Args:
+        transactions(iterable): contains tuples with transaction items(0) and
+        its count(1).
+        min_count(float): minimum count of a frequent item.
+    """
+
+    def __init__(self, transactions, min_count):
+        transactions = list(transactions)
+
+        item_counts = defaultdict(int)
+        for items, count in transactions:
+            for item in items:
+                item_counts[item] += count
+        self.item_counts = dict(
+            (item, count) for item, count in item_counts.iteritems() if count >= min_count)
+
+        self.root = FPNode()
+        self.nodes = defaultdict(list)
+        for items, count in transactions:
+            items = sorted(
+                (item for item in items if item in self.item_counts),
+                key=lambda item: (-self.item_counts[item], item))
+            if items:
+                self._insert(items, count)
+
+    def _insert(self, items, count):
+        """Add a transaction with ordered frequent items to the tree.
+
+        Args:
+            items(list)
+            count(int)
+        """
+        node = self.root
+        for item in items:
+            child = node.children.get(item)
+            if child is None:
+                child = FPNode(item, node)
+                node.children[item] = child
+                self.nodes[item].append(child)
+            child.count += count
+            node = child
+
+    def get_prefix_paths(self, item):
+        """Return conditional pattern base of given item, i.e. paths from the
+        root to each node of the item.
+
+        Args:
+            item(int)
+
+        Returns:
+            list: contains tuples with path items(0) and count of item's node(1).
+        """
+        prefix_paths = []
+        for node in self.nodes[item]:
+            path = []
+            parent = node.parent
+            while parent.item is not None:
+                path.append(parent.item)
+                parent = parent.parent
+            if path:
+                prefix_paths.append((path, node.count))
+        return prefix_paths
+
+
+def fp_growth(transactions, min_count, max_length=None):
+    """Find all frequent itemsets of given transactions with FP-Growth.
+
+    Args:
+        transactions(iterable): contains lists of unique items(int).
+        min_count(float): minimum number of transactions which contain an
+        itemset for it to be frequent.
+        max_length(int, optional): maximum number of items in an itemset,
+        None for no limit.
+
+    Returns:
+        dict: sorted itemset(tuple) -> number of transactions(int)
+    """
+    itemsets_counts = {}
+    tree = FPTree(((items, 1) for items in transactions), min_count)
+    _mine_tree(tree, (), min_count, max_length, itemsets_counts)
+    return itemsets_counts
+
+
+def mine_items(tree, items, min_count, max_length=None):
+    """Find frequent itemsets of the tree in which one of given items is the
+    least frequent item (the last one in the tree's order). Itemsets of
+    disjoint items lists are disjoint, so the search is split by the items.
+
+    Args:
+        tree(FPTree)
+        items(list): frequent items of the tree.
+        min_count(float)
+        max_length(int, optional): None for no limit.
+
+    Returns:
+        dict: see fp_growth.
+    """
+    itemsets_counts = {}
+    for item in items:
+        _mine_item(tree, (), item, min_count, max_length, itemsets_counts)
+    return itemsets_counts
+
+
+def _mine_tree(tree, suffix, min_count, max_length, itemsets_counts):
+    """Add frequent itemsets which end with given suffix to itemsets_counts,
+    recursively for conditional trees of each item.
+
+    Args:
+        tree(FPTree)
+        suffix(tuple): items of the itemset the tree is conditioned on.
+        min_count(float)
+        max_length(int): None for no limit.
+        itemsets_counts(dict): see fp_growth.
+    """
+    for item in tree.item_counts:
+        _mine_item(tree, suffix, item, min_count, max_length, itemsets_counts)
+
+
+def _mine_item(tree, suffix, item, min_count, max_length, itemsets_counts):
+    """Add frequent itemset of the suffix extended with given item and
+    itemsets found in the item's conditional tree to itemsets_counts.
+
+    Args:
+        tree(FPTree)
+        suffix(tuple)
+        item(int): frequent item of the tree.
+        min_count(float)
+        max_length(int): None for no limit.
+        itemsets_counts(dict): see fp_growth.
+    """
+    itemset = suffix + (item,)
+    itemsets_counts[tuple(sorted(itemset))] = tree.item_counts[item]
+
+    if max_length is None or len(itemset) < max_length:
+        conditional_tree = FPTree(tree.get_prefix_paths(item), min_count)
+        if conditional_tree.item_counts:
+            _mine_tree(conditional_tree, itemset, min_count, max_length, itemsets_counts)
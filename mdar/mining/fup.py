@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+from itertools import combinations
+
+from mdar.mining.counting import count_itemsets
+from mdar.mining.parallel import fp_growth_parallel
+from mdar.mining.rules import get_rules, sort_rules
+
+
+def fup(itemsets_counts, transactions, delta_transactions, min_count, delta_min_count, \
+    max_length=None):
+    """Update frequent itemsets of transactions after delta transactions are
+    added with FUP (Fast UPdate), level by itemset length. Counts of known
+    frequent itemsets are updated from the delta only. An itemset which was
+    not frequent can become frequent only if it is frequent in the delta, so
+    only such itemsets are counted in the old transactions.
+
+    Args:
+        itemsets_counts(dict): frequent itemsets of the old transactions, see
+        fp_growth.
+        transactions(list): old transactions, contain lists of unique items.
+        delta_transactions(list): new transactions.
+        min_count(float): minimum count of a frequent itemset in all the
+        transactions.
+        delta_min_count(float): minimum count in the delta of an itemset which
+        was not frequent.
+        max_length(int, optional): maximum number of items in an itemset,
+        None for no limit.
+
+    Returns:
+        dict: frequent itemsets of all the transactions, see fp_growth.
+    """
+    old_levels = defaultdict(dict)
+    for itemset, count in itemsets_counts.iteritems():
+        old_levels[len(itemset)][itemset] = count
+
+    delta_transactions = [sorted(set(items)) for items in delta_transactions]
+    updated_itemsets_counts = {}
+    level = None
+    length = 1
+    while max_length is None or length <= max_length:
+        delta_counts = defaultdict(int)
+        for items in delta_transactions:
+            if level is not None:
+                items = [item for item in items if (item,) in updated_itemsets_counts]
+            for itemset in combinations(items, length):
+                if level is None or itemset in old_levels[length] or all(
+                        subset in level for subset in combinations(itemset, length - 1)):
+                    delta_counts[itemset] += 1
+
+        old_level = old_levels[length]
+        level = {}
+        for itemset, count in old_level.iteritems():
+            count += delta_counts.get(itemset, 0)
+            if count >= min_count:
+                level[itemset] = count
+
+        candidates = [
+            itemset for itemset, count in delta_counts.iteritems()
+            if itemset not in old_level and count >= delta_min_count]
+        for itemset, count in count_itemsets(candidates, transactions).iteritems():
+            count += delta_counts[itemset]
+            if count >= min_count and count > 0:
+                level[itemset] = count
+
+        if not level:
+            break
+        updated_itemsets_counts.update(level)
+        length += 1
+
+    return updated_itemsets_counts
+
+
+class FUPMiner(object):
+    """Frequent itemsets of transactions grouped by time attributes values,
+    mined once with FP-Growth and then maintained with FUP as new
+    transactions arrive. Transactions are kept, since itemsets which become
+    frequent have to be counted in them.
+
+    Args:
+        transactions_groups(list): contains tuples with time attributes(0,
+        dict) and list of transactions(1), see DataManager.get_transactions.
+        orders_count(int): total number of orders, support denominator.
+        min_support(float)
+        max_length(int, optional): maximum number of items in an itemset,
+        None for no limit.
+        time_attributes(list, optional): names of time attributes the
+        transactions are grouped by.
+        processes(int, optional): number of processes of the initial mining,
+        see parallel_map. Defaults to 1.
+    """
+
+    def __init__(self, transactions_groups, orders_count, min_support, max_length=None, \
+        time_attributes=None, processes=1):
+        self.orders_count = orders_count
+        self.min_support = min_support
+        self.max_length = max_length
+        self.time_attributes = time_attributes or []
+
+        itemsets_counts_groups = fp_growth_parallel(
+            [transactions for _, transactions in transactions_groups], self.min_count,
+            max_length, processes)
+
+        self.groups = {}
+        for (time_attributes, transactions), itemsets_counts in zip(
+                transactions_groups, itemsets_counts_groups):
+            self.groups[self._get_group_key(time_attributes)] = {
+                'time_attributes': time_attributes,
+                'transactions': list(transactions),
+                'itemsets_counts': itemsets_counts
+            }
+
+    @property
+    def min_count(self):
+        """float: minimum number of orders of a frequent itemset."""
+        return self.min_support * self.orders_count
+
+    def update(self, transactions_groups, orders_count):
+        """Add new transactions and update frequent itemsets of all the groups,
+        since the minimum count grows with the number of orders.
+
+        Args:
+            transactions_groups(list): new transactions, see FUPMiner.
+            orders_count(int): number of new orders.
+
+        Returns:
+            list: time attributes(dict) of groups whose frequent itemsets
+            changed.
+        """
+        delta_min_count = self.min_support * orders_count
+        self.orders_count += orders_count
+
+        delta_groups = {}
+        for time_attributes, transactions in transactions_groups:
+            key = self._get_group_key(time_attributes)
+            delta_groups[key] = delta_groups.get(key, []) + list(transactions)
+            if key not in self.groups:
+                self.groups[key] = {
+                    'time_attributes': time_attributes,
+                    'transactions': [],
+                    'itemsets_counts': {}
+                }
+
+        changed_groups = []
+        for key, group in sorted(self.groups.iteritems()):
+            delta_transactions = delta_groups.get(key, [])
+            itemsets_counts = fup(
+                group['itemsets_counts'], group['transactions'], delta_transactions,
+                self.min_count, delta_min_count, self.max_length)
+            if itemsets_counts != group['itemsets_counts']:
+                changed_groups.append(group['time_attributes'])
+
+            group['itemsets_counts'] = itemsets_counts
+            group['transactions'] += delta_transactions
+
+        return changed_groups
+
+    def get_rules(self, use_confidence=False, min_confidence=None):
+        """Generate association rules from frequent itemsets of all the groups.
+
+        Args:
+            use_confidence(bool, optional): defaults to False.
+            min_confidence(float, optional): minimum confidence of a rule, not
+            checked if None.
+
+        Returns:
+            list: see DataManager.get_association_rules, sorted by body length
+            and support.
+        """
+        rules = []
+        for _, group in sorted(self.groups.iteritems()):
+            rules += get_rules(
+                group['itemsets_counts'], self.orders_count, self.min_count,
+                use_confidence or min_confidence is not None, group['time_attributes'])
+
+        if min_confidence is not None:
+            rules = [rule for rule in rules if rule['confidence'] >= min_confidence]
+            if not use_confidence:
+                for rule in rules:
+                    del rule['confidence']
+        return sort_rules(rules)
+
+    @staticmethod
+    def _get_group_key(time_attributes):
+        """Return hashable key of given time attributes values."""
+        return tuple(sorted(time_attributes.items()))
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+from itertools import combinations
+from math import ceil
+
+
+class LossyCounter(object):
+    """Approximate counts of itemsets in a stream of transactions with Lossy
+    Counting. The stream is split into buckets of 1/error transactions and at
+    the end of each bucket itemsets which can't be frequent are dropped, so
+    memory is bounded. Counts are underestimated by at most error * number
+    of transactions, hence itemsets whose count is at least min_count - error
+    * transactions_count contain all the itemsets with min_count.
+
+    All the subsets of each transaction up to max_length items are counted,
+    so the length has to stay small (pairs and triples) for memory to be
+    bounded, longer itemsets should be mined with FP-Growth or Eclat.
+
+    Args:
+        error(float): maximum error of counts relative to the number of
+        transactions.
+        max_length(int, optional): maximum number of items in a counted
+        itemset. Defaults to 3.
+    """
+
+    def __init__(self, error, max_length=3):
+        self.error = error
+        self.max_length = max_length
+        self.bucket_width = int(ceil(1.0 / error))
+        self.transactions_count = 0
+        # itemset -> [count, maximum error of the count]
+        self.entries = {}
+        self.max_entries_count = 0
+
+    @property
+    def bucket(self):
+        """int: ID of the current bucket, starting with 1."""
+        return self.transactions_count / self.bucket_width + 1
+
+    def add(self, items):
+        """Count all the itemsets of one transaction.
+
+        Args:
+            items(list): items of the transaction.
+        """
+        bucket = self.bucket
+        items = sorted(set(items))
+        for length in range(1, min(len(items), self.max_length) + 1):
+            for itemset in combinations(items, length):
+                entry = self.entries.get(itemset)
+                if entry is None:
+                    self.entries[itemset] = [1, bucket - 1]
+                else:
+                    entry[0] += 1
+
+        self.transactions_count += 1
+        self.max_entries_count = max(self.max_entries_count, len(self.entries))
+        if self.transactions_count % self.bucket_width == 0:
+            self.entries = dict(
+                (itemset, entry) for itemset, entry in self.entries.iteritems()
+                if entry[0] + entry[1] > bucket)
+
+    def get_candidates(self, min_count):
+        """Return itemsets which can have at least min_count transactions.
+
+        Args:
+            min_count(float)
+
+        Returns:
+            list: contains sorted tuples of items.
+        """
+        min_estimate = min_count - self.error * self.transactions_count
+        return [
+            itemset for itemset, (count, _) in self.entries.iteritems()
+            if count >= min_estimate]
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+from heapq import merge
+import numpy as np
+
+
+class NeighbourTable(object):
+    """Fixed width table of the best consequents of each item, materialized
+    from association rules with one item in the body. Row of an item holds
+    IDs(int32) of the heads of its rules and their scores(float32), sorted by
+    the score, padded with -1 and NaN. There is a table for each value of the
+    time attribute and one for any value (None), whose scores are summed over
+    the values.
+
+    Args:
+        item_ids(numpy.ndarray): sorted body item IDs, one for each row.
+        time_values(list): value of the time attribute of each table.
+        neighbours(numpy.ndarray): int32 array of (tables, rows, width) shape.
+        scores(numpy.ndarray): float32 array of the same shape.
+    """
+
+    def __init__(self, item_ids, time_values, neighbours, scores):
+        self.item_ids = item_ids
+        self.time_values = time_values
+        self.neighbours = neighbours
+        self.scores = scores
+        self._time_codes = dict((value, code) for code, value in enumerate(time_values))
+
+    @property
+    def width(self):
+        """int: maximum number of neighbours of an item."""
+        return self.neighbours.shape[2]
+
+    @classmethod
+    def from_rules(cls, rules, width, time_attribute='part_of_day', measure='support'):
+        """Create NeighbourTable from the rules with one item in the body,
+        neighbours with the same score are sorted by their IDs.
+
+        Args:
+            rules(list): contains dicts, see DataManager.get_association_rules.
+            width(int): number of neighbours kept for each item.
+            time_attribute(string, optional): defaults to 'part_of_day'.
+            measure(string, optional): rule measure used as the score.
+            Defaults to 'support'.
+
+        Returns:
+            NeighbourTable
+        """
+        # time value -> body item -> head -> score
+        scores = {None: {}}
+        for rule in rules:
+            if len(rule['x']) != 1:
+                continue
+            time_value = rule.get(time_attribute)
+            for value in set([time_value, None]):
+                heads = scores.setdefault(value, {}).setdefault(rule['x'][0], {})
+                heads[rule['y']] = heads.get(rule['y'], 0) + rule[measure]
+
+        time_values = sorted(value for value in scores if value is not None) + [None]
+        item_ids = np.array(sorted(scores[None]), dtype=np.int32)
+        rows = dict((item, row) for row, item in enumerate(item_ids.tolist()))
+
+        neighbours_array = np.full((len(time_values), len(item_ids), width), -1, dtype=np.int32)
+        scores_array = np.full(neighbours_array.shape, np.nan, dtype=np.float32)
+        for code, value in enumerate(time_values):
+            for item, heads in scores[value].iteritems():
+                best_heads = sorted(
+                    heads.iteritems(), key=lambda head: (-np.float32(head[1]), head[0]))
+                best_heads = best_heads[:width]
+                neighbours_array[code, rows[item], :len(best_heads)] = [
+                    head for head, _ in best_heads]
+                scores_array[code, rows[item], :len(best_heads)] = [
+                    score for _, score in best_heads]
+
+        return cls(item_ids, time_values, neighbours_array, scores_array)
+
+    def get_neighbours(self, items, k, time_value=None):
+        """Return the best neighbours of given items, merged from their rows by
+        the score. Given items are left out.
+
+        Args:
+            items(list): item IDs(int).
+            k(int): maximum number of neighbours.
+            time_value(optional): value of the time attribute, None for any.
+            Ignored if the rules weren't constrained by the time attribute.
+
+        Returns:
+            list: item IDs(int), the best first.
+        """
+        code = self._time_codes.get(time_value if len(self.time_values) > 1 else None)
+        if code is None:
+            return []
+
+        items = np.unique(np.array(items, dtype=np.int64))
+        rows = np.searchsorted(self.item_ids, items)
+        is_found = rows < len(self.item_ids)
+        is_found[is_found] = self.item_ids[rows[is_found]] == items[is_found]
+
+        rankings = []
+        for row in rows[is_found].tolist():
+            neighbours = self.neighbours[code, row]
+            count = int(np.count_nonzero(neighbours >= 0))
+            rankings.append(zip(
+                (-self.scores[code, row, :count]).tolist(), neighbours[:count].tolist()))
+
+        excluded = set(items.tolist())
+        recommendations = []
+        for _, neighbour in merge(*rankings):
+            if len(recommendations) >= k:
+                break
+            if neighbour not in excluded:
+                excluded.add(neighbour)
+                recommendations.append(neighbour)
+        return recommendations
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+from multiprocessing import Pool, cpu_count
+
+from mdar.mining.eclat import get_prefixes, mine_prefixes
+from mdar.mining.fp_growth import FPTree, mine_items
+
+# data shared with the workers, inherited by forked processes without pickling
+_shared_data = None
+
+
+def parallel_map(function, shared_data, partitions, processes=None):
+    """Call function(shared_data, partition) for each partition in a pool of
+    forked processes. Shared data is read only and is not copied to the
+    workers, only partitions and results are pickled.
+
+    Args:
+        function(function): module level function.
+        shared_data(object)
+        partitions(list)
+        processes(int, optional): number of processes, all the CPUs if None.
+        With 1 partitions are processed in this process.
+
+    Returns:
+        list: results in the same order as partitions.
+    """
+    global _shared_data
+    if processes is None:
+        processes = cpu_count()
+    if processes <= 1 or len(partitions) <= 1:
+        return [function(shared_data, partition) for partition in partitions]
+
+    _shared_data = shared_data
+    pool = Pool(min(processes, len(partitions)))
+    try:
+        return pool.map(_call, [(function, partition) for partition in partitions], 1)
+    finally:
+        pool.close()
+        pool.join()
+        _shared_data = None
+
+
+def _call(function_partition):
+    """Call function of the worker with shared data and the partition."""
+    function, partition = function_partition
+    return function(_shared_data, partition)
+
+
+def split(values, parts_count):
+    """Deal values into at most parts_count parts, round robin, so values
+    sorted by their cost give parts of similar cost.
+
+    Args:
+        values(list)
+        parts_count(int)
+
+    Returns:
+        list: contains non empty lists.
+    """
+    return [values[i::parts_count] for i in range(min(parts_count, len(values)))]
+
+
+def fp_growth_parallel(transactions_groups, min_count, max_length=None, processes=None, \
+    parts_per_process=4):
+    """Find frequent itemsets of each group of transactions with FP-Growth.
+    FP-trees are built in this process, mining of conditional trees is
+    partitioned by the item the tree is conditioned on.
+
+    Args:
+        transactions_groups(list): contains lists of transactions, see
+        fp_growth.
+        min_count(float)
+        max_length(int, optional): None for no limit.
+        processes(int, optional): see parallel_map.
+        parts_per_process(int, optional): number of partitions of each group
+        for one process. Defaults to 4.
+
+    Returns:
+        list: contains dict of itemsets counts for each group, see fp_growth.
+    """
+    trees = [
+        FPTree(((items, 1) for items in transactions), min_count)
+        for transactions in transactions_groups]
+
+    parts_count = (processes or cpu_count()) * parts_per_process
+    partitions = [
+        (i, items) for i, tree in enumerate(trees)
+        for items in split(sorted(tree.item_counts, key=tree.item_counts.get), parts_count)]
+
+    results = parallel_map(
+        _mine_fp_partition, (trees, min_count, max_length), partitions, processes)
+    return _merge(len(trees), partitions, results)
+
+
+def _mine_fp_partition(shared_data, partition):
+    """Mine itemsets of the group's tree conditioned on partition's items."""
+    trees, min_count, max_length = shared_data
+    i, items = partition
+    return mine_items(trees[i], items, min_count, max_length)
+
+
+def eclat_parallel(index, bits_groups, min_count, max_length=None, processes=None, \
+    parts_per_process=4):
+    """Find frequent itemsets of each bit array of orders with Eclat, mining is
+    partitioned by the first item of itemsets.
+
+    Args:
+        index(BitsetIndex)
+        bits_groups(list): contains bit arrays of mined orders.
+        min_count(float)
+        max_length(int, optional): None for no limit.
+        processes(int, optional): see parallel_map.
+        parts_per_process(int, optional): number of partitions of each group
+        for one process. Defaults to 4.
+
+    Returns:
+        list: contains dict of itemsets counts for each group, see eclat.
+    """
+    prefixes_groups = [get_prefixes(index, bits, min_count) for bits in bits_groups]
+
+    parts_count = (processes or cpu_count()) * parts_per_process
+    partitions = [
+        (i, positions) for i, prefixes in enumerate(prefixes_groups)
+        for positions in split(range(len(prefixes)), parts_count)]
+
+    results = parallel_map(
+        _mine_eclat_partition, (prefixes_groups, min_count, max_length), partitions, processes)
+    return _merge(len(prefixes_groups), partitions, results)
+
+
+def _mine_eclat_partition(shared_data, partition):
+    """Mine itemsets which start with partition's prefixes of the group."""
+    prefixes_groups, min_count, max_length = shared_data
+    i, positions = partition
+    return mine_prefixes(prefixes_groups[i], positions, min_count, max_length)
+
+
+def _merge(groups_count, partitions, results):
+    """Merge itemsets counts of partitions into dict for each group, in the
+    order of partitions."""
+    itemsets_counts = [{} for _ in range(groups_count)]
+    for (i, _), partition_itemsets_counts in zip(partitions, results):
+        itemsets_counts[i].update(partition_itemsets_counts)
+    return itemsets_counts
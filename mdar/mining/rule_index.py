@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+from heapq import merge
+
+
+class RuleIndex(object):
+    """Index of association rules by their bodies, held in a prefix trie of
+    sorted body items. Rules of each body are bucketed by their time
+    attributes values and kept sorted by rank. A rule fires only if its whole
+    body is in a cart, so a lookup walks only the trie paths made of cart
+    items and merges heads of the found buckets, instead of scanning all the
+    rules.
+
+    Rules are ranked by support and then confidence, the best first, rules
+    with the same measures keep their order.
+
+    Args:
+        rules(list): contains dicts, see DataManager.get_association_rules.
+    """
+
+    TIME_ATTRIBUTES = ['part_of_day', 'day_in_week', 'month']
+
+    def __init__(self, rules):
+        ranked_rules = sorted(
+            rules, key=lambda rule: (-rule['support'], -rule.get('confidence', 0)))
+
+        # node is a tuple of children(dict, item -> node) and rules of the
+        # body ending in the node(dict, time key -> list of (rank, head))
+        self.root = ({}, {})
+        self.bodies_count = 0
+        for rank, rule in enumerate(ranked_rules):
+            node = self.root
+            for item in sorted(set(rule['x'])):
+                node = node[0].setdefault(item, ({}, {}))
+            if not node[1]:
+                self.bodies_count += 1
+
+            time_key = tuple(rule.get(name) for name in self.TIME_ATTRIBUTES)
+            node[1].setdefault(time_key, []).append((rank, rule['y']))
+
+    def get_buckets(self, items):
+        """Return rules of all the bodies which are subsets of given items.
+
+        Args:
+            items(list): item IDs(int).
+
+        Returns:
+            list: contains dicts of rules of one body, see RuleIndex.
+        """
+        items = sorted(set(items))
+        positions = dict((item, i) for i, item in enumerate(items))
+        buckets = []
+        # nodes to visit with position of the first cart item they can continue with
+        nodes = [(self.root, 0)]
+        while nodes:
+            node, start = nodes.pop()
+            if node[1]:
+                buckets.append(node[1])
+
+            # the smaller of children and remaining cart items is iterated
+            children = node[0]
+            if len(children) < len(items) - start:
+                for item, child in children.iteritems():
+                    position = positions.get(item)
+                    if position is not None and position >= start:
+                        nodes.append((child, position + 1))
+            else:
+                for position in range(start, len(items)):
+                    if items[position] in children:
+                        nodes.append((children[items[position]], position + 1))
+        return buckets
+
+    def get_heads(self, items, k, part_of_day=None, day_in_week=None, month=None):
+        """Return distinct heads of the best ranked rules whose whole body is
+        in given items. A rule matches given time attributes values if it has
+        the same values or is not constrained by them.
+
+        Args:
+            items(list): item IDs(int).
+            k(int): maximum number of heads.
+            part_of_day(string, optional)
+            day_in_week(string, optional)
+            month(int, optional)
+
+        Returns:
+            list: item IDs(int), the head of the best rule first.
+        """
+        time_values = [part_of_day, day_in_week, month]
+        rankings = []
+        for bucket in self.get_buckets(items):
+            for time_key, ranking in bucket.iteritems():
+                if all(value is None or rule_value is None or value == rule_value
+                       for value, rule_value in zip(time_values, time_key)):
+                    rankings.append(ranking)
+
+        heads = []
+        for _, head in merge(*rankings):
+            if len(heads) >= k:
+                break
+            if head not in heads:
+                heads.append(head)
+        return heads
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+
+class RuleTable(object):
+    """Association rules held in one structured NumPy array: int32 item IDs of
+    the body (padded with -1) and the head, float32 measures and int16 codes of
+    time attributes (-1 if not set). Measures are computed, rules filtered and
+    sorted with whole array operations.
+
+    Args:
+        rules(numpy.ndarray): structured array of get_dtype type.
+        time_values(dict): time attribute name -> list of its values, code is
+        an index in the list.
+    """
+
+    MEASURES = ['support', 'confidence', 'lift', 'conviction', 'leverage']
+    TIME_ATTRIBUTES = ['part_of_day', 'day_in_week', 'month']
+
+    def __init__(self, rules, time_values):
+        self.rules = rules
+        self.time_values = time_values
+
+    @classmethod
+    def get_dtype(cls, max_x_count):
+        """Return dtype of the rules array.
+
+        Args:
+            max_x_count(int): maximum number of items in rule's body.
+
+        Returns:
+            numpy.dtype
+        """
+        return np.dtype(
+            [('x', np.int32, (max_x_count,)), ('x_count', np.int8), ('y', np.int32)]
+            + [(measure, np.float32) for measure in cls.MEASURES]
+            + [(name, np.int16) for name in cls.TIME_ATTRIBUTES])
+
+    @classmethod
+    def from_rules(cls, rules):
+        """Create RuleTable from rules, measures which are not in rules are
+        NaN.
+
+        Args:
+            rules(list): contains dicts, see DataManager.get_association_rules.
+
+        Returns:
+            RuleTable
+        """
+        max_x_count = max([len(rule['x']) for rule in rules] + [1])
+        array = np.empty(len(rules), dtype=cls.get_dtype(max_x_count))
+        array['x'] = -1
+        array['x_count'] = [len(rule['x']) for rule in rules]
+        array['y'] = [rule['y'] for rule in rules]
+        for i, rule in enumerate(rules):
+            array['x'][i, :len(rule['x'])] = rule['x']
+
+        nan = float('nan')
+        for measure in cls.MEASURES:
+            array[measure] = [rule.get(measure, nan) for rule in rules]
+
+        time_values = {}
+        for name in cls.TIME_ATTRIBUTES:
+            time_values[name] = sorted(set(rule[name] for rule in rules if name in rule))
+            value_codes = dict((value, code) for code, value in enumerate(time_values[name]))
+            array[name] = [value_codes.get(rule.get(name), -1) for rule in rules]
+
+        return cls(array, time_values)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def __getitem__(self, index):
+        """Return RuleTable of selected rules.
+
+        Args:
+            index(numpy.ndarray): boolean mask or rule indices.
+
+        Returns:
+            RuleTable
+        """
+        return RuleTable(self.rules[index], self.time_values)
+
+    def to_rules(self):
+        """Return rules as dicts, NaN measures and unset time attributes are
+        left out.
+
+        Returns:
+            list: contains dicts, see DataManager.get_association_rules.
+        """
+        columns = dict((name, self.rules[name].tolist()) for name in self.rules.dtype.names)
+        rules = []
+        for i in range(len(self.rules)):
+            rule = {
+                'x': columns['x'][i][:columns['x_count'][i]],
+                'y': columns['y'][i]
+            }
+            for measure in self.MEASURES:
+                if columns[measure][i] == columns[measure][i]:
+                    rule[measure] = columns[measure][i]
+            for name in self.TIME_ATTRIBUTES:
+                if columns[name][i] >= 0:
+                    rule[name] = self.time_values[name][columns[name][i]]
+            rules.append(rule)
+        return rules
+
+    def set_measures(self, supports_y):
+        """Compute lift, conviction and leverage of all the rules from their
+        support, confidence and support of the head.
+
+        Args:
+            supports_y(dict): head item ID -> its support.
+        """
+        support = self.rules['support'].astype(np.float64)
+        confidence = self.rules['confidence'].astype(np.float64)
+        support_y = np.array(
+            [supports_y.get(y, np.nan) for y in self.rules['y'].tolist()], dtype=np.float64)
+        support_x = support / confidence
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.rules['lift'] = confidence / support_y
+            self.rules['leverage'] = support - support_x * support_y
+            self.rules['conviction'] = np.where(
+                confidence < 1, (1 - support_y) / (1 - confidence), np.inf)
+
+    def get_mask(self, min_support=None, min_confidence=None, min_lift=None, \
+        min_conviction=None, min_leverage=None):
+        """Return boolean mask of rules which meet all the given thresholds.
+
+        Args:
+            min_support(float, optional)
+            min_confidence(float, optional)
+            min_lift(float, optional)
+            min_conviction(float, optional)
+            min_leverage(float, optional)
+
+        Returns:
+            numpy.ndarray
+        """
+        mask = np.ones(len(self.rules), dtype=bool)
+        for measure, threshold in zip(
+                self.MEASURES,
+                [min_support, min_confidence, min_lift, min_conviction, min_leverage]):
+            if threshold is not None:
+                # rules with NaN measure don't meet the threshold
+                with np.errstate(invalid='ignore'):
+                    mask &= self.rules[measure] >= threshold
+        return mask
+
+    def argsort(self, keys, reverse=False):
+        """Return indices which sort the rules by given fields, stable like
+        sorted(rules, key=itemgetter(*keys), reverse=reverse).
+
+        Args:
+            keys(list): names of scalar fields, the first is the primary key.
+            reverse(bool, optional): descending order. Defaults to False.
+
+        Returns:
+            numpy.ndarray
+        """
+        columns = [self.rules[key] for key in reversed(keys)]
+        if reverse:
+            columns = [-column.astype(np.float64) for column in columns]
+        return np.lexsort(columns) if columns else np.arange(len(self.rules))
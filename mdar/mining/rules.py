@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+
+def get_rules(itemsets_counts, orders_count, min_count, use_confidence=False, \
+    time_attributes=None):
+    """Generate association rules with one item in the head from counted
+    itemsets. Each itemset with at least two items and min_count orders gives
+    one rule for each of its items as the head.
+
+    Args:
+        itemsets_counts(dict): itemset(tuple) -> number of orders(int). Has
+        to contain all the bodies of generated rules if use_confidence, with
+        items in the same order as in the itemsets.
+        orders_count(int): total number of orders.
+        min_count(float): minimum number of orders for a rule.
+        use_confidence(bool, optional): defaults to False.
+        time_attributes(dict, optional): 'part_of_day', 'day_in_week' and
+        'month' values added to each rule.
+
+    Returns:
+        list: contains dicts with the following structure:
+            {
+                'x': list of IDs(int)
+                'y': int
+                'support': float
+                'confidence': float, if use_confidence
+                'part_of_day', 'day_in_week', 'month': if in time_attributes
+            }
+    """
+    orders_count = float(orders_count)
+    rules = []
+    for itemset, count in itemsets_counts.iteritems():
+        if len(itemset) < 2 or count < min_count:
+            continue
+        for y in itemset:
+            x = tuple(item for item in itemset if item != y)
+            rule = {'x': list(x), 'y': y, 'support': count / orders_count}
+            if use_confidence:
+                rule['confidence'] = float(count) / itemsets_counts[x]
+            if time_attributes:
+                rule.update(time_attributes)
+            rules.append(rule)
+
+    return rules
+
+
+def sort_rules(rules):
+    """Sort rules by the length of their bodies and then by support, the
+    most supported first. Ties are ordered by items and time attributes, so
+    the order does not depend on the order of mined itemsets.
+
+    Args:
+        rules(list): see get_rules.
+
+    Returns:
+        list
+    """
+    return sorted(rules, key=lambda rule: (
+        len(rule['x']), -rule['support'], sorted(rule['x']), rule['y'],
+        rule.get('part_of_day'), rule.get('day_in_week'), rule.get('month')))
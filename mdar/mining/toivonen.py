@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+from itertools import combinations
+
+
+def get_negative_border(itemsets, max_length=None):
+    """Return itemsets with at least two items which are not in given
+    itemsets, but all their subsets are. Single items are left out, since
+    all the items are counted when sampled itemsets are verified.
+
+    Args:
+        itemsets(iterable): downward closed set of sorted tuples of items,
+        e.g. frequent itemsets of a sample.
+        max_length(int, optional): maximum number of items in an itemset,
+        None for no limit.
+
+    Returns:
+        list: contains sorted tuples of items.
+    """
+    itemsets = set(itemsets)
+    levels = defaultdict(list)
+    for itemset in itemsets:
+        levels[len(itemset)].append(itemset)
+
+    border = []
+    length = 2
+    while levels[length - 1] and (max_length is None or length <= max_length):
+        # candidates are joined from itemsets which differ in the last item
+        prefixes = defaultdict(list)
+        for itemset in levels[length - 1]:
+            prefixes[itemset[:-1]].append(itemset[-1])
+
+        for prefix, items in prefixes.iteritems():
+            for item_a, item_b in combinations(sorted(items), 2):
+                candidate = prefix + (item_a, item_b)
+                if candidate not in itemsets and all(
+                        subset in itemsets for subset in combinations(candidate, length - 1)):
+                    border.append(candidate)
+        length += 1
+
+    return sorted(border)
+
+
+def verify_itemsets(sample_itemsets, items_counts, itemsets_counts, min_count):
+    """Return itemsets which are frequent in all the transactions and
+    whether they are known to be all the frequent itemsets. Some frequent
+    itemsets can be missed only if an item or an itemset of the negative
+    border of the sample is frequent.
+
+    Args:
+        sample_itemsets(iterable): frequent itemsets of the sample, sorted
+        tuples of items.
+        items_counts(dict): item -> number of transactions, of all the items.
+        itemsets_counts(dict): itemset -> number of transactions, of all the
+        sample itemsets with at least two items and their negative border.
+        min_count(float): minimum count of a frequent itemset.
+
+    Returns:
+        dict: frequent itemsets, see fp_growth. Their counts are exact even
+        if some frequent itemsets are missing.
+        bool: True if all the frequent itemsets were found.
+    """
+    sample_itemsets = set(sample_itemsets)
+    frequent_itemsets = {}
+    for item, count in items_counts.iteritems():
+        if count >= min_count and count > 0:
+            frequent_itemsets[(item,)] = count
+
+    is_exact = all(itemset in sample_itemsets for itemset in frequent_itemsets)
+    for itemset, count in itemsets_counts.iteritems():
+        if count >= min_count and count > 0:
+            frequent_itemsets[itemset] = count
+            if itemset not in sample_itemsets:
+                is_exact = False
+
+    return frequent_itemsets, is_exact
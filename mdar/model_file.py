@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+from collections import Mapping
+import json
+import struct
+import numpy as np
+
+MAGIC = 'MDARMODL'
+VERSION = 1
+ALIGNMENT = 64
+_PREAMBLE = struct.Struct('<IQ')
+
+
+def write_model_file(path, header, arrays):
+    """Write a model file: magic bytes, format version and length of the JSON
+    header, the header and raw arrays, each aligned to ALIGNMENT bytes, so
+    they can be memory-mapped.
+
+    Args:
+        path(string)
+        header(dict): JSON serializable values.
+        arrays(dict): name(string) -> numpy.ndarray.
+    """
+    arrays = dict((name, np.ascontiguousarray(array)) for name, array in arrays.iteritems())
+    arrays_header = {}
+    offset = 0
+    for name, array in sorted(arrays.iteritems()):
+        offset = _align(offset)
+        arrays_header[name] = {
+            'dtype': np.lib.format.dtype_to_descr(array.dtype),
+            'shape': list(array.shape),
+            'offset': offset
+        }
+        offset += array.nbytes
+
+    header = dict(header, arrays=arrays_header)
+    header_bytes = json.dumps(header, sort_keys=True)
+    data_offset = _align(len(MAGIC) + _PREAMBLE.size + len(header_bytes))
+
+    with open(path, 'wb') as model_file:
+        model_file.write(MAGIC)
+        model_file.write(_PREAMBLE.pack(VERSION, len(header_bytes)))
+        model_file.write(header_bytes)
+        for name, array in sorted(arrays.iteritems()):
+            model_file.write('\0' * (data_offset + arrays_header[name]['offset'] - model_file.tell()))
+            array.tofile(model_file)
+
+
+def read_model_file(path, mmap_mode='r'):
+    """Read a model file written by write_model_file. Arrays are memory-mapped,
+    so they are loaded lazily and their pages are shared by processes which
+    read the same file.
+
+    Args:
+        path(string)
+        mmap_mode(string, optional): see numpy.memmap, None reads the arrays
+        into memory. Defaults to 'r'.
+
+    Returns:
+        dict: header.
+        dict: name(string) -> numpy.ndarray.
+
+    Raises:
+        ValueError: if the file isn't a model file of supported version.
+    """
+    with open(path, 'rb') as model_file:
+        if model_file.read(len(MAGIC)) != MAGIC:
+            raise ValueError('%s is not a MDAR model file' % path)
+        version, header_length = _PREAMBLE.unpack(model_file.read(_PREAMBLE.size))
+        if version != VERSION:
+            raise ValueError('unsupported model file version %d' % version)
+        header = json.loads(model_file.read(header_length))
+
+        data_offset = _align(len(MAGIC) + _PREAMBLE.size + header_length)
+        arrays = {}
+        for name, array_header in header.pop('arrays').iteritems():
+            dtype = _get_dtype(array_header['dtype'])
+            shape = tuple(array_header['shape'])
+            offset = data_offset + array_header['offset']
+            if mmap_mode is None or not np.prod(shape):
+                model_file.seek(offset)
+                arrays[str(name)] = np.fromfile(
+                    model_file, dtype, int(np.prod(shape))).reshape(shape)
+            else:
+                arrays[str(name)] = np.memmap(
+                    path, dtype, mmap_mode, offset, shape)
+
+    return header, arrays
+
+
+def _align(offset):
+    """Return the nearest offset aligned to ALIGNMENT bytes."""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _get_dtype(descr):
+    """Return numpy.dtype of given dtype.descr decoded from JSON."""
+    if not isinstance(descr, list):
+        return np.dtype(str(descr))
+    return np.dtype([
+        (str(field[0]), _get_dtype(field[1])) + tuple(tuple(shape) for shape in field[2:])
+        for field in descr])
+
+
+class ArrayLists(Mapping):
+    """Read-only mapping of integer keys to lists of integers held in CSR-like
+    arrays.
+
+    Args:
+        keys(numpy.ndarray): sorted keys.
+        indptr(numpy.ndarray): values of i-th key are values[indptr[i]:indptr[i + 1]].
+        values(numpy.ndarray)
+    """
+
+    def __init__(self, keys, indptr, values):
+        self.keys_array = keys
+        self.indptr = indptr
+        self.values = values
+
+    @classmethod
+    def pack(cls, lists):
+        """Return arrays of given lists.
+
+        Args:
+            lists(dict): key(int) -> list of ints.
+
+        Returns:
+            numpy.ndarray: keys.
+            numpy.ndarray: indptr.
+            numpy.ndarray: values.
+        """
+        keys = sorted(lists)
+        indptr = np.zeros(len(keys) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(lists[key]) for key in keys])
+        values = np.array(
+            [value for key in keys for value in lists[key]], dtype=np.int64)
+        return np.array(keys, dtype=np.int64), indptr, values
+
+    def __getitem__(self, key):
+        i = int(np.searchsorted(self.keys_array, key))
+        if i == len(self.keys_array) or self.keys_array[i] != key:
+            raise KeyError(key)
+        return self.values[self.indptr[i]:self.indptr[i + 1]].tolist()
+
+    def __iter__(self):
+        return iter(self.keys_array.tolist())
+
+    def __len__(self):
+        return len(self.keys_array)
+
+
+class SubjectModel(Mapping):
+    """Read-only mapping of subject IDs to ARHR and MCV measures of each
+    approach, see MDAR.model, held in arrays.
+
+    Args:
+        keys(numpy.ndarray): sorted subject IDs.
+        approaches(list): names of approaches, one for each column.
+        mcv(numpy.ndarray): MCV of (subject, approach), 0 if not measured.
+        arhr(numpy.ndarray): ARHR of (subject, approach).
+    """
+
+    def __init__(self, keys, approaches, mcv, arhr):
+        self.keys_array = keys
+        self.approaches = approaches
+        self.mcv = mcv
+        self.arhr = arhr
+
+    @classmethod
+    def pack(cls, subjects, approaches):
+        """Return arrays of given subjects measures.
+
+        Args:
+            subjects(dict): subject ID -> approach -> {'mcv': int, 'arhr': float}
+            approaches(list): names of approaches.
+
+        Returns:
+            numpy.ndarray: keys.
+            numpy.ndarray: mcv.
+            numpy.ndarray: arhr.
+        """
+        keys = sorted(subjects)
+        mcv = np.zeros((len(keys), len(approaches)), dtype=np.int32)
+        arhr = np.zeros(mcv.shape, dtype=np.float64)
+        for i, key in enumerate(keys):
+            for j, approach in enumerate(approaches):
+                if approach in subjects[key]:
+                    mcv[i, j] = subjects[key][approach]['mcv']
+                    arhr[i, j] = subjects[key][approach]['arhr']
+        return np.array(keys, dtype=np.int64), mcv, arhr
+
+    def __getitem__(self, key):
+        i = int(np.searchsorted(self.keys_array, key))
+        if i == len(self.keys_array) or self.keys_array[i] != key:
+            raise KeyError(key)
+        return dict(
+            (approach, {'mcv': int(self.mcv[i, j]), 'arhr': float(self.arhr[i, j])})
+            for j, approach in enumerate(self.approaches) if self.mcv[i, j])
+
+    def __iter__(self):
+        return iter(self.keys_array.tolist())
+
+    def __len__(self):
+        return len(self.keys_array)
@@ -1,13 +1,19 @@
 # -*- coding: utf-8 -*-
 
 import json
-from py2neo import authenticate, Graph
+import sys
+import time
+from mdar.connection_registry import ConnectionRegistry
+from mdar.query_stats import QueryStats
+from mdar.query_template import QueryTemplateCache
+from mdar.backends.local import LocalBackend
+from mdar.backends.neo4j import Neo4jBackend
 
 
 class QueryManager(object):
-    """Used for communicating with Neo4j graph database, constructing TIME_FRAME
-    nodes constraints for test and train dataset parts (k-fold cross validation),
-    and Cypher query building.
+    """Used for communicating with storage backend (Neo4j graph database by
+    default), constructing TIME_FRAME nodes constraints for test and train
+    dataset parts (k-fold cross validation), and Cypher query building.
 
     Args:
         config_path(string): path to a config.json file.
@@ -15,43 +21,49 @@ class QueryManager(object):
     """
     _k_fold_size = 3
 
+    batch_size = 1000
+
+    config = None
+    backend = None
+    connection = None
+    connections = ConnectionRegistry()
+    query_templates = QueryTemplateCache()
+    query_stats = None
+    report_query_stats = False
     k_fold_tfs = None
     tf_conditions = None
+    tf_ranges = None
     _testing_part_index = 0
 
     def __init__(self, config_path=None, k_fold_size=3):
         if config_path is not None:
             self.set_graph(config_path)
 
+        data = self.config.get('data', {}) if self.config is not None else {}
+        self.query_stats = QueryStats(data.get('slow_query_threshold', 1))
+        self.report_query_stats = data.get('report_query_stats', False)
+
         self.set_k_fold_tfs(k_fold_size)
         self.k_fold_size = k_fold_size
 
     def set_graph(self, config_path):
-        """Define graph instance with data from config file.
+        """Define storage backend and graph instance with data from config file.
+        Backend is shared by all the QueryManagers with the same host config.
 
         Args:
             config_path(string): path to a config.json file.
 
         Returns:
-            Graph or None if failed to define.
+            Graph or None if failed to define or if backend is not Neo4j.
         """
         self.graph = None
         with open(config_path) as config_data:
             config = json.load(config_data)
-            host = config['host']
-
-            if host['use_ssl']:
-                db_url = 'https://'
-            elif host['use_bolt']:
-                db_url = 'bolt://'
-            else:
-                db_url = 'http://'
-            db_url += '%s:%d/%s' % (host['address'], host['port'], host['data_path'])
-
-            authenticate(
-                host['address'] + ':' + str(host['port']),
-                user=host['username'], password=host['password'])
-            self.graph = Graph(db_url)
+            self.config = config
+            self.batch_size = config.get('data', {}).get('batch_size', self.batch_size)
+            self.connection = self.connections.get(config['host'], self._get_backend)
+            self.backend = self.connection.backend
+            self.graph = getattr(self.backend, 'graph', None)
 
         return self.graph
 
@@ -67,24 +79,12 @@ class QueryManager(object):
         """
         k_fold_size = 2 if k_fold_size < 2 else k_fold_size
 
-        orders_count = self._query_db(
-            '(o:ORDER)', 'count(o) AS orders_count', '(o)-[:CONTAINS]->()')
-        orders_count = orders_count[0]['orders_count']
-        part_size = orders_count / k_fold_size
-
-        tf_counter = 0
-        self.k_fold_tfs = []
-        tfs = self._query_db(
-            '(o:ORDER)-[:CREATED_AT]->(tf:TIME_FRAME)',
-            'tf', '(o)-[:CONTAINS]->()')
-
-        for time_frame in tfs:
-            tf_counter += 1
-            if tf_counter % part_size == 0:
-                self.k_fold_tfs.append(time_frame['tf'])
-            if len(self.k_fold_tfs) == k_fold_size - 1:
-                break
-
+        if self.connection is not None:
+            data = self.config.get('data', {}) if self.config is not None else {}
+            self.k_fold_tfs = self.connection.get_k_fold_tfs(
+                k_fold_size, data.get('k_fold_tfs_path'))
+        else:
+            self.k_fold_tfs = self.backend.get_k_fold_tfs(k_fold_size)
         return self.k_fold_tfs
 
     def _define_tf_conditions(self):
@@ -100,6 +100,7 @@ class QueryManager(object):
 
         tf_indices = {}
         self.tf_conditions = {}
+        self.tf_ranges = {}
         if self.testing_part_index == 0:
             tf_indices = {
                 'test': [None, 0],
@@ -118,21 +119,28 @@ class QueryManager(object):
 
         for data_type in ['test', 'train']:
             self.tf_conditions[data_type] = ''
+            self.tf_ranges[data_type] = []
             for i in xrange(0, len(tf_indices[data_type]), 2):
                 has_bottom_condition = False
+                bottom_timestamp = None
+                top_timestamp = None
                 if i > 0:
                     self.tf_conditions[data_type] += 'OR '
 
                 if tf_indices[data_type][i] is not None:
                     has_bottom_condition = True
+                    bottom_timestamp = self.k_fold_tfs[tf_indices[data_type][i]]['timestamp']
                     self.tf_conditions[data_type] += 'tf.timestamp > "%s" ' \
-                        % self.k_fold_tfs[tf_indices[data_type][i]]['timestamp']
+                        % bottom_timestamp
 
                 if tf_indices[data_type][i + 1] is not None:
                     if has_bottom_condition:
                         self.tf_conditions[data_type] += 'AND '
+                    top_timestamp = self.k_fold_tfs[tf_indices[data_type][i + 1]]['timestamp']
                     self.tf_conditions[data_type] += 'tf.timestamp <= "%s" ' \
-                        % self.k_fold_tfs[tf_indices[data_type][i + 1]]['timestamp']
+                        % top_timestamp
+
+                self.tf_ranges[data_type].append((bottom_timestamp, top_timestamp))
         return True
 
     def get_tf_conditions(self, data_type='train'):
@@ -146,8 +154,124 @@ class QueryManager(object):
         """
         return self.tf_conditions[data_type]
 
-    def _query_db(self, match, return_values, where_conditions=None, data_type='all'):
-        """Build and return Cypher query with given args.
+    def get_tf_ranges(self, data_type='train'):
+        """Return TIME_FRAME timestamp ranges for given data type. Each range is
+        a tuple of bottom(exclusive) and top(inclusive) timestamp, None if the
+        range is open on that side.
+
+        Args:
+            data_type(string, optional): 'train', 'test', 'all'. Defaults to 'train'.
+        Returns:
+            list: contains tuples of two timestamps(string) or None for 'all'.
+        """
+        if data_type in ['train', 'test']:
+            return self.tf_ranges[data_type]
+
+        return None
+
+    def _query_db(self, match, return_values, where_conditions=None, data_type='all', \
+        parameters=None, unwind=None):
+        """Build parameterized Cypher query with given args, or get it from the
+        templates cache if already built for the same query shape, execute it
+        and return its rows.
+
+        Args:
+            match(string): nodes and relationships which should be matched by
+            builded query.
+            return_values(string)
+            where_conditions(string, optional)
+            data_type(string, optional): 'train', 'test', or 'all' which is default.
+            parameters(dict, optional): values of $parameters used in the query
+            parts. TIME_FRAME parameters are added automatically.
+            unwind(string, optional): UNWIND clause put before MATCH, e.g.
+            '$itemsets AS itemset', used for bulk queries.
+        Returns:
+            list: contains dicts, one for each returned row.
+        """
+        template, query_parameters = self._get_query_template(
+            match, return_values, where_conditions, data_type, parameters, unwind)
+
+        start = time.time()
+        rows = template.execute(self.backend, query_parameters)
+        if self.query_stats is not None:
+            self.query_stats.record(
+                self._get_calling_method(), self.testing_part_index, template.text,
+                time.time() - start, len(rows))
+        return rows
+
+    def _iter_query_db(self, match, return_values, where_conditions=None, data_type='all', \
+        parameters=None):
+        """Build or get parameterized Cypher query like _query_db, execute it
+        and generate its rows as they are pulled from the database cursor.
+        The whole result is computed by one query, so no rows are skipped and
+        computed again as with SKIP/LIMIT pages.
+
+        Args:
+            see _query_db.
+
+        Yields:
+            dict: one returned row.
+        """
+        template, query_parameters = self._get_query_template(
+            match, return_values, where_conditions, data_type, parameters)
+
+        start = time.time()
+        rows_count = 0
+        for row in template.iterate(self.backend, query_parameters):
+            rows_count += 1
+            yield row
+
+        if self.query_stats is not None:
+            self.query_stats.record(
+                self._get_calling_method(), self.testing_part_index, template.text,
+                time.time() - start, rows_count)
+
+    def _get_query_template(self, match, return_values, where_conditions=None, \
+        data_type='all', parameters=None, unwind=None):
+        """Return query template for given args, built if not cached, and its
+        parameters with TIME_FRAME ones included.
+
+        Args:
+            see _query_db.
+
+        Returns:
+            QueryTemplate
+            dict: query parameters.
+        """
+        tf_ranges = self.get_tf_ranges(data_type)
+        tf_shape = None
+        if tf_ranges is not None:
+            tf_shape = tuple((bottom is not None, top is not None) for bottom, top in tf_ranges)
+
+        template = self.query_templates.get(
+            (match, return_values, where_conditions, data_type, tf_shape, unwind),
+            lambda: self._build_query(
+                match, return_values, where_conditions, data_type, unwind))
+
+        query_parameters = self._get_tf_parameters(data_type)
+        if parameters is not None:
+            query_parameters.update(parameters)
+        return template, query_parameters
+
+    def _get_calling_method(self):
+        """Return name of the public method of this object which called
+        _query_db, directly or through its private helpers.
+
+        Returns:
+            string
+        """
+        frame = sys._getframe(2)
+        method = frame.f_code.co_name
+        while frame is not None and frame.f_locals.get('self') is self:
+            name = frame.f_code.co_name
+            if not name.startswith('_') and name != 'wrapper':
+                return name
+            frame = frame.f_back
+        return method
+
+    def _build_query(self, match, return_values, where_conditions=None, data_type='all', \
+        unwind=None):
+        """Build Cypher query with given args.
 
         Args:
             match(string): nodes and relationships which should be matched by
@@ -155,10 +279,14 @@ class QueryManager(object):
             return_values(string)
             where_conditions(string, optional)
             data_type(string, optional): 'train', 'test', or 'all' which is default.
+            unwind(string, optional): UNWIND clause put before MATCH.
         Returns:
             string
         """
-        query = 'MATCH %s ' % match
+        query = ''
+        if unwind is not None:
+            query += 'UNWIND %s ' % unwind
+        query += 'MATCH %s ' % match
 
         if where_conditions is not None and where_conditions:
             query += 'WHERE %s ' % where_conditions
@@ -171,12 +299,11 @@ class QueryManager(object):
 
         query += self._get_tf_query_part(data_type)
         query += ' RETURN %s' % return_values
-        # print query, '\n'
-        return self.graph.data(query)
+        return query
 
     def _get_tf_query_part(self, data_type):
-        """ Return TIME_FRAME Cypher conditionals or empty string if data_type
-        is 'all'.
+        """ Return TIME_FRAME Cypher conditionals with $tf_lo and $tf_hi
+        parameters or empty string if data_type is 'all'.
 
         Args:
             data_type(string): 'train', 'test' or 'all'
@@ -185,10 +312,65 @@ class QueryManager(object):
             string
         """
         if data_type in ['train', 'test']:
-            return '( %s)' % self.get_tf_conditions(data_type)
+            conditions = []
+            for i, (bottom, top) in enumerate(self.get_tf_ranges(data_type)):
+                suffix = str(i) if i > 0 else ''
+                range_conditions = []
+                if bottom is not None:
+                    range_conditions.append('tf.timestamp > $tf_lo%s' % suffix)
+                if top is not None:
+                    range_conditions.append('tf.timestamp <= $tf_hi%s' % suffix)
+                conditions.append(' AND '.join(range_conditions))
+            return '( %s)' % ' OR '.join(conditions)
 
         return ''
 
+    def _get_tf_parameters(self, data_type):
+        """ Return values of TIME_FRAME parameters used in the query part
+        returned by _get_tf_query_part.
+
+        Args:
+            data_type(string): 'train', 'test' or 'all'
+
+        Returns:
+            dict
+        """
+        parameters = {}
+        if data_type in ['train', 'test']:
+            for i, (bottom, top) in enumerate(self.get_tf_ranges(data_type)):
+                suffix = str(i) if i > 0 else ''
+                if bottom is not None:
+                    parameters['tf_lo' + suffix] = bottom
+                if top is not None:
+                    parameters['tf_hi' + suffix] = top
+
+        return parameters
+
+    def clear_query_stats(self):
+        """Remove collected query statistics, see QueryStats."""
+        if self.query_stats is not None:
+            self.query_stats.clear()
+
+    def print_query_stats(self, phase):
+        """Print report of collected query statistics if enabled by
+        'report_query_stats' in the data part of the config file.
+
+        Args:
+            phase(string): name of the finished phase, e.g. 'training'.
+        """
+        if self.report_query_stats and self.query_stats is not None:
+            print 'queries of %s:' % phase
+            print self.query_stats.get_report()
+
+    def get_query_stats(self):
+        """Return compile and execution statistics of all the query templates
+        used in this process, sorted by execution time.
+
+        Returns:
+            list: contains dicts, see QueryTemplate.get_stats.
+        """
+        return self.query_templates.get_stats()
+
     @property
     def testing_part_index(self):
         """int: index of testing data partition."""
@@ -203,7 +385,7 @@ class QueryManager(object):
 
     @property
     def k_fold_size(self):
-        """int: number of data partions."""
+        """int: number of data partions. Setting it redefines fold boundaries."""
         return self._k_fold_size
 
     @k_fold_size.setter
@@ -213,13 +395,24 @@ class QueryManager(object):
         except (ValueError, TypeError):
             self._k_fold_size = 0
 
+        # boundaries are cached by the connection, so no full scan is needed
+        if self.backend is not None:
+            self.set_k_fold_tfs(self._k_fold_size)
+            self._define_tf_conditions()
+
     @staticmethod
-    def _list_to_string(list_):
-        """Transform given list to string.
+    def _get_backend(host):
+        """Return storage backend instance defined by the host config.
 
         Args:
-            list_(list)
+            host(dict): 'host' part of the config file. Its 'backend' value
+            can be 'neo4j'(default) or 'local' which uses SQLite database file
+            at 'local_path'.
+
         Returns:
-            string
+            BaseBackend
         """
-        return '[%s]' % ', '.join(str(e) for e in list_)
+        if host.get('backend', 'neo4j') == 'local':
+            return LocalBackend(host['local_path'])
+
+        return Neo4jBackend(host)
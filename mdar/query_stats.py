@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from bisect import bisect_left
+
+
+class QueryStats(object):
+    """Collects wall time and number of returned rows of executed queries by
+    the calling DataManager method, query template and fold (testing part
+    index). Latencies of each method are counted in a histogram with
+    HISTOGRAM_BOUNDS buckets, queries slower than slow_query_threshold are
+    logged and kept in slow_queries.
+
+    Args:
+        slow_query_threshold(float, optional): time in seconds, None disables
+        the slow query log. Defaults to 1.
+        max_slow_queries(int, optional): maximum number of kept slow queries,
+        the oldest are dropped. Defaults to 100.
+        logger_name(string, optional): name of the logger used for slow
+        queries, it gets a stderr handler if neither it nor the root logger
+        has any. Defaults to 'mdar-queries'.
+    """
+
+    # upper bounds of latency buckets in seconds, the last bucket is unbounded
+    HISTOGRAM_BOUNDS = [.001, .005, .01, .05, .1, .5, 1, 5]
+
+    def __init__(self, slow_query_threshold=1, max_slow_queries=100, \
+        logger_name='mdar-queries'):
+        self.slow_query_threshold = slow_query_threshold
+        self.max_slow_queries = max_slow_queries
+        self._log = logging.getLogger(logger_name)
+        # slow queries would be dropped if logging isn't configured
+        if slow_query_threshold is not None and not self._log.handlers \
+            and not logging.getLogger().handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter(
+                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+            self._log.addHandler(handler)
+
+        self.clear()
+
+    def clear(self):
+        """Remove all the collected statistics."""
+        self.methods = {}
+        self.templates = {}
+        self.folds = {}
+        self.slow_queries = []
+
+    def record(self, method, fold, query, seconds, rows):
+        """Add one executed query to the statistics.
+
+        Args:
+            method(string): name of the calling DataManager method.
+            fold(int): testing part index.
+            query(string): query template text.
+            seconds(float): wall time of the execution.
+            rows(int): number of returned rows.
+        """
+        method_stats = self._update(self.methods, method, seconds, rows)
+        if 'histogram' not in method_stats:
+            method_stats['histogram'] = [0] * (len(self.HISTOGRAM_BOUNDS) + 1)
+        method_stats['histogram'][bisect_left(self.HISTOGRAM_BOUNDS, seconds)] += 1
+
+        self._update(self.templates, query, seconds, rows)
+        self._update(self.folds, fold, seconds, rows)
+
+        if self.slow_query_threshold is not None and seconds >= self.slow_query_threshold:
+            self._log.warning(
+                'slow query: %.3fs, %d rows, method %s, fold %s: %s',
+                seconds, rows, method, fold, query)
+            self.slow_queries.append({
+                'method': method,
+                'fold': fold,
+                'query': query,
+                'time': seconds,
+                'rows': rows
+            })
+            if len(self.slow_queries) > self.max_slow_queries:
+                self.slow_queries.pop(0)
+
+    def get_report(self, templates_count=5):
+        """Return summary of collected statistics: calls, time and rows by
+        method with its latency histogram, by fold and for the most time
+        consuming query templates.
+
+        Args:
+            templates_count(int, optional): number of reported templates.
+            Defaults to 5.
+
+        Returns:
+            string
+        """
+        bounds = ['<%gms' % (bound * 1000) for bound in self.HISTOGRAM_BOUNDS]
+        bounds.append('>=%gms' % (self.HISTOGRAM_BOUNDS[-1] * 1000))
+
+        lines = ['method\t calls\t time\t max\t rows\t ' + '\t '.join(bounds)]
+        for method, stats in self._sort(self.methods):
+            lines.append('%s\t %d\t %f\t %f\t %d\t %s' % (
+                method, stats['calls'], stats['time'], stats['max_time'], stats['rows'],
+                '\t '.join(str(count) for count in stats['histogram'])))
+
+        lines.append('fold\t calls\t time\t max\t rows')
+        for fold, stats in self._sort(self.folds):
+            lines.append('%s\t %d\t %f\t %f\t %d' % (
+                fold, stats['calls'], stats['time'], stats['max_time'], stats['rows']))
+
+        lines.append('query\t calls\t time\t max\t rows')
+        for query, stats in self._sort(self.templates)[:templates_count]:
+            lines.append('%s\t %d\t %f\t %f\t %d' % (
+                query, stats['calls'], stats['time'], stats['max_time'], stats['rows']))
+
+        lines.append('slow queries: %d' % len(self.slow_queries))
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _update(stats, key, seconds, rows):
+        """Add query time and rows to the stats of given key.
+
+        Returns:
+            dict: updated stats of the key.
+        """
+        if key not in stats:
+            stats[key] = {'calls': 0, 'time': 0, 'max_time': 0, 'rows': 0}
+        key_stats = stats[key]
+        key_stats['calls'] += 1
+        key_stats['time'] += seconds
+        key_stats['rows'] += rows
+        if seconds > key_stats['max_time']:
+            key_stats['max_time'] = seconds
+        return key_stats
+
+    @staticmethod
+    def _sort(stats):
+        """Return (key, stats) tuples sorted by time, the slowest first."""
+        return sorted(
+            stats.items(), key=lambda key_stats: key_stats[1]['time'], reverse=True)
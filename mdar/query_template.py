@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+import time
+from operator import itemgetter
+
+
+class QueryTemplate(object):
+    """Parameterized Cypher query with a fixed text for one query shape. Values
+    such as item IDs, timestamps and counts are passed as parameters, so the
+    database plans the query only once.
+
+    Args:
+        text(string): Cypher query with $parameters.
+        compile_time(float, optional): time used for building the text.
+    """
+
+    def __init__(self, text, compile_time=0):
+        self.text = text
+        self.compile_time = compile_time
+        self.compilations = 1
+        self.executions = 0
+        self.execution_time = 0
+        self.rows = 0
+
+    def execute(self, backend, parameters):
+        """Execute this query on the given backend and update statistics.
+
+        Args:
+            backend(BaseBackend)
+            parameters(dict)
+
+        Returns:
+            list: contains dicts, one for each returned row.
+        """
+        start = time.time()
+        rows = backend.query(self.text, parameters)
+
+        self.execution_time += time.time() - start
+        self.executions += 1
+        self.rows += len(rows)
+        return rows
+
+    def iterate(self, backend, parameters):
+        """Execute this query on the given backend and generate its rows one by
+        one, statistics are updated when all the rows are generated.
+
+        Args:
+            backend(BaseBackend)
+            parameters(dict)
+
+        Yields:
+            dict: one returned row.
+        """
+        start = time.time()
+        rows_count = 0
+        for row in backend.iter_query(self.text, parameters):
+            rows_count += 1
+            yield row
+
+        self.execution_time += time.time() - start
+        self.executions += 1
+        self.rows += rows_count
+
+    def get_stats(self):
+        """Return compile and execution statistics of this template.
+
+        Returns:
+            dict: with the following structure:
+                {
+                    'query': string
+                    'compilations': int
+                    'compile_time': float
+                    'executions': int
+                    'execution_time': float
+                    'rows': int
+                }
+        """
+        return {
+            'query': self.text,
+            'compilations': self.compilations,
+            'compile_time': self.compile_time,
+            'executions': self.executions,
+            'execution_time': self.execution_time,
+            'rows': self.rows,
+        }
+
+
+class QueryTemplateCache(object):
+    """Cache of QueryTemplates keyed by query shape."""
+
+    def __init__(self):
+        self._templates = {}
+
+    def get(self, key, build):
+        """Return template for given shape key, build it if missing.
+
+        Args:
+            key(tuple): hashable query shape.
+            build(function): returns query text, called only on cache miss.
+
+        Returns:
+            QueryTemplate
+        """
+        template = self._templates.get(key)
+        if template is None:
+            start = time.time()
+            text = build()
+            template = self._templates.get(text)
+            if template is None:
+                template = QueryTemplate(text, time.time() - start)
+                self._templates[text] = template
+            else:
+                template.compilations += 1
+            self._templates[key] = template
+
+        return template
+
+    def get_stats(self):
+        """Return statistics of all the templates sorted by execution time.
+
+        Returns:
+            list: contains dicts, see QueryTemplate.get_stats.
+        """
+        templates = set(self._templates.values())
+        return sorted(
+            [template.get_stats() for template in templates],
+            key=itemgetter('execution_time'), reverse=True)
+
+    def clear(self):
+        """Remove all the templates."""
+        self._templates = {}
@@ -6,13 +6,18 @@ from math import ceil
 from operator import itemgetter
 from collections import OrderedDict
 import numpy as np
+from scipy.sparse import csr_matrix
 
+from mdar.mining.neighbour_table import NeighbourTable
+from mdar.mining.rule_table import RuleTable
+from mdar.model_file import ArrayLists, SubjectModel, read_model_file, write_model_file
 from mdar.recommenders.base import BaseRecommender
 from mdar.recommenders.oa import OrderAssociationRecommender
 from mdar.recommenders.uh import UserHistoryRecommender
 from mdar.recommenders.uh2 import UserHistory2Recommender
 from mdar.recommenders.tr import TimeRelatedRecommender
 from mdar.data_manager import DataManager
+from mdar.time_cube import TimeCube
 
 class MDAR(BaseRecommender):
     """Main recommender class - Multidimensional Association Recommender.
@@ -25,6 +30,13 @@ class MDAR(BaseRecommender):
         Defaults to 3.
         used_approaches(list, optional): list of tuples which holds name of the
         approach(1) and its weight(2) which should be in range [0-1]
+        mining_algorithm(string, optional): association rules mining algorithm,
+        see DataManager.get_association_rules.
+        incremental(bool, optional): keep frequent itemsets of association
+        approaches, so their rules can be updated with new orders by update.
+        Defaults to False.
+        max_x_count(int, optional): maximum number of items in rule's body,
+        limited further by the largest train order. Defaults to 4.
     """
     _min_arhr = .5
     _train_time = 0
@@ -43,7 +55,11 @@ class MDAR(BaseRecommender):
         'time_related'
     ]
 
-    def __init__(self, config_path=None, k_fold_size=3, used_approaches=None):
+    def __init__(self, config_path=None, k_fold_size=3, used_approaches=None, \
+        mining_algorithm=None, incremental=False, max_x_count=4):
+        self.mining_algorithm = mining_algorithm
+        self.incremental = incremental
+        self.max_x_count = max_x_count
         if config_path is not None:
             self._data_manager = DataManager(config_path, k_fold_size)
 
@@ -59,55 +75,274 @@ class MDAR(BaseRecommender):
 
         Args:
             k(int): maximum number of recommendations generated by each approach
-            during training. Defaults to 10.
+            during training, also the maximum number of order association
+            neighbours kept for each item in recommend. Defaults to 10.
         """
         start = time.time()
         self.model = self.get_init_model()
-        orders, max_oi_count = self._append_previous_order_items(
-            self.data_manager.get_orders('train')
-        )
+        self.data_manager.clear_query_stats()
+        max_oi_count = self.data_manager.get_max_order_items_count('train') - 1
 
-        self._init_recommenders(max_oi_count)
+        self._init_recommenders(max_oi_count, k)
         if self.is_approach_used(self.AVAILABLE_APPROACHES[1:3]):
             self.user_items = {}
             for user_items in self.data_manager.get_user_items(None, 'train'):
                 self.user_items[user_items['user']] = user_items['items']
 
-        for order in orders:
-            if self.is_approach_used(self.AVAILABLE_APPROACHES[0]) and order['poi']:
-                recommendations = self.recommenders['oa'].get_mem_recommendations(
-                    order['poi'], k, 2, order['part_of_day'])
-                self._test_item_against_recommendations(
-                    order['item'], recommendations, self.AVAILABLE_APPROACHES[0],
-                    order['user'])
-
-            if self.is_approach_used(self.AVAILABLE_APPROACHES[1]) \
-                and self.user_items[order['user']]:
-                recommendations = self.recommenders['uh'].get_mem_recommendations(
-                    self.user_items[order['user']], k)
-                self._test_item_against_recommendations(
-                    order['item'], recommendations, self.AVAILABLE_APPROACHES[1],
-                    order['user'])
-
-            if self.is_approach_used(self.AVAILABLE_APPROACHES[2]) \
-                and self.user_items[order['user']]:
-                recommendations = self.recommenders['uh2'].get_recommendations(
-                    order['user'], self.user_items[order['user']], k)
-                self._test_item_against_recommendations(
-                    order['item'], recommendations, self.AVAILABLE_APPROACHES[2],
-                    order['user'])
-
-            if self.is_approach_used(self.AVAILABLE_APPROACHES[3]):
-                recommendations = self.recommenders['tr'].get_mem_recommendations(
-                    order['part_of_day'], order['day_in_week'], None, k)
-                self._test_item_against_recommendations(
-                    order['item'], recommendations, self.AVAILABLE_APPROACHES[3],
-                    order['user'])
+        for order_items in self.data_manager.iter_orders('train'):
+            for order in self._append_previous_order_items(order_items):
+                self._train_order_item(order, k)
 
         self._calculate_model()
         # print self.model
         self.init_approaches_order()
         self.train_time = time.time() - start
+        self.data_manager.print_query_stats('training')
+
+    def update(self, orders):
+        """Update association rules of used association approaches with new
+        orders without training again, MDAR has to be trained with
+        incremental=True. Weights of approaches are not changed.
+
+        Args:
+            orders(list): contains lists of order items, see
+            DataManager.iter_orders.
+        """
+        if self.is_approach_used(self.AVAILABLE_APPROACHES[0]):
+            self.recommenders['oa'].update_train_data(orders)
+        if self.is_approach_used(self.AVAILABLE_APPROACHES[1]):
+            self.recommenders['uh'].update_train_data(orders)
+
+    def save(self, path):
+        """Save the trained model, approaches order, user items and prefetched
+        data of the approaches into a model file, see write_model_file. Large
+        data are saved as raw arrays, so they are memory-mapped by load.
+        Frequent itemsets of incremental training aren't saved.
+
+        Args:
+            path(string)
+        """
+        header = {
+            'used_approaches': [
+                [approach, self.user_approaches_w[approach]]
+                for approach in self.used_approaches],
+            'mining_algorithm': self.mining_algorithm,
+            'max_x_count': self.max_x_count,
+            'min_support': self.min_support,
+            'min_confidence': self.min_confidence,
+            'min_arhr': self.min_arhr,
+            'train_time': self._train_time,
+            'max_user_rpr': float(self.max_user_rpr),
+            'max_item_rpr': float(self.max_item_rpr),
+            'approaches_order': [
+                [approach, float(arhr)] for approach, arhr in self.approaches_order.items()],
+            'global': dict(
+                (approach, {'mcv': int(measures['mcv']), 'arhr': float(measures['arhr'])})
+                for approach, measures in self.model['global'].items()),
+            'recommenders': {}
+        }
+        arrays = {}
+
+        for subject in ['user', 'item']:
+            keys, mcv, arhr = SubjectModel.pack(self.model[subject], self.AVAILABLE_APPROACHES)
+            arrays.update({
+                'model.%s.keys' % subject: keys,
+                'model.%s.mcv' % subject: mcv,
+                'model.%s.arhr' % subject: arhr})
+        arrays['model.rpr.item'] = np.array(self.model['rpr']['item'], dtype=np.float64)
+        for rpr_type in ['positive', 'negative']:
+            arrays['model.rpr.user.%s' % rpr_type] = np.array(
+                self.model['rpr']['user'][rpr_type], dtype=np.float64)
+
+        keys, indptr, values = ArrayLists.pack(self.user_items)
+        arrays.update({
+            'user_items.keys': keys, 'user_items.indptr': indptr, 'user_items.values': values})
+
+        for name in ['oa', 'uh']:
+            if name in self.recommenders:
+                recommender = self.recommenders[name]
+                rule_table = RuleTable.from_rules(recommender.association_rules)
+                header['recommenders'][name] = {
+                    'min_support': recommender.min_support,
+                    'min_confidence': recommender.min_confidence,
+                    'rules_use_confidence': recommender.rules_use_confidence,
+                    'rule_time_values': rule_table.time_values
+                }
+                arrays['%s.rules' % name] = rule_table.rules
+
+        if 'oa' in self.recommenders and self.recommenders['oa'].neighbour_table is not None:
+            neighbour_table = self.recommenders['oa'].neighbour_table
+            header['recommenders']['oa']['neighbour_time_values'] = neighbour_table.time_values
+            arrays.update({
+                'oa.neighbours.item_ids': neighbour_table.item_ids,
+                'oa.neighbours.neighbours': neighbour_table.neighbours,
+                'oa.neighbours.scores': neighbour_table.scores})
+
+        if 'tr' in self.recommenders:
+            recommender = self.recommenders['tr']
+            header['recommenders']['tr'] = {
+                'min_support': recommender.min_support,
+                'min_confidence': recommender.min_confidence,
+                'time_slices': [
+                    dict((key, value) for key, value in time_slice.items() if key != 'items')
+                    for time_slice in recommender.time_related_items]
+            }
+            _, indptr, values = ArrayLists.pack(dict(enumerate(
+                time_slice['items'] for time_slice in recommender.time_related_items)))
+            arrays.update({
+                'tr.time_related_items.indptr': indptr,
+                'tr.time_related_items.values': values,
+                'tr.popular_items.items': np.array(
+                    [item['item'] for item in recommender.popular_items], dtype=np.int64),
+                'tr.popular_items.supports': np.array(
+                    [item['support'] for item in recommender.popular_items], dtype=np.float64)})
+
+            time_cube = recommender.time_cube
+            if time_cube is not None:
+                header['recommenders']['tr']['dimensions_values'] = time_cube.dimensions_values
+                arrays.update({
+                    'tr.time_cube.item_ids': time_cube.item_ids,
+                    'tr.time_cube.orders_counts': time_cube.orders_counts,
+                    'tr.time_cube.data': time_cube.item_counts.data,
+                    'tr.time_cube.indices': time_cube.item_counts.indices,
+                    'tr.time_cube.indptr': time_cube.item_counts.indptr})
+
+        write_model_file(path, header, arrays)
+
+    @classmethod
+    def load(cls, path, data_manager=None, mmap_mode='r'):
+        """Load a model saved by save. Large arrays are memory-mapped, so
+        loading is fast and processes forked after loading share them.
+
+        Args:
+            path(string)
+            data_manager(DataManager, optional): used by approaches which
+            query the data, e.g. in recommend.
+            mmap_mode(string, optional): see read_model_file. Defaults to 'r'.
+
+        Returns:
+            MDAR
+        """
+        header, arrays = read_model_file(path, mmap_mode)
+        # approaches are compared by identity, so names decoded from JSON are
+        # replaced by the constants
+        approaches = dict((approach, approach) for approach in cls.AVAILABLE_APPROACHES)
+
+        mdar = cls(
+            used_approaches=[
+                (approaches[approach], weight)
+                for approach, weight in header['used_approaches']],
+            mining_algorithm=header['mining_algorithm'],
+            max_x_count=header.get('max_x_count', 4))
+        mdar.data_manager = data_manager
+        mdar.min_support = header['min_support']
+        mdar.min_confidence = header['min_confidence']
+        mdar.min_arhr = header['min_arhr']
+        mdar.train_time = header['train_time']
+        mdar.max_user_rpr = header['max_user_rpr']
+        mdar.max_item_rpr = header['max_item_rpr']
+        mdar.approaches_order = OrderedDict(
+            (approaches[approach], arhr) for approach, arhr in header['approaches_order'])
+
+        mdar.model = cls.get_init_model()
+        mdar.model['global'] = dict(
+            (approaches[approach], measures)
+            for approach, measures in header['global'].items())
+        for subject in ['user', 'item']:
+            mdar.model[subject] = SubjectModel(
+                arrays['model.%s.keys' % subject], cls.AVAILABLE_APPROACHES,
+                arrays['model.%s.mcv' % subject], arrays['model.%s.arhr' % subject])
+        mdar.model['rpr']['item'] = arrays['model.rpr.item'].tolist()
+        for rpr_type in ['positive', 'negative']:
+            mdar.model['rpr']['user'][rpr_type] = arrays['model.rpr.user.%s' % rpr_type].tolist()
+
+        mdar.user_items = ArrayLists(
+            arrays['user_items.keys'], arrays['user_items.indptr'], arrays['user_items.values'])
+
+        mdar._create_recommenders()
+        for name, recommender_header in header['recommenders'].items():
+            recommender = mdar.recommenders[name]
+            recommender.min_support = recommender_header['min_support']
+            recommender.min_confidence = recommender_header['min_confidence']
+
+        for name in ['oa', 'uh']:
+            if name in header['recommenders']:
+                recommender = mdar.recommenders[name]
+                recommender_header = header['recommenders'][name]
+                recommender.rules_use_confidence = recommender_header['rules_use_confidence']
+                recommender.set_rule_table(RuleTable(
+                    arrays['%s.rules' % name], recommender_header['rule_time_values']))
+
+        if 'oa.neighbours.item_ids' in arrays:
+            mdar.recommenders['oa'].neighbour_table = NeighbourTable(
+                arrays['oa.neighbours.item_ids'],
+                header['recommenders']['oa']['neighbour_time_values'],
+                arrays['oa.neighbours.neighbours'], arrays['oa.neighbours.scores'])
+
+        if 'tr' in header['recommenders']:
+            recommender = mdar.recommenders['tr']
+            recommender_header = header['recommenders']['tr']
+            time_related_items = ArrayLists(
+                np.arange(len(recommender_header['time_slices'])),
+                arrays['tr.time_related_items.indptr'], arrays['tr.time_related_items.values'])
+            recommender.time_related_items = [
+                dict(time_slice, items=time_related_items[i])
+                for i, time_slice in enumerate(recommender_header['time_slices'])]
+            recommender.popular_items = [
+                {'item': item, 'support': support} for item, support in zip(
+                    arrays['tr.popular_items.items'].tolist(),
+                    arrays['tr.popular_items.supports'].tolist())]
+
+            if 'dimensions_values' in recommender_header:
+                item_ids = arrays['tr.time_cube.item_ids']
+                orders_counts = arrays['tr.time_cube.orders_counts']
+                recommender.time_cube = TimeCube.from_arrays(
+                    recommender_header['dimensions_values'], item_ids, orders_counts,
+                    csr_matrix(
+                        (arrays['tr.time_cube.data'], arrays['tr.time_cube.indices'],
+                         arrays['tr.time_cube.indptr']),
+                        shape=(len(orders_counts), len(item_ids)), copy=False))
+
+        return mdar
+
+    def _train_order_item(self, order, k):
+        """Test recommendations of each used approach against given order
+        item and save the results in model attribute.
+
+        Args:
+            order(dict): order item with 'poi' key, see
+            _append_previous_order_items.
+            k(int): maximum number of recommendations generated by each approach.
+        """
+        if self.is_approach_used(self.AVAILABLE_APPROACHES[0]) and order['poi']:
+            recommendations = self.recommenders['oa'].get_mem_recommendations(
+                order['poi'], k, order['part_of_day'])
+            self._test_item_against_recommendations(
+                order['item'], recommendations, self.AVAILABLE_APPROACHES[0],
+                order['user'])
+
+        if self.is_approach_used(self.AVAILABLE_APPROACHES[1]) \
+            and self.user_items[order['user']]:
+            recommendations = self.recommenders['uh'].get_mem_recommendations(
+                self.user_items[order['user']], k)
+            self._test_item_against_recommendations(
+                order['item'], recommendations, self.AVAILABLE_APPROACHES[1],
+                order['user'])
+
+        if self.is_approach_used(self.AVAILABLE_APPROACHES[2]) \
+            and self.user_items[order['user']]:
+            recommendations = self.recommenders['uh2'].get_recommendations(
+                order['user'], self.user_items[order['user']], k)
+            self._test_item_against_recommendations(
+                order['item'], recommendations, self.AVAILABLE_APPROACHES[2],
+                order['user'])
+
+        if self.is_approach_used(self.AVAILABLE_APPROACHES[3]):
+            recommendations = self.recommenders['tr'].get_mem_recommendations(
+                order['part_of_day'], order['day_in_week'], None, k)
+            self._test_item_against_recommendations(
+                order['item'], recommendations, self.AVAILABLE_APPROACHES[3],
+                order['user'])
 
     def recommend(self, k, order, previous_order_items, use_approach_offsets=True):
         """Generate k recommendations for order's user, time attributes, and
@@ -135,16 +370,11 @@ class MDAR(BaseRecommender):
         Returns:
             list: should contain item IDs(int), length of k.
         """
-        recommendations = []
-
         # set the priority of the recommendations algorithms
         approaches_order = self.get_approaches_order_for_user(order['user'])
-        k_per_approach = self.get_k_per_approach(k, approaches_order)
-
-        # iterate over approaches and populate recommendations list
-        approach_index = 0
         user_items = self.data_manager.get_user_items(order['user'], 'train')
 
+        approaches_recommendations = {}
         for approach in approaches_order.keys():
             # approach requirements
             if approach is self.AVAILABLE_APPROACHES[0] and not previous_order_items:
@@ -152,20 +382,130 @@ class MDAR(BaseRecommender):
             elif approach in self.AVAILABLE_APPROACHES[1:3] and not user_items:
                 continue
 
-            # recommendation generation
-            if approach is self.AVAILABLE_APPROACHES[0]:
-                r_temp = self.recommenders['oa'].get_recommendations(
-                    previous_order_items, k, 2, order['part_of_day'])
-            elif approach is self.AVAILABLE_APPROACHES[1]:
-                r_temp = self.recommenders['uh'].get_recommendations(
-                    self.user_items[order['user']], k)
-            elif approach is self.AVAILABLE_APPROACHES[2]:
-                r_temp = self.recommenders['uh2'].get_recommendations(
-                    order['user'], self.user_items[order['user']], k)
-            elif approach is self.AVAILABLE_APPROACHES[3]:
-                r_temp = self.recommenders['tr'].get_recommendations(
-                    order['part_of_day'], order['day_in_week'], None, k)
+            approaches_recommendations[approach] = self._get_approach_recommendations(
+                approach, k, order, previous_order_items)
+
+        return self._merge_recommendations(
+            k, order['user'], approaches_order, approaches_recommendations,
+            use_approach_offsets)
+
+    def recommend_batch(self, orders, k, use_approach_offsets=True):
+        """Generate k recommendations for each order item of given orders, with
+        the items added to the order before it as previous order items. Returns
+        the same recommendations as recommend, but approaches order of each
+        user is computed once, users without train items are found by one
+        query, and recommendations of each approach are generated once for
+        each user, time slice or cart they depend on, so requests with the same
+        user, time attributes and cart are answered once.
+
+        Args:
+            orders(list): contains lists of order items, see
+            DataManager.iter_orders.
+            k(int): expected number of recommendations.
+            use_approach_offsets(bool): see recommend. Defaults to True.
+
+        Returns:
+            list: contains lists of item IDs(int), one for each order item of
+            the orders in the same order.
+        """
+        users = set(order_item['user'] for order_items in orders for order_item in order_items)
+        purchasing_users = set(self.data_manager.get_purchasing_users(users, 'train'))
+
+        approaches_orders = {}  # user -> approaches order
+        approaches_recommendations = {}  # (approach, input) -> recommendations
+        requests_recommendations = {}  # (user, time slice, cart) -> recommendations
+
+        recommendations = []
+        for order_items in orders:
+            for order in self._append_previous_order_items(order_items):
+                cart = tuple(sorted(set(item['item'] for item in order['poi'])))
+                request = (order['user'], order['part_of_day'], order['day_in_week'], cart)
+                if request in requests_recommendations:
+                    recommendations.append(list(requests_recommendations[request]))
+                    continue
+
+                if order['user'] not in approaches_orders:
+                    approaches_orders[order['user']] = \
+                    self.get_approaches_order_for_user(order['user'])
+                approaches_order = approaches_orders[order['user']]
+
+                request_recommendations = {}
+                for approach in approaches_order.keys():
+                    if approach is self.AVAILABLE_APPROACHES[0]:
+                        if not cart:
+                            continue
+                        key = (approach, cart, order['part_of_day'])
+                    elif approach in self.AVAILABLE_APPROACHES[1:3]:
+                        if order['user'] not in purchasing_users:
+                            continue
+                        key = (approach, order['user'])
+                    else:
+                        key = (approach, order['part_of_day'], order['day_in_week'])
+
+                    if key not in approaches_recommendations:
+                        approaches_recommendations[key] = self._get_approach_recommendations(
+                            approach, k, order, order['poi'])
+                    request_recommendations[approach] = approaches_recommendations[key]
+
+                requests_recommendations[request] = self._merge_recommendations(
+                    k, order['user'], approaches_order, request_recommendations,
+                    use_approach_offsets)
+                recommendations.append(list(requests_recommendations[request]))
+
+        return recommendations
+
+    def _get_approach_recommendations(self, approach, k, order, previous_order_items):
+        """Return recommendations of one approach, see recommend.
+
+        Args:
+            approach(string)
+            k(int)
+            order(dict)
+            previous_order_items(list)
+
+        Returns:
+            list: contains item IDs(int).
+        """
+        if approach is self.AVAILABLE_APPROACHES[0]:
+            return self.recommenders['oa'].get_neighbour_recommendations(
+                previous_order_items, k, order['part_of_day'])
+        elif approach is self.AVAILABLE_APPROACHES[1]:
+            return self.recommenders['uh'].get_recommendations(
+                self.user_items[order['user']], k)
+        elif approach is self.AVAILABLE_APPROACHES[2]:
+            return self.recommenders['uh2'].get_recommendations(
+                order['user'], self.user_items[order['user']], k)
+        elif approach is self.AVAILABLE_APPROACHES[3]:
+            return self.recommenders['tr'].get_recommendations(
+                order['part_of_day'], order['day_in_week'], None, k)
+        return []
+
+    def _merge_recommendations(self, k, user_id, approaches_order, \
+        approaches_recommendations, use_approach_offsets=True):
+        """Populate recommendation list with recommendations of the approaches
+        in slots reserved for each of them.
+
+        Args:
+            k(int): expected number of recommendations.
+            user_id(int)
+            approaches_order(OrderedDict): see get_approaches_order_for_user.
+            approaches_recommendations(dict): approach name -> recommendations,
+            approaches without requirements met are left out.
+            use_approach_offsets(bool): see recommend. Defaults to True.
+
+        Returns:
+            list: should contain item IDs(int), length of k.
+        """
+        recommendations = []
+        k_per_approach = self.get_k_per_approach(k, approaches_order)
 
+        # iterate over approaches and populate recommendations list
+        approach_index = 0
+        for approach in approaches_order.keys():
+            if approach not in approaches_recommendations:
+                continue
+
+            r_temp = approaches_recommendations[approach]
             r_count = len(r_temp)
             if r_count:
                 r_slot_index = 0
@@ -178,7 +518,7 @@ class MDAR(BaseRecommender):
                 offset = 0
                 if use_approach_offsets:
                     offset = self._get_approach_offset(
-                        'user', order['user'], approach, slots_left, r_count)
+                        'user', user_id, approach, slots_left, r_count)
 
                 # populate recommendation list
                 for i in range(offset, r_count):
@@ -226,14 +566,35 @@ class MDAR(BaseRecommender):
             self.model['global'][approach] = []
         self.model['global'][approach].append(result)
 
-    def _init_recommenders(self, max_oi_count):
+    def _init_recommenders(self, max_oi_count, k):
         """Initialize all the recommenders and their data that are defined in
         used approaches.
 
         Args:
             max_oi_count(int): maximum number of items found in one order
+            k(int): maximum number of recommendations, sets the width of the
+            order association neighbour table.
         """
 
+        self._create_recommenders()
+
+        # rule bodies grow with the largest order otherwise
+        max_oi_count = min(max_oi_count, self.max_x_count)
+        if self.is_approach_used(self.AVAILABLE_APPROACHES[0]):
+            self.recommenders['oa'].neighbour_table_width = k
+            self.recommenders['oa'].set_train_data(
+                max_oi_count, use_confidence=True, use_part_of_day=True,
+                algorithm=self.mining_algorithm, incremental=self.incremental)
+        if self.is_approach_used(self.AVAILABLE_APPROACHES[1]):
+            self.recommenders['uh'].set_train_data(
+                max_oi_count, use_confidence=True, algorithm=self.mining_algorithm,
+                incremental=self.incremental)
+        if self.is_approach_used(self.AVAILABLE_APPROACHES[3]):
+            self.recommenders['tr'].set_train_data(True, True, False)
+
+    def _create_recommenders(self):
+        """Create recommenders of all the used approaches, without their
+        train data."""
         self.recommenders = {}
         recommenders = [
             ('oa', OrderAssociationRecommender),
@@ -248,16 +609,6 @@ class MDAR(BaseRecommender):
                 self.recommenders[rec_abr] = rec(self.min_support, self.min_confidence)
                 self.recommenders[rec_abr].data_manager = self.data_manager
 
-        # just to be on a safe side!
-        max_oi_count = 4 if max_oi_count > 4 else max_oi_count
-        if self.is_approach_used(self.AVAILABLE_APPROACHES[0]):
-            self.recommenders['oa'].set_train_data(
-                max_oi_count, use_confidence=True, use_part_of_day=True)
-        if self.is_approach_used(self.AVAILABLE_APPROACHES[1]):
-            self.recommenders['uh'].set_train_data(max_oi_count, use_confidence=True)
-        if self.is_approach_used(self.AVAILABLE_APPROACHES[3]):
-            self.recommenders['tr'].set_train_data(True, True, False)
-
     def is_approach_used(self, questioned_approach):
         """Tests if questioned approach is used by MDAR recommender.
 
@@ -430,13 +781,13 @@ class MDAR(BaseRecommender):
         }
 
     @staticmethod
-    def _append_previous_order_items(orders):
-        """Populate given list of orders with previous order items by order IDs.
-        Given list contains dicts which represent one order item and are sorted
-        by the order ID.
+    def _append_previous_order_items(order_items):
+        """Populate given order items of one order with previous order items.
+        Each order item gets its own list, so it holds only items which were
+        added to the order before it.
 
         Args:
-            orders(list): list of dicts with a following structure:
+            order_items(list): list of dicts with a following structure:
             {
                 'part_of_day': string,
                 'timestamp': string,
@@ -451,23 +802,13 @@ class MDAR(BaseRecommender):
         Returns:
             list: same input order dicts with 'poi' key that holds a list of
             previous item IDs or empty if none.
-            int: maximum number of items found in one order
         """
         poi = []
-        max_oi_count = 0
-        current_order_id = -1
-        for i in range(0, len(orders)):
-            if orders[i]['order'] != current_order_id:
-                current_order_id = orders[i]['order']
-                poi = []
-
-            if len(poi) - 1 > max_oi_count:
-                max_oi_count = len(poi)
-
-            orders[i]['poi'] = poi
-            poi.append({'item': orders[i]['item'], 'cats': orders[i]['cats']})
+        for order_item in order_items:
+            order_item['poi'] = list(poi)
+            poi.append({'item': order_item['item'], 'cats': order_item['cats']})
 
-        return orders, max_oi_count
+        return order_items
 
     @staticmethod
     def _get_measure_values(hit_data):
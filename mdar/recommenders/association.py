@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 from operator import itemgetter
+from mdar.mining.rule_index import RuleIndex
+from mdar.mining.rule_table import RuleTable
 from mdar.recommenders.base import BaseRecommender
 
 
@@ -14,6 +16,10 @@ class AssociationRecommender(BaseRecommender):
         min_confidence(float, optional): minimal confidence for an association
         rule to be considered valid. Defaults to 0.05.
     """
+    rule_miner = None
+    rule_index = None
+    rule_table = None
+    rules_use_confidence = False
 
     def get_association_recommendations(self, item_ids, k, degree=1, \
         part_of_day=None, day_in_week=None, month=None, use_confidence=False, \
@@ -77,6 +83,98 @@ class AssociationRecommender(BaseRecommender):
             self._get_sorting_key(use_confidence, use_lift)
         )
 
+    def get_rule_recommendations(self, item_ids, k, part_of_day=None, \
+        day_in_week=None, month=None):
+        """Return heads of the best association rules in memory whose whole
+        body is in given items, looked up in the rule_index which is built
+        from association_rules if not set.
+
+        Args:
+            item_ids(list): contains item IDs(int)
+            k(int): number of expected recommendations
+            part_of_day(string, optional): used as a constraint for assciation
+            rules as other time-related args.
+            day_in_week(string, optional)
+            month(int, optional)
+
+        Returns:
+            list: recommendations, contains item IDs (int)
+        """
+        if self.rule_index is None:
+            self.rule_index = RuleIndex(self.association_rules)
+
+        return self.rule_index.get_heads(item_ids, k, part_of_day, day_in_week, month)
+
+    def set_rule_table(self, rule_table):
+        """Set association rules held in a RuleTable, e.g. of a loaded model.
+        The rules are converted to dicts on the first use of association_rules.
+
+        Args:
+            rule_table(RuleTable)
+        """
+        self.rule_table = rule_table
+        self._association_rules = None
+        self.rule_index = None
+
+    def _get_train_rules(self, max_x_count, use_part_of_day, use_day_in_week, \
+        use_month, use_confidence, algorithm, incremental):
+        """Return association rules mined from the train data. If incremental,
+        frequent itemsets are kept in rule_miner, so the rules can be updated
+        with new orders, see _get_updated_rules.
+
+        Args:
+            see set_train_data.
+
+        Returns:
+            list: see DataManager.get_association_rules.
+        """
+        self.rules_use_confidence = use_confidence
+        if not incremental:
+            self.rule_miner = None
+            return self._append_rule_measures(self.data_manager.get_association_rules(
+                self.min_support, max_x_count, use_part_of_day, use_day_in_week,
+                use_month, use_confidence, algorithm=algorithm))
+
+        self.rule_miner = self.data_manager.get_rule_miner(
+            self.min_support, max_x_count, use_part_of_day, use_day_in_week, use_month)
+        return self._append_rule_measures(self.rule_miner.get_rules(use_confidence))
+
+    def _get_updated_rules(self, orders):
+        """Return association rules updated with given new orders.
+
+        Args:
+            orders(list): contains lists of order items, see
+            DataManager.iter_orders.
+
+        Returns:
+            list: see DataManager.get_association_rules.
+        """
+        if self.rule_miner is None:
+            raise ValueError('rules can be updated only if trained with incremental=True')
+
+        self.data_manager.update_rule_miner(self.rule_miner, orders)
+        return self._append_rule_measures(self.rule_miner.get_rules(self.rules_use_confidence))
+
+    def _append_rule_measures(self, rules):
+        """Append lift, conviction and leverage to each rule, computed for all
+        the rules at once on a RuleTable, see DataManager.get_rule_table.
+        Rules without confidence are returned as they are.
+
+        Args:
+            rules(list): see DataManager.get_association_rules.
+
+        Returns:
+            list: same rules.
+        """
+        if not self.rules_use_confidence or not rules:
+            return rules
+
+        rule_table = self.data_manager.get_rule_table(rules, 'train')
+        for measure in ['lift', 'conviction', 'leverage']:
+            for rule, value in zip(rules, rule_table.rules[measure].tolist()):
+                rule[measure] = value
+        return rules
+
     def _update_recommendations(self, recommendations, items, k, use_min_support, sorting_key=None):
         """Append items to recommendations until length of recommendations is k.
 
@@ -175,10 +273,7 @@ class AssociationRecommender(BaseRecommender):
             list: same as 'items' arg but now with 'confidence' in each dict
         """
         items = self.data_manager.append_confidence(items)
-        items = sorted(items, key=itemgetter('support', 'confidence'), reverse=True)
-        items = [item for item in items if item['confidence'] >= self.min_confidence]
-
-        return items
+        return self._select_items(items, 'confidence', self.min_confidence)
 
     def _apppend_lift_values(self, items):
         """Calcuate lift for each item in items and append it to same list.
@@ -196,7 +291,26 @@ class AssociationRecommender(BaseRecommender):
             list: same as 'items' arg but now with 'lift' in each dict
         """
         items = self.data_manager.append_lift(items, 'train')
-        items = sorted(items, key=itemgetter('support', 'lift'), reverse=True)
-        items = [item for item in items if item['lift'] >= self.min_lift]
+        return self._select_items(items, 'lift', self.min_lift)
 
-        return items
+    @staticmethod
+    def _select_items(items, measure, min_value):
+        """Return items sorted by support and given measure, the best first,
+        without the ones whose measure is below min_value. Items are masked
+        and sorted on RuleTable columns, so the measures are compared as
+        float32.
+
+        Args:
+            items(list): contains dicts with 'item', 'support' and measure keys.
+            measure(string): 'confidence' or 'lift'.
+            min_value(float)
+
+        Returns:
+            list
+        """
+        rule_table = RuleTable.from_rules([
+            {'x': [], 'y': item['item'], 'support': item['support'], measure: item[measure]}
+            for item in items])
+        indices = rule_table.argsort(['support', measure], reverse=True)
+        indices = indices[rule_table.get_mask(**{'min_' + measure: min_value})[indices]]
+        return [items[i] for i in indices.tolist()]
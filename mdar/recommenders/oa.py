@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
-from operator import itemgetter
+from mdar.mining.neighbour_table import NeighbourTable
+from mdar.mining.rule_index import RuleIndex
+from mdar.mining.rule_table import RuleTable
 from mdar.recommenders.association import AssociationRecommender
 
 
@@ -16,6 +18,9 @@ class OrderAssociationRecommender(AssociationRecommender):
         rule to be considered valid. Defaults to 0.05.
     """
     _association_rules = []
+    written_rules = []
+    neighbour_table = None
+    neighbour_table_width = 20
 
     def get_recommendations(self, previous_order_items, k, degree=1, \
         part_of_day=None, day_in_week=None, month=None, \
@@ -51,6 +56,28 @@ class OrderAssociationRecommender(AssociationRecommender):
             use_confidence, use_lift, search_for_n_itemset
         )
 
+    def get_neighbour_recommendations(self, previous_order_items, k, part_of_day=None):
+        """Return the best consequents of the current cart items merged from
+        rows of the neighbour_table, without querying the DB or scanning the
+        rules. Rows hold neighbour_table_width consequents, so k larger than
+        the width can return fewer recommendations than the rules could.
+
+        Args:
+            previous_order_items(list): should contain dicts with 'item' key
+            which holds item's ID(int)
+            k(int): number of expected recommendations
+            part_of_day(string, optional): used as a constraint for
+            association rules.
+
+        Returns:
+            list: recommendations, contains item IDs (int)
+        """
+        if not previous_order_items or self.neighbour_table is None:
+            return []
+
+        item_ids = [poi['item'] for poi in previous_order_items]
+        return self.neighbour_table.get_neighbours(item_ids, k, part_of_day)
+
     def get_mem_recommendations(self, previous_order_items, k, \
         part_of_day=None, day_in_week=None, month=None):
         """Return recommendations generated from the association rules which are
@@ -73,24 +100,11 @@ class OrderAssociationRecommender(AssociationRecommender):
         for i in previous_order_items:
             poi.append(i['item'])
 
-        recommendations = []
-        for rule in self.association_rules:
-            if any(i in rule['x'] for i in poi):
-                if part_of_day is not None and part_of_day != rule['part_of_day']:
-                    break
-                if day_in_week is not None and day_in_week != rule['day_in_week']:
-                    break
-                if month is not None and month != rule['month']:
-                    break
-
-                if rule['y'] not in recommendations:
-                    recommendations.append(rule['y'])
-                if k >= len(recommendations):
-                    break
-        return recommendations
+        return self.get_rule_recommendations(poi, k, part_of_day, day_in_week, month)
 
     def set_train_data(self, max_x_count=2, use_part_of_day=False, \
-        use_day_in_week=False, use_month=False, use_confidence=False):
+        use_day_in_week=False, use_month=False, use_confidence=False, algorithm=None, \
+        incremental=False):
         """Define association rules based on the given args.
 
         Args:
@@ -101,29 +115,62 @@ class OrderAssociationRecommender(AssociationRecommender):
             use_month(bool, optional): defaults to False.
             use_confidence(bool, optional): if confidence measure should be
             used in generating and estimating rules. Defaults to False.
+            algorithm(string, optional): rule mining algorithm, see
+            DataManager.get_association_rules.
+            incremental(bool, optional): keep frequent itemsets, so the rules
+            can be updated with update_train_data. Defaults to False.
         """
-        self.association_rules = self.data_manager.get_association_rules(
-            self.min_support, max_x_count, use_part_of_day, use_day_in_week,
-            use_month, use_confidence
-        )
+        self.association_rules = self._get_train_rules(
+            max_x_count, use_part_of_day, use_day_in_week, use_month, use_confidence,
+            algorithm, incremental)
 
         # delete previous association relationships
         self.data_manager.delete_associations()
-        if use_confidence:
-            self.association_rules = sorted(
-                self.association_rules,
-                key=itemgetter('y', 'support', 'confidence'),
-                reverse=True
-            )
-        else:
-            self.association_rules = sorted(
-                self.association_rules,
-                key=itemgetter('y', 'support'),
-                reverse=True
-            )
+        self.association_rules = self._sort_rules(self.association_rules, use_confidence)
+
+        self.rule_index = RuleIndex(self.association_rules)
+        self.neighbour_table = NeighbourTable.from_rules(
+            self.association_rules, self.neighbour_table_width)
 
         # write to db
         self.data_manager.write_associations(self.association_rules)
+        self.written_rules = self.association_rules
+
+    def update_train_data(self, orders):
+        """Update association rules with new orders and patch association
+        relationships of changed rules only, see DataManager.update_associations.
+
+        Args:
+            orders(list): contains lists of order items, see
+            DataManager.iter_orders.
+
+        Returns:
+            dict: see DataManager.update_associations.
+        """
+        self.association_rules = self._sort_rules(
+            self._get_updated_rules(orders), self.rules_use_confidence)
+        self.rule_index = RuleIndex(self.association_rules)
+        self.neighbour_table = NeighbourTable.from_rules(
+            self.association_rules, self.neighbour_table_width)
+
+        self.written_rules, stats = self.data_manager.update_associations(
+            self.written_rules, self.association_rules)
+        return stats
+
+    @staticmethod
+    def _sort_rules(rules, use_confidence):
+        """Sort rules by the head item and then by the measures, the best first.
+        Sorted on RuleTable columns, so the measures are compared as float32.
+
+        Args:
+            rules(list)
+            use_confidence(bool)
+
+        Returns:
+            list
+        """
+        keys = ['y', 'support', 'confidence'] if use_confidence else ['y', 'support']
+        return [rules[i] for i in RuleTable.from_rules(rules).argsort(keys, reverse=True)]
 
     @property
     def association_rules(self):
@@ -135,6 +182,8 @@ class OrderAssociationRecommender(AssociationRecommender):
             'confidence': float
         }
         """
+        if self._association_rules is None:
+            self._association_rules = self.rule_table.to_rules()
         return self._association_rules
 
     @association_rules.setter
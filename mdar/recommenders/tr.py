@@ -18,6 +18,7 @@ class TimeRelatedRecommender(BaseRecommender):
 
     _popular_items = []
     _time_related_items = []
+    time_cube = None
 
     def get_recommendations(self, part_of_day, day_in_week, month, k):
         """Return time related recommendations for given parameters.
@@ -49,7 +50,9 @@ class TimeRelatedRecommender(BaseRecommender):
 
     def get_mem_recommendations(self, part_of_day, day_in_week, month, k):
         """Return time related recommendations for given parameters from fast
-        memory(prefetched), not directly from graph DB.
+        memory(prefetched), not directly from graph DB. Any combination of
+        time attributes is looked up in the time cube if set, otherwise items
+        of matching time related slices are merged.
 
         Args:
             part_of_day(string)
@@ -62,7 +65,14 @@ class TimeRelatedRecommender(BaseRecommender):
         """
 
         recommendations = []
-        for time_slice in self.time_related_items:
+        if self.time_cube is not None:
+            recommendations = self.time_cube.get_items(
+                part_of_day, day_in_week, month)[:k].tolist()
+            time_related_items = []
+        else:
+            time_related_items = self.time_related_items
+
+        for time_slice in time_related_items:
             if month is not None and month != time_slice['month']:
                 continue
             if day_in_week is not None and day_in_week != time_slice['day_in_week']:
@@ -118,11 +128,11 @@ class TimeRelatedRecommender(BaseRecommender):
             use_day_in_week(bool, optional): defaults to False.
             use_month(bool, optional): defaults to False.
         """
-        self.time_related_items = self.data_manager.get_all_items_by_time(
+        self.time_cube = self.data_manager.get_time_cube('train')
+        self.time_related_items = self.time_cube.get_all_items_by_time(
             use_part_of_day,
             use_day_in_week,
-            use_month,
-            'train'
+            use_month
         )
 
         for i in range(0, len(self.time_related_items)):
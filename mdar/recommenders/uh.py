@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+from mdar.mining.rule_index import RuleIndex
 from mdar.recommenders.association import AssociationRecommender
 
 
@@ -61,24 +62,11 @@ class UserHistoryRecommender(AssociationRecommender):
         Returns:
             list: recommendations, contains item IDs (int)
         """
-        recommendations = []
-        for rule in self.association_rules:
-            if any(i in rule['x'] for i in user_items):
-                if part_of_day is not None and part_of_day != rule['part_of_day']:
-                    break
-                if day_in_week is not None and day_in_week != rule['day_in_week']:
-                    break
-                if month is not None and month != rule['month']:
-                    break
-
-                if rule['y'] not in recommendations:
-                    recommendations.append(rule['y'])
-                if k >= len(recommendations):
-                    break
-        return recommendations
+        return self.get_rule_recommendations(user_items, k, part_of_day, day_in_week, month)
 
     def set_train_data(self, max_x_count=2, use_part_of_day=False, \
-        use_day_in_week=False, use_month=False, use_confidence=False):
+        use_day_in_week=False, use_month=False, use_confidence=False, algorithm=None, \
+        incremental=False):
         """Define association rules based on the given args.
 
         Args:
@@ -89,15 +77,25 @@ class UserHistoryRecommender(AssociationRecommender):
             use_month(bool, optional): defaults to False.
             use_confidence(bool, optional): if confidence measure should be
             used in generating and estimating rules. Defaults to False.
+            algorithm(string, optional): rule mining algorithm, see
+            DataManager.get_association_rules.
+            incremental(bool, optional): keep frequent itemsets, so the rules
+            can be updated with update_train_data. Defaults to False.
         """
-        self.association_rules = self.data_manager.get_association_rules(
-            self.min_support,
-            max_x_count,
-            use_part_of_day,
-            use_day_in_week,
-            use_month,
-            use_confidence
-        )
+        self.association_rules = self._get_train_rules(
+            max_x_count, use_part_of_day, use_day_in_week, use_month, use_confidence,
+            algorithm, incremental)
+        self.rule_index = RuleIndex(self.association_rules)
+
+    def update_train_data(self, orders):
+        """Update association rules with new orders, see set_train_data.
+
+        Args:
+            orders(list): contains lists of order items, see
+            DataManager.iter_orders.
+        """
+        self.association_rules = self._get_updated_rules(orders)
+        self.rule_index = RuleIndex(self.association_rules)
 
     @property
     def association_rules(self):
@@ -109,6 +107,8 @@ class UserHistoryRecommender(AssociationRecommender):
             'confidence': float
         }
         """
+        if self._association_rules is None:
+            self._association_rules = self.rule_table.to_rules()
         return self._association_rules
 
     @association_rules.setter
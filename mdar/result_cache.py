@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+from functools import wraps
+from inspect import getcallargs
+
+
+class ResultCache(object):
+    """Size bounded LRU cache of query results. When the number of cached
+    results or the total number of cached rows exceeds the limit, least
+    recently used results are evicted.
+
+    Args:
+        max_size(int, optional): maximum number of cached results. Defaults
+        to 1024.
+        max_rows(int, optional): maximum number of cached rows (list items)
+        in all the results. Defaults to 1000000.
+    """
+
+    def __init__(self, max_size=1024, max_rows=1000000):
+        self.max_size = max_size
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._results = OrderedDict()
+        self._rows = 0
+
+    def get(self, key):
+        """Return cached result for given key and mark it as recently used.
+
+        Args:
+            key(tuple)
+
+        Returns:
+            bool: is the result found.
+            result or None if not found.
+        """
+        try:
+            result = self._results.pop(key)
+        except KeyError:
+            self.misses += 1
+            return False, None
+
+        self._results[key] = result
+        self.hits += 1
+        return True, result
+
+    def set(self, key, result):
+        """Cache given result and evict least recently used results if needed.
+
+        Args:
+            key(tuple)
+            result
+        """
+        if key in self._results:
+            self._rows -= self._get_rows_count(self._results.pop(key))
+
+        rows_count = self._get_rows_count(result)
+        if rows_count > self.max_rows:
+            return
+
+        self._results[key] = result
+        self._rows += rows_count
+        while len(self._results) > self.max_size or self._rows > self.max_rows:
+            _, evicted = self._results.popitem(last=False)
+            self._rows -= self._get_rows_count(evicted)
+            self.evictions += 1
+
+    def clear(self):
+        """Remove all the cached results. Counters are kept."""
+        self._results = OrderedDict()
+        self._rows = 0
+
+    def get_stats(self):
+        """Return cache counters.
+
+        Returns:
+            dict: with the following structure:
+                {
+                    'hits': int
+                    'misses': int
+                    'evictions': int
+                    'size': int
+                    'rows': int
+                }
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._results),
+            'rows': self._rows,
+        }
+
+    @staticmethod
+    def _get_rows_count(result):
+        """Return number of rows in result, 1 for scalar results."""
+        return len(result) if isinstance(result, list) else 1
+
+
+def cached_result(method):
+    """Decorator for DataManager methods which caches their results in the
+    instance's result_cache. Key is made of method name, normalized arguments
+    (defaults included, nested lists as sorted tuples) and testing part index.
+    Results are copied with their nested lists and dicts, so callers can
+    update returned rows and their values.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.result_cache is None:
+            return method(self, *args, **kwargs)
+
+        arguments = getcallargs(method, self, *args, **kwargs)
+        del arguments['self']
+        key = (method.__name__, self.testing_part_index) + tuple(
+            (name, _normalize(value)) for name, value in sorted(arguments.items()))
+
+        is_found, result = self.result_cache.get(key)
+        if not is_found:
+            result = method(self, *args, **kwargs)
+            self.result_cache.set(key, _copy_result(result))
+        return _copy_result(result)
+
+    return wrapper
+
+
+def _normalize(value):
+    """Return hashable, order independent representation of an argument."""
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted(_normalize(item) for item in value))
+    if isinstance(value, dict):
+        return tuple(sorted((key, _normalize(item)) for key, item in value.iteritems()))
+    return value
+
+
+def _copy_result(result):
+    """Return copy of result with all the nested lists and dicts copied."""
+    if not isinstance(result, list) or not result or not isinstance(result[0], dict):
+        return _copy_value(result)
+
+    # rows have the same columns, so the ones which can hold lists or dicts
+    # are found in the first row
+    nested_keys = [
+        key for key, value in result[0].iteritems()
+        if value is None or isinstance(value, (list, dict))]
+    rows = [dict(row) for row in result]
+    if nested_keys:
+        for row in rows:
+            for key in nested_keys:
+                if key in row:
+                    row[key] = _copy_value(row[key])
+    return rows
+
+
+def _copy_value(value):
+    """Return copy of value with all the nested lists and dicts copied."""
+    if isinstance(value, list):
+        return [_copy_value(item) for item in value]
+    if isinstance(value, dict):
+        return dict((key, _copy_value(item)) for key, item in value.iteritems())
+    return value
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+import httplib
+import json
+import Queue
+import threading
+import time
+import numpy as np
+
+from mdar.recommender import MDAR
+
+
+class RecommendationHandler(BaseHTTPRequestHandler):
+    """Handler of recommendation server requests, see RecommendationServer.
+    Requests and responses are JSON objects, one request per connection."""
+
+    # seconds after which a connection of a slow client is closed
+    timeout = 10
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send(200, self.server.get_status())
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def do_POST(self):
+        try:
+            data = self._read()
+        except ValueError:
+            self._send(400, {'error': 'request body is not a JSON object'})
+            return
+
+        if self.path == '/recommend':
+            try:
+                k, order, previous_order_items = self.server.parse_request(data)
+            except (KeyError, TypeError, ValueError) as error:
+                self._send(400, {'error': 'invalid request: %r' % error})
+                return
+            try:
+                recommendations = self.server.recommend(k, order, previous_order_items)
+            except Exception as error:
+                self._send(500, {'error': 'recommending failed: %r' % error})
+                raise
+            self._send(200, {'recommendations': recommendations})
+        elif self.path == '/reload':
+            # any failure keeps the old model
+            try:
+                self.server.reload(data.get('path'))
+            except Exception as error:
+                self._send(500, {'error': 'model not reloaded: %r' % error})
+                return
+            self._send(200, self.server.get_status())
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def _read(self):
+        """Return JSON object of the request body, empty if no body.
+
+        Raises:
+            ValueError: if the body isn't a JSON object.
+        """
+        length = int(self.headers.get('Content-Length') or 0)
+        data = json.loads(self.rfile.read(length)) if length else {}
+        if not isinstance(data, dict):
+            raise ValueError('not an object')
+        return data
+
+    def _send(self, status, data):
+        """Send JSON response."""
+        body = json.dumps(data)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+class RecommendationServer(HTTPServer):
+    """HTTP server of MDAR recommendations for local clients. Accepted
+    connections are put into a bounded queue and handled by a fixed pool of
+    worker threads, connections over the queue size are refused with 503.
+    MDAR and DataManager aren't thread safe, so recommendations are generated
+    one at a time, while workers read requests and write responses
+    concurrently. The model can be reloaded from a model file without
+    stopping the server, requests in progress finish with the old one.
+
+    Endpoints:
+        POST /recommend: {'user': int, 'items': list of item IDs in the cart,
+        'part_of_day': string, 'day_in_week': string, 'month': int, 'k': int}
+        -> {'recommendations': list of item IDs}
+        POST /reload: {'path': optional model file path} -> status
+        GET /health: status
+
+    Args:
+        address(tuple): host(string) and port(int).
+        model_path(string): path to a model file, see MDAR.save.
+        data_manager(DataManager, optional): see MDAR.load.
+        workers_count(int, optional): number of worker threads. Defaults to 4.
+        queue_size(int, optional): maximum number of waiting connections.
+        Defaults to 64.
+        verbose(bool, optional): log requests. Defaults to False.
+    """
+
+    def __init__(self, address, model_path, data_manager=None, workers_count=4, \
+        queue_size=64, verbose=False):
+        HTTPServer.__init__(self, address, RecommendationHandler)
+        self.data_manager = data_manager
+        self.verbose = verbose
+        self.model_path = None
+        self.recommender = None
+        self.loaded_at = None
+        self.rejected_count = 0
+        self._recommend_lock = threading.Lock()
+        self.reload(model_path)
+
+        self.requests = Queue.Queue(queue_size)
+        self.workers = []
+        for _ in range(workers_count):
+            worker = threading.Thread(target=self._work)
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+
+    def reload(self, model_path=None):
+        """Load the model from given file and swap it with the current one.
+
+        Args:
+            model_path(string, optional): defaults to the current model file.
+        """
+        model_path = model_path or self.model_path
+        recommender = MDAR.load(model_path, self.data_manager)
+        with self._recommend_lock:
+            self.recommender = recommender
+            self.model_path = model_path
+            self.loaded_at = time.time()
+
+    @staticmethod
+    def parse_request(data):
+        """Return MDAR.recommend arguments of recommendation request data.
+
+        Args:
+            data(dict): see RecommendationServer.
+
+        Returns:
+            int: k.
+            dict: order.
+            list: previous order items.
+
+        Raises:
+            KeyError, TypeError, ValueError: if data are invalid.
+        """
+        order = {
+            'user': int(data['user']),
+            'item': None,
+            'cats': [],
+            'part_of_day': data.get('part_of_day'),
+            'day_in_week': data.get('day_in_week'),
+            'month': data.get('month')
+        }
+        previous_order_items = [{'item': int(item), 'cats': []} for item in data['items']]
+        return int(data['k']), order, previous_order_items
+
+    def recommend(self, k, order, previous_order_items):
+        """Return recommendations of the current model, see MDAR.recommend.
+
+        Args:
+            k(int)
+            order(dict)
+            previous_order_items(list)
+
+        Returns:
+            list: item IDs(int).
+        """
+        with self._recommend_lock:
+            return self.recommender.recommend(k, order, previous_order_items)
+
+    def get_status(self):
+        """Return status of the server.
+
+        Returns:
+            dict
+        """
+        return {
+            'model_path': self.model_path,
+            'loaded_at': self.loaded_at,
+            'queued': self.requests.qsize(),
+            'rejected': self.rejected_count
+        }
+
+    def process_request(self, request, client_address):
+        try:
+            self.requests.put_nowait((request, client_address))
+        except Queue.Full:
+            self.rejected_count += 1
+            try:
+                request.sendall(
+                    'HTTP/1.0 503 Service Unavailable\r\nContent-Length: 0\r\n\r\n')
+            finally:
+                self.shutdown_request(request)
+
+    def _work(self):
+        """Handle queued connections until the process ends."""
+        while True:
+            request, client_address = self.requests.get()
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+
+def get_load_test_requests(data_manager, k, count, data_type='test'):
+    """Return recommendation requests made from orders of the data partition,
+    one for each order item with the items added before it as the cart.
+
+    Args:
+        data_manager(DataManager)
+        k(int): number of requested recommendations.
+        count(int): maximum number of requests.
+        data_type(string, optional): defaults to 'test'.
+
+    Returns:
+        list: contains dicts, see RecommendationServer.
+    """
+    requests = []
+    for order_items in data_manager.iter_orders(data_type):
+        for i, order_item in enumerate(order_items):
+            if len(requests) >= count:
+                return requests
+            requests.append({
+                'user': order_item['user'],
+                'items': [previous['item'] for previous in order_items[:i]],
+                'part_of_day': order_item['part_of_day'],
+                'day_in_week': order_item['day_in_week'],
+                'month': order_item['month'],
+                'k': k
+            })
+    return requests
+
+
+def run_load_test(address, requests, concurrency=8):
+    """Send requests to a running recommendation server from concurrent
+    clients and measure their latency.
+
+    Args:
+        address(tuple): host(string) and port(int) of the server.
+        requests(list): request data, see get_load_test_requests.
+        concurrency(int, optional): number of clients. Defaults to 8.
+
+    Returns:
+        dict: with the following structure:
+            {
+                'requests': int
+                'errors': int, failed or rejected requests
+                'throughput': float, requests per second
+                'p50': float, median latency in milliseconds
+                'p99': float
+            }
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def send(client_requests):
+        for data in client_requests:
+            start = time.time()
+            connection = httplib.HTTPConnection(*address)
+            try:
+                connection.request(
+                    'POST', '/recommend', json.dumps(data),
+                    {'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                response.read()
+                is_ok = response.status == 200
+            except (httplib.HTTPException, IOError):
+                is_ok = False
+            finally:
+                connection.close()
+
+            with lock:
+                if is_ok:
+                    latencies.append(time.time() - start)
+                else:
+                    errors[0] += 1
+
+    clients = [
+        threading.Thread(target=send, args=(requests[i::concurrency],))
+        for i in range(concurrency)]
+    start = time.time()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    duration = time.time() - start
+
+    latencies = np.array(latencies) * 1000
+    return {
+        'requests': len(requests),
+        'errors': errors[0],
+        'throughput': len(latencies) / duration if duration else 0.0,
+        'p50': float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+        'p99': float(np.percentile(latencies, 99)) if len(latencies) else 0.0
+    }
@@ -46,20 +46,51 @@ class Tester(object):
         """
         confusion_matrix = {'tp': 0, 'tn': 0, 'fp': 0, 'fn': 0}
 
-        poi = []    # previous order items
-        current_order_id = -1
         cases_without_history = 0
+        self.data_manager.clear_query_stats()
 
         items_count = self.data_manager.get_items_count('train')
 
-        orders = self.data_manager.get_orders('test')
-        for order in orders:
-            if order['order'] != current_order_id:
-                poi = []
-                current_order_id = order['order']
+        # orders are recommended for in batches of about batch_size order items
+        orders = []
+        order_items_count = 0
+        for order_items in self.data_manager.iter_orders('test'):
+            orders.append(order_items)
+            order_items_count += len(order_items)
+            if order_items_count >= self.data_manager.batch_size:
+                cases_without_history += self._test_orders(
+                    orders, items_count, confusion_matrix)
+                orders = []
+                order_items_count = 0
+        if orders:
+            cases_without_history += self._test_orders(orders, items_count, confusion_matrix)
+
+        self.data_manager.print_query_stats('testing')
 
-            recommendations = self.recommender.recommend(self.k, order, poi)
-            # print recommendations
+        precision, recall, fallout, f1_score, specificity = \
+        self.get_evaluation_measures(confusion_matrix)
+
+        return precision, recall, fallout, f1_score, specificity, \
+        confusion_matrix, cases_without_history
+
+    def _test_orders(self, orders, items_count, confusion_matrix):
+        """Generate recommendations for all the order items of given orders at
+        once and test them against the order items.
+
+        Args:
+            orders(list): contains lists of order items, see
+            DataManager.iter_orders.
+            items_count(int): number of train items.
+            confusion_matrix(dict): updated with the results, see test.
+
+        Returns:
+            int: cases without history.
+        """
+        cases_without_history = 0
+        orders_recommendations = self.recommender.recommend_batch(orders, self.k)
+        order_items = [order for order_items in orders for order in order_items]
+
+        for order, recommendations in zip(order_items, orders_recommendations):
             if recommendations:
                 if order['item'] in recommendations:
                     confusion_matrix['tp'] += 1
@@ -78,14 +109,7 @@ class Tester(object):
             else:
                 cases_without_history += 1
 
-            # end of current iteration
-            poi.append({'item': order['item'], 'cats': order['cats']})
-
-        precision, recall, fallout, f1_score, specificity = \
-        self.get_evaluation_measures(confusion_matrix)
-
-        return precision, recall, fallout, f1_score, specificity, \
-        confusion_matrix, cases_without_history
+        return cases_without_history
 
     @staticmethod
     def get_evaluation_measures(confusion_matrix):
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+class TimeCube(object):
+    """Materialized counts of orders and order items of each item for every
+    (part_of_day, day_in_week, month) cell, including rollups where any subset
+    of the dimensions is "any" (None). Time constrained popularity is then a
+    lookup of one cell.
+
+    Item counts are held in a sparse matrix with a row for each cell, rows of
+    cells are ordered by part_of_day, day_in_week and month codes, "any" is
+    the last code of each dimension.
+
+    Args:
+        dimensions_values(list): sorted distinct values of part_of_day,
+        day_in_week and month.
+        item_ids(numpy.ndarray): item ID of each item code.
+        order_codes(numpy.ndarray): value codes of the three dimensions(columns)
+        of each order or group of orders(rows).
+        entry_codes(numpy.ndarray): value codes of the dimensions of each
+        order item or group of order items.
+        entry_items(numpy.ndarray): item code of each order item.
+        order_weights(numpy.ndarray, optional): number of orders in each row of
+        order_codes, 1 if not given.
+        entry_weights(numpy.ndarray, optional): number of order items in each
+        row of entry_codes, 1 if not given.
+    """
+
+    DIMENSIONS = ['part_of_day', 'day_in_week', 'month']
+
+    def __init__(self, dimensions_values, item_ids, order_codes, entry_codes, entry_items, \
+        order_weights=None, entry_weights=None):
+        self._set_dimensions(dimensions_values, item_ids)
+        cells_count = int(np.prod(self.shape))
+
+        if order_weights is None:
+            order_weights = np.ones(len(order_codes), dtype=np.int64)
+        if entry_weights is None:
+            entry_weights = np.ones(len(entry_items), dtype=np.int64)
+
+        self.orders_counts = np.bincount(
+            self._get_rollup_cells(order_codes).ravel(),
+            np.tile(order_weights, 8), minlength=cells_count).astype(np.int64)
+
+        entry_cells = self._get_rollup_cells(entry_codes)
+        self.item_counts = csr_matrix(
+            (np.tile(entry_weights, 8), (entry_cells.ravel(), np.tile(entry_items, 8))),
+            shape=(cells_count, len(item_ids)), dtype=np.int64)
+        self.item_counts.sum_duplicates()
+
+    def _set_dimensions(self, dimensions_values, item_ids):
+        """Set values of the dimensions and items of the cube.
+
+        Args:
+            see TimeCube.
+        """
+        self.dimensions_values = [list(values) for values in dimensions_values]
+        self.item_ids = item_ids
+        self.shape = [len(values) + 1 for values in self.dimensions_values]
+        self._value_codes = [
+            dict((value, code) for code, value in enumerate(values))
+            for values in self.dimensions_values]
+        self._cell_items = {}
+
+    @classmethod
+    def from_arrays(cls, dimensions_values, item_ids, orders_counts, item_counts):
+        """Create TimeCube from already computed counts, e.g. memory-mapped
+        arrays of a saved model.
+
+        Args:
+            dimensions_values(list): see TimeCube.
+            item_ids(numpy.ndarray): see TimeCube.
+            orders_counts(numpy.ndarray): number of orders of each cell.
+            item_counts(scipy.sparse.csr_matrix): counts of items of each cell.
+
+        Returns:
+            TimeCube
+        """
+        time_cube = cls.__new__(cls)
+        time_cube._set_dimensions(dimensions_values, item_ids)
+        time_cube.orders_counts = orders_counts
+        time_cube.item_counts = item_counts
+        return time_cube
+
+    @classmethod
+    def from_counts(cls, orders_counts, items_counts):
+        """Create TimeCube from counts of orders and order items aggregated by
+        the time attributes.
+
+        Args:
+            orders_counts(list): contains dicts with 'part_of_day',
+            'day_in_week', 'month' and 'orders_count' keys.
+            items_counts(list): contains dicts with 'part_of_day',
+            'day_in_week', 'month', 'item' and 'items_count' keys.
+
+        Returns:
+            TimeCube
+        """
+        dimensions_values = [
+            sorted(set(row[name] for row in orders_counts)) for name in cls.DIMENSIONS]
+        value_codes = [
+            dict((value, code) for code, value in enumerate(values))
+            for values in dimensions_values]
+
+        def encode(rows):
+            return np.array([
+                [value_codes[i][row[name]] for i, name in enumerate(cls.DIMENSIONS)]
+                for row in rows], dtype=np.int64).reshape(len(rows), 3)
+
+        items_counts = [row for row in items_counts if row['part_of_day'] in value_codes[0] \
+            and row['day_in_week'] in value_codes[1] and row['month'] in value_codes[2]]
+        item_ids, entry_items = np.unique(
+            np.array([row['item'] for row in items_counts], dtype=np.int64),
+            return_inverse=True)
+
+        return cls(
+            dimensions_values, item_ids, encode(orders_counts), encode(items_counts),
+            entry_items,
+            np.array([row['orders_count'] for row in orders_counts], dtype=np.int64),
+            np.array([row['items_count'] for row in items_counts], dtype=np.int64))
+
+    def _get_rollup_cells(self, codes):
+        """Return cell of each codes row for all the 8 combinations of "any"
+        dimensions.
+
+        Args:
+            codes(numpy.ndarray): value codes of the dimensions of each row.
+
+        Returns:
+            numpy.ndarray: of shape (8, number of rows).
+        """
+        cells = np.empty((8, len(codes)), dtype=np.int64)
+        for rollup in range(8):
+            rollup_cells = np.zeros(len(codes), dtype=np.int64)
+            for i, size in enumerate(self.shape):
+                dimension_codes = codes[:, i] if not rollup & (4 >> i) else size - 1
+                rollup_cells = rollup_cells * size + dimension_codes
+            cells[rollup] = rollup_cells
+        return cells
+
+    def get_cell(self, part_of_day=None, day_in_week=None, month=None):
+        """Return row of the cell for given time attributes values, None is
+        "any" value.
+
+        Args:
+            part_of_day(string, optional)
+            day_in_week(string, optional)
+            month(int, optional)
+
+        Returns:
+            int or None if any of the values is unknown.
+        """
+        cell = 0
+        for value_codes, size, value in zip(
+                self._value_codes, self.shape, [part_of_day, day_in_week, month]):
+            if value is None:
+                code = size - 1
+            else:
+                code = value_codes.get(value)
+                if code is None:
+                    return None
+            cell = cell * size + code
+        return cell
+
+    def get_orders_count(self, part_of_day=None, day_in_week=None, month=None):
+        """Return number of orders created in given time attributes values.
+
+        Args:
+            part_of_day(string, optional)
+            day_in_week(string, optional)
+            month(int, optional)
+
+        Returns:
+            int
+        """
+        cell = self.get_cell(part_of_day, day_in_week, month)
+        return int(self.orders_counts[cell]) if cell is not None else 0
+
+    def get_item_counts(self, part_of_day=None, day_in_week=None, month=None):
+        """Return items found in orders created in given time attributes values
+        with their order items counts, sorted by the count.
+
+        Args:
+            part_of_day(string, optional)
+            day_in_week(string, optional)
+            month(int, optional)
+
+        Returns:
+            numpy.ndarray: item codes.
+            numpy.ndarray: count of each item.
+        """
+        cell = self.get_cell(part_of_day, day_in_week, month)
+        if cell is None:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+
+        if cell not in self._cell_items:
+            start, end = self.item_counts.indptr[cell:cell + 2]
+            codes = self.item_counts.indices[start:end]
+            counts = self.item_counts.data[start:end]
+            order = np.lexsort((codes, -counts))
+            self._cell_items[cell] = (codes[order], counts[order])
+        return self._cell_items[cell]
+
+    def get_items(self, part_of_day=None, day_in_week=None, month=None):
+        """Return IDs of items found in orders created in given time attributes
+        values, the most frequent first.
+
+        Args:
+            part_of_day(string, optional)
+            day_in_week(string, optional)
+            month(int, optional)
+
+        Returns:
+            numpy.ndarray
+        """
+        return self.item_ids[self.get_item_counts(part_of_day, day_in_week, month)[0]]
+
+    def get_items_by_time(self, part_of_day=None, day_in_week=None, month=None):
+        """Return items with their support among orders created in given time
+        attributes values.
+
+        Args:
+            part_of_day(string, optional)
+            day_in_week(string, optional)
+            month(int, optional)
+
+        Returns:
+            list: contains dicts with the following structure, sorted by support:
+                {
+                    'item': int
+                    'support': float
+                }
+        """
+        orders_count = float(self.get_orders_count(part_of_day, day_in_week, month))
+        if orders_count == 0:
+            return []
+
+        codes, counts = self.get_item_counts(part_of_day, day_in_week, month)
+        return [
+            {'item': int(item), 'support': count / orders_count}
+            for item, count in zip(self.item_ids[codes].tolist(), counts.tolist())]
+
+    def get_all_items_by_time(self, use_part_of_day, use_day_in_week, use_month):
+        """Return items of each cell of enabled time attributes, others are
+        rolled up.
+
+        Args:
+            use_part_of_day(bool)
+            use_day_in_week(bool)
+            use_month(bool)
+
+        Returns:
+            list: see DataManager.get_all_items_by_time, items are grouped by
+            the item.
+        """
+        used = [use_part_of_day, use_day_in_week, use_month]
+        time_slices = []
+        for codes in np.ndindex(*self.shape):
+            is_rollup = [code == size - 1 for code, size in zip(codes, self.shape)]
+            if any(is_used == is_any for is_used, is_any in zip(used, is_rollup)):
+                continue
+
+            time_slice = dict(
+                (name, values[code]) for name, values, code, is_used in zip(
+                    self.DIMENSIONS, self.dimensions_values, codes, used) if is_used)
+            item_codes, counts = self.get_item_counts(**time_slice)
+            if not len(counts):
+                continue
+
+            time_slice['items'] = np.repeat(self.item_ids[item_codes], counts).tolist()
+            time_slice['items_count'] = len(time_slice['items'])
+            time_slices.append(time_slice)
+
+        return sorted(time_slices, key=lambda time_slice: time_slice['items_count'], \
+            reverse=True)
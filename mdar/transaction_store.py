@@ -0,0 +1,1036 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+from itertools import chain
+from operator import itemgetter
+import numpy as np
+
+from mdar.mining.cooccurrence import CooccurrenceMatrix
+from mdar.mining.eclat import BitsetIndex
+from mdar.mining.parallel import eclat_parallel
+from mdar.time_cube import TimeCube
+
+
+class TransactionStore(object):
+    """In-memory columnar copy of all the orders (transactions) in the system
+    used for answering DataManager queries without the graph database round
+    trips. Orders are sorted by their TIME_FRAME timestamp, so every data
+    partition (k-fold part) is just one or two contiguous slices of arrays.
+
+    Order items are held in CSR form: items of the order with index i are
+    indices[indptr[i]:indptr[i + 1]], where indices contains item codes
+    (positions in item_ids array).
+
+    If use_bitsets is True, supports and connected items are counted on the
+    BitsetIndex (vertical bit arrays of orders) instead. Then the support
+    counts orders, so an item repeated in one order is counted once.
+
+    If use_cooccurrence is True, connected items without month constraint are
+    taken from a CooccurrenceMatrix built once for each timestamp ranges and
+    part_of_day/day_in_week slice.
+
+    Args:
+        time_frames(list): contains dicts with the following structure:
+            {
+                'order': int
+                'timestamp': string
+                'part_of_day': string
+                'day_in_week': string
+                'month': int
+            }
+        order_users(list): contains dicts with the following structure:
+            {
+                'order': int
+                'user': int
+            }
+        order_items(list): contains dicts with the following structure:
+            {
+                'order': int
+                'items': list of IDs(int)
+            }
+        product_cats(list, optional): contains dicts with the following structure:
+            {
+                'item': int
+                'cats': list of category IDs(int)
+            }
+        products(list, optional): contains dicts with the following structure:
+            {
+                'item': int
+                'timestamp': string
+            }
+    """
+    use_bitsets = False
+    use_cooccurrence = False
+
+    def __init__(self, time_frames, order_users, order_items, product_cats=None, \
+        products=None):
+        self._order_masks = {}
+        self._order_bits = {}
+        self._item_counts = {}
+        self._cooccurrence_matrices = {}
+        self._time_cubes = {}
+        self.item_orders = None
+        self.item_indptr = None
+        self.bitset_index = None
+
+        self._set_orders(time_frames)
+        self._set_order_users(order_users)
+        self._set_order_items(order_items)
+        self._set_products(product_cats, products)
+
+    def _set_orders(self, time_frames):
+        """Define timestamp sorted order IDs, timestamps and time attributes
+        codes.
+
+        Args:
+            time_frames(list)
+        """
+        time_frames = sorted(time_frames, key=itemgetter('timestamp', 'order'))
+
+        self.order_ids = np.array([tf['order'] for tf in time_frames], dtype=np.int64)
+        self.timestamps = np.array([tf['timestamp'] for tf in time_frames])
+        self._order_index = dict(
+            (order_id, i) for i, order_id in enumerate(self.order_ids.tolist()))
+
+        self.part_of_day_values, self.part_of_day_codes = self._encode(
+            [tf['part_of_day'] for tf in time_frames])
+        self.day_in_week_values, self.day_in_week_codes = self._encode(
+            [tf['day_in_week'] for tf in time_frames])
+        self.month_values, self.month_codes = self._encode(
+            [tf['month'] for tf in time_frames])
+
+    def _set_order_users(self, order_users):
+        """Define user ID for each order, -1 if order has no user.
+
+        Args:
+            order_users(list)
+        """
+        self.order_users = np.full(len(self.order_ids), -1, dtype=np.int64)
+        for order_user in order_users:
+            i = self._order_index.get(order_user['order'])
+            if i is not None:
+                self.order_users[i] = order_user['user']
+
+        has_user = self.order_users >= 0
+        self.user_ids, user_codes = np.unique(
+            self.order_users[has_user], return_inverse=True)
+        self.order_user_codes = np.full(len(self.order_ids), -1, dtype=np.int64)
+        self.order_user_codes[has_user] = user_codes
+
+    def _set_order_items(self, order_items):
+        """Define CSR structure of order items and per entry(order item) arrays.
+
+        Args:
+            order_items(list)
+        """
+        items = [[] for _ in range(0, len(self.order_ids))]
+        for order_item in order_items:
+            i = self._order_index.get(order_item['order'])
+            if i is not None:
+                items[i] += order_item['items']
+
+        lengths = np.array([len(order) for order in items], dtype=np.int64)
+        self.indptr = np.zeros(len(items) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.indptr[1:])
+
+        flat_items = np.fromiter(
+            chain.from_iterable(items), dtype=np.int64, count=int(self.indptr[-1]))
+        self.item_ids, item_codes = np.unique(flat_items, return_inverse=True)
+        self.indices = item_codes.astype(np.int32)
+        self._item_index = dict(
+            (item_id, i) for i, item_id in enumerate(self.item_ids.tolist()))
+
+        self.entry_orders = np.repeat(np.arange(len(items)), lengths)
+        self.entry_users = self.order_users[self.entry_orders]
+        self.entry_user_codes = self.order_user_codes[self.entry_orders]
+
+    def _set_products(self, product_cats, products):
+        """Define categories of products and sorted timestamps of products.
+
+        Args:
+            product_cats(list): None if categories are unknown.
+            products(list): None if products' time frames are unknown.
+        """
+        self.product_cats = None
+        if product_cats is not None:
+            self.product_cats = dict(
+                (product_cat['item'], product_cat['cats']) for product_cat in product_cats)
+
+        self.product_timestamps = None
+        if products is not None:
+            self.product_timestamps = np.array(
+                sorted(product['timestamp'] for product in products))
+
+    def _set_item_orders(self):
+        """Define CSC structure of item orders: orders of the item with code i
+        are item_orders[item_indptr[i]:item_indptr[i + 1]]."""
+        self.item_orders = self.entry_orders[np.argsort(self.indices, kind='mergesort')]
+        self.item_indptr = np.zeros(self.items_count + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(self.indices, minlength=self.items_count), out=self.item_indptr[1:])
+
+    @property
+    def orders_count(self):
+        """int: number of all the orders in the store."""
+        return len(self.order_ids)
+
+    @property
+    def items_count(self):
+        """int: number of distinct items found in the orders."""
+        return len(self.item_ids)
+
+    def get_item_codes(self, items):
+        """Return item codes for given item IDs, unknown items are skipped.
+
+        Args:
+            items(list): contains item IDs(int)
+
+        Returns:
+            numpy.ndarray
+        """
+        codes = [self._item_index[item] for item in set(items) if item in self._item_index]
+        return np.array(codes, dtype=np.int32)
+
+    def get_item_orders(self, item_code):
+        """Return indices of orders which contain the item with given code.
+
+        Args:
+            item_code(int)
+
+        Returns:
+            numpy.ndarray
+        """
+        if self.item_orders is None:
+            self._set_item_orders()
+        return self.item_orders[self.item_indptr[item_code]:self.item_indptr[item_code + 1]]
+
+    def get_orders_entries(self, orders):
+        """Return positions of order items(entries) of given orders.
+
+        Args:
+            orders(numpy.ndarray): order indices.
+
+        Returns:
+            numpy.ndarray
+        """
+        starts = self.indptr[orders]
+        lengths = self.indptr[orders + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return offsets + np.arange(lengths.sum())
+
+    def get_order_mask(self, tf_ranges=None):
+        """Return boolean mask of orders which belong to given timestamp ranges.
+
+        Args:
+            tf_ranges(list, optional): contains tuples of bottom(exclusive)
+            and top(inclusive) timestamps, see QueryManager.get_tf_ranges.
+            None for all the orders.
+
+        Returns:
+            numpy.ndarray
+        """
+        key = tuple(tf_ranges) if tf_ranges is not None else None
+        if key not in self._order_masks:
+            if key is None:
+                mask = np.ones(self.orders_count, dtype=bool)
+            else:
+                mask = np.zeros(self.orders_count, dtype=bool)
+                for bottom, top in tf_ranges:
+                    start = 0
+                    end = self.orders_count
+                    if bottom is not None:
+                        start = np.searchsorted(self.timestamps, bottom, 'right')
+                    if top is not None:
+                        end = np.searchsorted(self.timestamps, top, 'right')
+                    mask[start:end] = True
+            self._order_masks[key] = mask
+
+        return self._order_masks[key]
+
+    def get_bitset_index(self):
+        """Return BitsetIndex of the orders, build it on first use.
+
+        Returns:
+            BitsetIndex
+        """
+        if self.bitset_index is None:
+            self.bitset_index = BitsetIndex(
+                self.orders_count, self.entry_orders, self.indices, self.items_count, {
+                    'part_of_day': (self.part_of_day_values, self.part_of_day_codes),
+                    'day_in_week': (self.day_in_week_values, self.day_in_week_codes),
+                    'month': (self.month_values, self.month_codes)
+                })
+        return self.bitset_index
+
+    def get_order_bits(self, tf_ranges=None, part_of_day=None, day_in_week=None, \
+        month=None):
+        """Return packed bit array of orders which belong to given timestamp
+        ranges and were created in given time attributes values.
+
+        Args:
+            tf_ranges(list, optional): see get_order_mask.
+            part_of_day(string, optional)
+            day_in_week(string, optional)
+            month(int, optional)
+
+        Returns:
+            numpy.ndarray
+        """
+        index = self.get_bitset_index()
+        key = tuple(tf_ranges) if tf_ranges is not None else None
+        if key not in self._order_bits:
+            self._order_bits[key] = index.pack(self.get_order_mask(tf_ranges))
+
+        time_bits = index.get_time_bits(part_of_day, day_in_week, month)
+        if time_bits is None:
+            return self._order_bits[key]
+        return self._order_bits[key] & time_bits
+
+    def get_cooccurrence_matrix(self, tf_ranges=None, part_of_day=None, \
+        day_in_week=None):
+        """Return CooccurrenceMatrix of orders which belong to given timestamp
+        ranges and were created in given time attributes values, build it on
+        first use.
+
+        Args:
+            tf_ranges(list, optional): see get_order_mask.
+            part_of_day(string, optional)
+            day_in_week(string, optional)
+
+        Returns:
+            CooccurrenceMatrix
+        """
+        key = (tuple(tf_ranges) if tf_ranges is not None else None, part_of_day, day_in_week)
+        if key not in self._cooccurrence_matrices:
+            self._cooccurrence_matrices[key] = CooccurrenceMatrix(
+                self.indptr, self.indices, self.items_count,
+                self.get_order_mask(tf_ranges) & self.get_time_mask(part_of_day, day_in_week))
+        return self._cooccurrence_matrices[key]
+
+    def get_time_cube(self, tf_ranges=None):
+        """Return TimeCube of orders which belong to given timestamp ranges,
+        build it on first use.
+
+        Args:
+            tf_ranges(list, optional): see get_order_mask.
+
+        Returns:
+            TimeCube
+        """
+        key = tuple(tf_ranges) if tf_ranges is not None else None
+        if key not in self._time_cubes:
+            order_mask = self.get_order_mask(tf_ranges)
+            order_codes = np.column_stack(
+                [self.part_of_day_codes, self.day_in_week_codes, self.month_codes])
+            entry_mask = order_mask[self.entry_orders]
+            self._time_cubes[key] = TimeCube(
+                [self.part_of_day_values, self.day_in_week_values, self.month_values],
+                self.item_ids, order_codes[order_mask],
+                order_codes[self.entry_orders[entry_mask]], self.indices[entry_mask])
+        return self._time_cubes[key]
+
+    def get_time_mask(self, part_of_day=None, day_in_week=None, month=None):
+        """Return boolean mask of orders created in given time attributes.
+
+        Args:
+            part_of_day(string, optional)
+            day_in_week(string, optional)
+            month(int, optional)
+
+        Returns:
+            numpy.ndarray
+        """
+        mask = np.ones(self.orders_count, dtype=bool)
+        constraints = [
+            (part_of_day, self.part_of_day_values, self.part_of_day_codes),
+            (day_in_week, self.day_in_week_values, self.day_in_week_codes),
+            (month, self.month_values, self.month_codes),
+        ]
+        for value, values, codes in constraints:
+            if value is None:
+                continue
+            if value not in values:
+                return np.zeros(self.orders_count, dtype=bool)
+            mask &= codes == values.index(value)
+
+        return mask
+
+    def get_item_counts(self, tf_ranges=None, order_mask=None):
+        """Return number of order items for each item code.
+
+        Args:
+            tf_ranges(list, optional): see get_order_mask.
+            order_mask(numpy.ndarray, optional): if given, used instead of
+            tf_ranges and the result is not cached.
+
+        Returns:
+            numpy.ndarray
+        """
+        if order_mask is not None:
+            return np.bincount(
+                self.indices[order_mask[self.entry_orders]], minlength=self.items_count)
+
+        key = tuple(tf_ranges) if tf_ranges is not None else None
+        if key not in self._item_counts:
+            self._item_counts[key] = self.get_item_counts(
+                order_mask=self.get_order_mask(tf_ranges))
+        return self._item_counts[key]
+
+    def get_orders_count(self, tf_ranges=None):
+        """Return the number of orders in given timestamp ranges.
+
+        Args:
+            tf_ranges(list, optional): see get_order_mask.
+
+        Returns:
+            float
+        """
+        return float(np.count_nonzero(self.get_order_mask(tf_ranges)))
+
+    def get_nonempty_orders_count(self):
+        """Return the number of orders which contain at least one item.
+
+        Returns:
+            int
+        """
+        return int(np.count_nonzero(np.diff(self.indptr)))
+
+    def get_timestamps_range(self):
+        """Return timestamps of the first and the last order which contain at
+        least one item.
+
+        Returns:
+            string: first timestamp, None if there are no such orders.
+            string: last timestamp.
+        """
+        timestamps = self.timestamps[np.diff(self.indptr) > 0]
+        if not len(timestamps):
+            return None, None
+        # orders are sorted by timestamp
+        return tuple(timestamps[[0, -1]].tolist())
+
+    def get_k_fold_tfs(self, k_fold_size):
+        """Return time frames which should act as boundary between k data
+        partitions of orders which contain at least one item, taken from the
+        sorted timestamps.
+
+        Args:
+            k_fold_size(int): number of data partitions.
+
+        Returns:
+            list: contains dicts with 'timestamp' key. Length of k_fold_size - 1.
+        """
+        timestamps = self.timestamps[np.diff(self.indptr) > 0]
+        part_size = len(timestamps) / k_fold_size
+        if part_size == 0:
+            return []
+
+        return [
+            {'timestamp': timestamp}
+            for timestamp in timestamps[part_size - 1:(k_fold_size - 1) * part_size:part_size].tolist()]
+
+    def get_support(self, item, orders_count, tf_ranges=None):
+        """Return a support for an item or set of items.
+
+        Args:
+            item(list): if only one item, it can be an int.
+            orders_count(int): total number of orders.
+            tf_ranges(list, optional): see get_order_mask.
+
+        Returns:
+            float
+        """
+        if not isinstance(item, list):
+            item = [item]
+        if self.use_bitsets:
+            item_counts = self.get_bitset_index().get_items_counts(
+                self.get_order_bits(tf_ranges), self.get_item_codes(item))
+            return item_counts.sum() / float(orders_count)
+
+        item_counts = self.get_item_counts(tf_ranges)
+        return item_counts[self.get_item_codes(item)].sum() / float(orders_count)
+
+    def get_supports(self, itemsets, orders_count, tf_ranges=None):
+        """Return supports of all the given items or sets of items at once.
+
+        Args:
+            itemsets(list): contains item IDs(int) or lists of item IDs.
+            orders_count(int): total number of orders.
+            tf_ranges(list, optional): see get_order_mask.
+
+        Returns:
+            list: contains supports(float) in the same order as itemsets.
+        """
+        orders_count = float(orders_count)
+        if self.use_bitsets:
+            index = self.get_bitset_index()
+            order_bits = self.get_order_bits(tf_ranges)
+            return [
+                index.get_items_counts(order_bits, self.get_item_codes(
+                    itemset if isinstance(itemset, list) else [itemset])).sum() / orders_count
+                for itemset in itemsets]
+
+        item_counts = self.get_item_counts(tf_ranges)
+        return [
+            item_counts[self.get_item_codes(
+                itemset if isinstance(itemset, list) else [itemset])].sum() / orders_count
+            for itemset in itemsets]
+
+    def get_popular_items(self, orders_count, tf_ranges=None):
+        """Return all the items found in given timestamp ranges sorted by
+        their support.
+
+        Args:
+            orders_count(int): total number of orders.
+            tf_ranges(list, optional): see get_order_mask.
+
+        Returns:
+            list: contains dicts with the following structure:
+                {
+                    'item': int
+                    'support': float
+                }
+        """
+        return self._get_items_by_count(self.get_item_counts(tf_ranges), orders_count)
+
+    def get_items_by_time(self, part_of_day=None, day_in_week=None, month=None, \
+        tf_ranges=None):
+        """Return items with their support for given time args.
+
+        Args:
+            part_of_day(string, optional)
+            day_in_week(string, optional)
+            month(int, optional)
+            tf_ranges(list, optional): see get_order_mask.
+
+        Returns:
+            list: contains dicts with the following structure:
+                {
+                    'item': int
+                    'support': float
+                }
+        """
+        return self.get_time_cube(tf_ranges).get_items_by_time(
+            part_of_day, day_in_week, month)
+
+    def get_orders(self, tf_ranges=None):
+        """Return all the order items of orders in given timestamp ranges,
+        sorted by timestamp and grouped by order.
+
+        Args:
+            tf_ranges(list, optional): see get_order_mask.
+
+        Returns:
+            list: contains dicts, see iter_orders.
+        """
+        return [
+            order_item for order_items in self.iter_orders(tf_ranges)
+            for order_item in order_items]
+
+    def iter_orders(self, tf_ranges=None):
+        """Generate orders in given timestamp ranges one by one, sorted by
+        timestamp, without creating all the order items at once.
+
+        Args:
+            tf_ranges(list, optional): see get_order_mask.
+
+        Yields:
+            list: order items of one order, contains dicts with the following
+            structure:
+                {
+                    'user': int
+                    'order': int
+                    'item': int,
+                    'cats': list of category IDs(int)
+                    'timestamp': string
+                    'day_in_week': string
+                    'part_of_day': string
+                    'month': int
+                }
+        """
+        order_mask = self.get_order_mask(tf_ranges) & (self.order_users >= 0)
+
+        for i in np.flatnonzero(order_mask):
+            order_items = []
+            items = []
+            for code in self.indices[self.indptr[i]:self.indptr[i + 1]]:
+                item = int(self.item_ids[code])
+                if item in items:
+                    continue
+                items.append(item)
+
+                cats = []
+                if self.product_cats is not None:
+                    if item not in self.product_cats:
+                        continue
+                    cats = self.product_cats[item]
+
+                order_items.append({
+                    'user': int(self.order_users[i]),
+                    'order': int(self.order_ids[i]),
+                    'item': item,
+                    'cats': cats,
+                    'timestamp': self.timestamps[i],
+                    'day_in_week': self.day_in_week_values[self.day_in_week_codes[i]],
+                    'part_of_day': self.part_of_day_values[self.part_of_day_codes[i]],
+                    'month': self.month_values[self.month_codes[i]]
+                })
+
+            if order_items:
+                yield order_items
+
+    def get_max_order_items_count(self, tf_ranges=None):
+        """Return maximum number of items found in one order.
+
+        Args:
+            tf_ranges(list, optional): see get_order_mask.
+
+        Returns:
+            int
+        """
+        order_items_counts = np.diff(self.indptr)[self.get_order_mask(tf_ranges)]
+        return int(order_items_counts.max()) if len(order_items_counts) else 0
+
+    def get_items_count(self, tf_ranges=None):
+        """Return the number of products created in given timestamp ranges.
+
+        Args:
+            tf_ranges(list, optional): see get_order_mask.
+
+        Returns:
+            int
+        """
+        if self.product_timestamps is None:
+            return self.items_count
+        if tf_ranges is None:
+            return len(self.product_timestamps)
+
+        items_count = 0
+        for bottom, top in tf_ranges:
+            start = 0
+            end = len(self.product_timestamps)
+            if bottom is not None:
+                start = np.searchsorted(self.product_timestamps, bottom, 'right')
+            if top is not None:
+                end = np.searchsorted(self.product_timestamps, top, 'right')
+            items_count += max(end - start, 0)
+        return int(items_count)
+
+    def get_all_items_by_time(self, use_part_of_day, use_day_in_week, use_month, \
+        tf_ranges=None):
+        """Return item IDs segmented by the time attributes which are defined by
+        given args.
+
+        Args:
+            use_part_of_day(bool)
+            use_day_in_week(bool)
+            use_month(bool)
+            tf_ranges(list, optional): see get_order_mask.
+
+        Returns:
+            list: contains dicts with following structure, sorted by items_count
+                {
+                    'part_of_day': string
+                    'day_in_week': string
+                    'month': int
+                    'items': list of IDs(int)
+                    'items_count': int
+                }
+        """
+        return self.get_time_cube(tf_ranges).get_all_items_by_time(
+            use_part_of_day, use_day_in_week, use_month)
+
+    def get_connected_items(self, items_x, orders_count, tf_ranges=None, \
+        part_of_day=None, day_in_week=None, month=None, merge_items_x=False):
+        """Return items found in the same orders as given items with the
+        support of each (item_x, item) pair.
+
+        Args:
+            items_x(list): contains item IDs(int)
+            orders_count(int): total number of orders.
+            tf_ranges(list, optional): see get_order_mask.
+            part_of_day(string, optional)
+            day_in_week(string, optional)
+            month(int, optional)
+            merge_items_x(bool, optional): if True, pairs are summed up for all
+            the items_x and 'item_x' holds the whole items_x list. Defaults
+            to False.
+
+        Returns:
+            list: contains dicts with following structure, sorted by support
+                {
+                    'item_x': int or list of IDs(int)
+                    'item': int
+                    'support': float
+                }
+        """
+        use_cooccurrence = self.use_cooccurrence and not self.use_bitsets and month is None
+        if use_cooccurrence:
+            matrix = self.get_cooccurrence_matrix(tf_ranges, part_of_day, day_in_week)
+        elif self.use_bitsets:
+            index = self.get_bitset_index()
+            order_bits = self.get_order_bits(tf_ranges, part_of_day, day_in_week, month)
+        else:
+            order_mask = self.get_order_mask(tf_ranges) \
+                & self.get_time_mask(part_of_day, day_in_week, month)
+        x_codes = self.get_item_codes(items_x)
+
+        if use_cooccurrence and merge_items_x and len(x_codes):
+            pairs_x = [list(items_x)]
+            pairs_counts = [matrix.get_connected_counts(x_codes)]
+            x_codes = []
+        else:
+            pairs_x = []
+            pairs_counts = []
+
+        for x_code in x_codes:
+            if use_cooccurrence:
+                counts = matrix.get_connected_counts([x_code])
+            elif self.use_bitsets:
+                counts = index.get_items_counts(index.item_bits[x_code] & order_bits)
+            else:
+                orders = self.get_item_orders(x_code)
+                orders = orders[order_mask[orders]]
+                counts = np.bincount(
+                    self.indices[self.get_orders_entries(orders)], minlength=self.items_count)
+            counts[x_codes] = 0
+            pairs_x.append(int(self.item_ids[x_code]))
+            pairs_counts.append(counts)
+
+        if not pairs_counts:
+            return []
+        if merge_items_x:
+            pairs_x = [list(items_x)]
+            pairs_counts = [np.sum(pairs_counts, axis=0)]
+
+        pairs_counts = np.array(pairs_counts)
+        x_indices, codes = np.nonzero(pairs_counts)
+        counts = pairs_counts[x_indices, codes]
+        order = np.argsort(-counts, kind='mergesort')
+
+        orders_count = float(orders_count)
+        return [{
+            'item_x': pairs_x[x_indices[i]],
+            'item': int(self.item_ids[codes[i]]),
+            'support': counts[i] / orders_count
+        } for i in order]
+
+    def get_pair_measures(self, item_x, item_y, orders_count, tf_ranges=None, \
+        part_of_day=None, day_in_week=None):
+        """Return support, confidence and lift of the rule item_x -> item_y
+        looked up in the CooccurrenceMatrix.
+
+        Args:
+            item_x(int)
+            item_y(int)
+            orders_count(int): total number of orders.
+            tf_ranges(list, optional): see get_order_mask.
+            part_of_day(string, optional)
+            day_in_week(string, optional)
+
+        Returns:
+            dict: see CooccurrenceMatrix.get_pair_measures, all measures are 0
+            for unknown items.
+        """
+        if item_x not in self._item_index or item_y not in self._item_index:
+            return {'support': 0.0, 'confidence': 0.0, 'lift': 0.0}
+
+        matrix = self.get_cooccurrence_matrix(tf_ranges, part_of_day, day_in_week)
+        return matrix.get_pair_measures(
+            self._item_index[item_x], self._item_index[item_y], orders_count)
+
+    def get_frequent_itemsets(self, min_count, max_length=None, use_part_of_day=False, \
+        use_day_in_week=False, use_month=False, tf_ranges=None, processes=1):
+        """Find frequent itemsets with Eclat on the BitsetIndex, separately for
+        each combination of enabled time attributes values.
+
+        Args:
+            min_count(float): minimum number of orders for a frequent itemset.
+            max_length(int, optional): maximum number of items in an itemset.
+            use_part_of_day(bool, optional): defaults to False.
+            use_day_in_week(bool, optional): defaults to False.
+            use_month(bool, optional): defaults to False.
+            tf_ranges(list, optional): see get_order_mask.
+            processes(int, optional): number of mining processes, see
+            parallel_map. Defaults to 1.
+
+        Returns:
+            list: contains tuples with time attributes(0, dict, see
+            decode_time_key) and dict of itemsets counts(1), see eclat, with
+            item IDs instead of item codes.
+        """
+        index = self.get_bitset_index()
+        order_mask = self.get_order_mask(tf_ranges)
+        time_keys = self.get_time_keys(use_part_of_day, use_day_in_week, use_month)
+
+        time_attributes_groups = [
+            self.decode_time_key(key, use_part_of_day, use_day_in_week, use_month)
+            for key in np.unique(time_keys[order_mask]).tolist()]
+        itemsets_counts_groups = eclat_parallel(
+            index, [self.get_order_bits(tf_ranges, **time_attributes)
+                    for time_attributes in time_attributes_groups],
+            min_count, max_length, processes)
+
+        return [
+            (time_attributes, dict(
+                (tuple(self.item_ids[list(itemset)].tolist()), count)
+                for itemset, count in itemsets_counts.iteritems()))
+            for time_attributes, itemsets_counts in zip(
+                time_attributes_groups, itemsets_counts_groups)]
+
+    def get_transactions(self, use_part_of_day=False, use_day_in_week=False, \
+        use_month=False, tf_ranges=None):
+        """Return unique items of each order in given timestamp ranges, grouped
+        by values of enabled time attributes.
+
+        Args:
+            use_part_of_day(bool, optional): defaults to False.
+            use_day_in_week(bool, optional): defaults to False.
+            use_month(bool, optional): defaults to False.
+            tf_ranges(list, optional): see get_order_mask.
+
+        Returns:
+            list: contains tuples with time attributes(0, dict, see
+            decode_time_key) and list of transactions(1), each is a list of
+            item IDs(int).
+        """
+        time_keys = self.get_time_keys(use_part_of_day, use_day_in_week, use_month)
+        transactions = defaultdict(list)
+        for i in np.flatnonzero(self.get_order_mask(tf_ranges)):
+            codes = np.unique(self.indices[self.indptr[i]:self.indptr[i + 1]])
+            if len(codes):
+                transactions[time_keys[i]].append(self.item_ids[codes].tolist())
+
+        return [
+            (self.decode_time_key(key, use_part_of_day, use_day_in_week, use_month),
+             key_transactions)
+            for key, key_transactions in sorted(transactions.iteritems())]
+
+    def iter_transactions(self, use_part_of_day=False, use_day_in_week=False, \
+        use_month=False, tf_ranges=None):
+        """Generate unique items of each order in given timestamp ranges one by
+        one, in order of order codes.
+
+        Args:
+            use_part_of_day(bool, optional): defaults to False.
+            use_day_in_week(bool, optional): defaults to False.
+            use_month(bool, optional): defaults to False.
+            tf_ranges(list, optional): see get_order_mask.
+
+        Yields:
+            tuple: time attributes(0, dict, see decode_time_key) and item
+            IDs(1, list of int) of one order.
+        """
+        time_keys = self.get_time_keys(use_part_of_day, use_day_in_week, use_month)
+        time_attributes = {}
+        for i in np.flatnonzero(self.get_order_mask(tf_ranges)):
+            codes = np.unique(self.indices[self.indptr[i]:self.indptr[i + 1]])
+            if len(codes):
+                key = int(time_keys[i])
+                if key not in time_attributes:
+                    time_attributes[key] = self.decode_time_key(
+                        key, use_part_of_day, use_day_in_week, use_month)
+                yield time_attributes[key], self.item_ids[codes].tolist()
+
+    def get_time_keys(self, use_part_of_day, use_day_in_week, use_month):
+        """Return integer key of enabled time attributes for each order.
+
+        Args:
+            use_part_of_day(bool)
+            use_day_in_week(bool)
+            use_month(bool)
+
+        Returns:
+            numpy.ndarray
+        """
+        keys = np.zeros(self.orders_count, dtype=np.int64)
+        if use_part_of_day:
+            keys = keys * len(self.part_of_day_values) + self.part_of_day_codes
+        if use_day_in_week:
+            keys = keys * len(self.day_in_week_values) + self.day_in_week_codes
+        if use_month:
+            keys = keys * len(self.month_values) + self.month_codes
+        return keys
+
+    def decode_time_key(self, key, use_part_of_day, use_day_in_week, use_month):
+        """Return time attributes values for given key, see get_time_keys.
+
+        Args:
+            key(int)
+            use_part_of_day(bool)
+            use_day_in_week(bool)
+            use_month(bool)
+
+        Returns:
+            dict: contains only enabled time attributes.
+        """
+        time_attributes = {}
+        if use_month:
+            key, code = divmod(key, len(self.month_values))
+            time_attributes['month'] = self.month_values[code]
+        if use_day_in_week:
+            key, code = divmod(key, len(self.day_in_week_values))
+            time_attributes['day_in_week'] = self.day_in_week_values[code]
+        if use_part_of_day:
+            time_attributes['part_of_day'] = self.part_of_day_values[key]
+        return time_attributes
+
+    def get_user_items(self, user_id=None, tf_ranges=None):
+        """Return items for the user if provided or all the items for each user
+        in given timestamp ranges.
+
+        Args:
+            user_id(int, optional)
+            tf_ranges(list, optional): see get_order_mask.
+
+        Returns:
+            list: if the user ID is provided, it contains dicts with the structure:
+                {
+                    'item': int
+                    'num': int
+                }
+            otherwise:
+                {
+                    'user': int
+                    'items': list of IDs(int)
+                }
+        """
+        entry_mask = self.get_order_mask(tf_ranges)[self.entry_orders]
+
+        if user_id is not None:
+            entry_mask &= self.entry_users == user_id
+            item_counts = np.bincount(self.indices[entry_mask], minlength=self.items_count)
+            order = np.argsort(-item_counts, kind='mergesort')
+            return [
+                {'item': int(self.item_ids[code]), 'num': int(item_counts[code])}
+                for code in order if item_counts[code] > 0]
+
+        entry_mask &= self.entry_user_codes >= 0
+        pairs = np.unique(
+            self.entry_user_codes[entry_mask] * self.items_count + self.indices[entry_mask])
+        user_codes = pairs // self.items_count
+        item_ids = self.item_ids[pairs % self.items_count]
+        bounds = np.flatnonzero(np.diff(user_codes)) + 1
+
+        user_items = []
+        for user_code, items in zip(user_codes[np.r_[0, bounds]] if len(pairs) else [], \
+            np.split(item_ids, bounds)):
+            user_items.append({
+                'user': int(self.user_ids[user_code]),
+                'items': items.tolist()
+            })
+        return user_items
+
+    def get_purchasing_users(self, user_ids, tf_ranges=None):
+        """Return those of given users who purchased any item in given
+        timestamp ranges.
+
+        Args:
+            user_ids(list): contains user IDs(int).
+            tf_ranges(list, optional): see get_order_mask.
+
+        Returns:
+            list: sorted user IDs(int).
+        """
+        entry_mask = self.get_order_mask(tf_ranges)[self.entry_orders]
+        users = np.unique(self.entry_users[entry_mask])
+        return np.intersect1d(users, np.array(list(user_ids), dtype=np.int64)).tolist()
+
+    def get_item_rpr(self, item_id=None, tf_ranges=None):
+        """Return repeated purchase rate (RPR) in given timestamp ranges globally
+        or for certain item if ID is provided.
+
+        Args:
+            item_id(int, optional)
+            tf_ranges(list, optional): see get_order_mask.
+
+        Returns:
+            float
+        """
+        entry_mask = self.get_order_mask(tf_ranges)[self.entry_orders]
+        if item_id is not None:
+            if item_id not in self._item_index:
+                return 0
+            entry_mask &= self.indices == self._item_index[item_id]
+
+        purchases_total = np.count_nonzero(entry_mask)
+        if purchases_total == 0:
+            return 0
+
+        return self._get_repeated_purchases(entry_mask) / float(purchases_total)
+
+    def get_user_rpr(self, user_id=None, tf_ranges=None):
+        """Return repeated purchase rate (RPR) in given timestamp ranges globally
+        or for certain user if ID is provided.
+
+        Args:
+            user_id(int, optional)
+            tf_ranges(list, optional): see get_order_mask.
+
+        Returns:
+            float
+        """
+        entry_mask = self.get_order_mask(tf_ranges)[self.entry_orders]
+        if user_id is not None:
+            entry_mask &= self.entry_users == user_id
+        else:
+            entry_mask &= self.entry_user_codes >= 0
+
+        purchases_total = np.count_nonzero(entry_mask)
+        if purchases_total == 0:
+            return 0
+
+        return self._get_repeated_purchases(entry_mask) / float(purchases_total)
+
+    def _get_repeated_purchases(self, entry_mask):
+        """Return the number of repeated purchases of the same item by the
+        same user among masked order items.
+
+        Args:
+            entry_mask(numpy.ndarray): boolean mask of order items.
+
+        Returns:
+            int
+        """
+        entry_mask = entry_mask & (self.entry_user_codes >= 0)
+        pairs = self.entry_user_codes[entry_mask] * self.items_count \
+            + self.indices[entry_mask]
+        return len(pairs) - len(np.unique(pairs))
+
+    def _get_items_by_count(self, item_counts, orders_count):
+        """Return items with non zero count sorted by their support.
+
+        Args:
+            item_counts(numpy.ndarray): number of order items for each item code.
+            orders_count(int)
+
+        Returns:
+            list: contains dicts with the following structure:
+                {
+                    'item': int
+                    'support': float
+                }
+        """
+        orders_count = float(orders_count)
+        order = np.argsort(-item_counts, kind='mergesort')
+        order = order[item_counts[order] > 0]
+
+        return [
+            {'item': int(self.item_ids[code]), 'support': item_counts[code] / orders_count}
+            for code in order]
+
+    @staticmethod
+    def _encode(values):
+        """Encode given values to integer codes.
+
+        Args:
+            values(list)
+
+        Returns:
+            list: sorted distinct values, code is an index in this list.
+            numpy.ndarray: code for each value.
+        """
+        distinct_values = sorted(set(values))
+        value_index = dict((value, i) for i, value in enumerate(distinct_values))
+        codes = np.array([value_index[value] for value in values], dtype=np.int16)
+        return distinct_values, codes
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+"""Local HTTP server of MDAR recommendations, see mdar/server.py.
+
+Loads the model from MODEL_PATH, or trains it and saves it there if the file
+doesn't exist, measures latency and throughput of the server with requests
+made from the test orders and then serves until interrupted. The model is
+reloaded from its file on SIGHUP or POST /reload.
+
+Constants:
+    CONFIG_PATH: path to config file, see config_sample.json.
+    K_FOLD_SIZE: number of k parts for cross-validation.
+    TESTING_PART_INDEX: data part which isn't used for training.
+    MODEL_PATH: path to the model file, see MDAR.save.
+    USED_APPROACHES: used algorithms and their weights[0-1]
+    ADDRESS: host and port of the server.
+    WORKERS_COUNT: number of threads handling requests.
+    QUEUE_SIZE: maximum number of waiting requests.
+    K: number of recommendations in load test requests.
+    LOAD_TEST_REQUESTS: number of load test requests, 0 to skip the test.
+    LOAD_TEST_CONCURRENCY: number of concurrent load test clients.
+
+Usage:
+    $ python serve_mdar.py
+    $ curl -X POST localhost:8000/recommend \\
+        -d '{"user": 1, "items": [2, 3], "part_of_day": "morning", "k": 5}'
+"""
+
+import os
+import signal
+import threading
+from mdar.recommender import MDAR
+from mdar.data_manager import DataManager
+from mdar.server import RecommendationServer, get_load_test_requests, run_load_test
+
+CONFIG_PATH = 'config.json'
+K_FOLD_SIZE = 3
+TESTING_PART_INDEX = 0
+MODEL_PATH = 'mdar.model'
+
+USED_APPROACHES = [
+    ('order_association', 1),
+    ('user_history', 1),
+    ('user_history2', 1),
+    ('time_related', 1),
+]
+ADDRESS = ('127.0.0.1', 8000)
+WORKERS_COUNT = 4
+QUEUE_SIZE = 64
+
+K = 10
+LOAD_TEST_REQUESTS = 1000
+LOAD_TEST_CONCURRENCY = 8
+
+def get_server():
+    """Train the model if there's no model file and create the server.
+
+    Returns:
+        RecommendationServer
+    """
+    data_manager = DataManager(CONFIG_PATH, K_FOLD_SIZE)
+    data_manager.testing_part_index = TESTING_PART_INDEX
+
+    if not os.path.exists(MODEL_PATH):
+        rec = MDAR(used_approaches=USED_APPROACHES)
+        rec.data_manager = data_manager
+        rec.train(K)
+        rec.save(MODEL_PATH)
+        print 'model trained in %f s and saved to %s' % (rec._train_time, MODEL_PATH)
+
+    return RecommendationServer(
+        ADDRESS, MODEL_PATH, data_manager, WORKERS_COUNT, QUEUE_SIZE)
+
+def serve():
+    """Run the load test against the server and serve until interrupted."""
+    server = get_server()
+
+    def reload_model(signum, frame):
+        """Reload the model on SIGHUP, the old one is kept if loading fails."""
+        try:
+            server.reload()
+        except Exception as error:
+            print 'model not reloaded: %r' % error
+        else:
+            print 'model reloaded from %s' % server.model_path
+
+    signal.signal(signal.SIGHUP, reload_model)
+
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    if LOAD_TEST_REQUESTS:
+        requests = get_load_test_requests(
+            server.data_manager, K, LOAD_TEST_REQUESTS)
+        stats = run_load_test(ADDRESS, requests, LOAD_TEST_CONCURRENCY)
+        print 'requests\t errors\t requests/s\t p50 ms\t p99 ms'
+        print '%d\t%d\t%f\t%f\t%f' % (
+            stats['requests'], stats['errors'], stats['throughput'], stats['p50'],
+            stats['p99'])
+
+    print 'serving on http://%s:%d' % ADDRESS
+    try:
+        while thread.is_alive():
+            thread.join(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        server.server_close()
+
+serve()
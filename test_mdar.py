@@ -16,6 +16,8 @@ Constants:
     CONFIG_PATH: path to config file, see config_sample.json.
     K: lengths of returned recommendations.
     USED_APPROACHES: used algorithms and their weights[0-1]
+    USE_TRANSACTION_STORE: should orders be loaded into memory once and
+    queried from there instead of the graph database.
 
 Usage:
     $ python test_mdar.py
@@ -37,6 +39,7 @@ USED_APPROACHES = [
     ('user_history2', 1),
     ('time_related', 1),
 ]
+USE_TRANSACTION_STORE = True
 
 def get_dmrec():
     """DataManager and BaseRecommender object pairs for each k data part.
@@ -49,9 +52,12 @@ def get_dmrec():
             }
     """
     dmrec = []
+    base_data_manager = DataManager(CONFIG_PATH, K_FOLD_SIZE)
+    if USE_TRANSACTION_STORE:
+        base_data_manager.load_transaction_store()
+
     for i in range(0, K_FOLD_SIZE):
-        data_manager = DataManager(CONFIG_PATH, K_FOLD_SIZE)
-        data_manager.testing_part_index = i
+        data_manager = base_data_manager.get_fold_view(i)
 
         rec = MDAR(used_approaches=USED_APPROACHES)
         rec.data_manager = data_manager
@@ -103,7 +109,6 @@ def test():
         % (k, precision, recall, fallout, f1_score, specificity)
         print '-' * 22
 
-        data_manager = DataManager(CONFIG_PATH, K_FOLD_SIZE)
-        results.log_results('MDAR', k, data_manager.get_items_count('all'))
+        results.log_results('MDAR', k, dmrec[0]['dm'].get_items_count('all'))
 
 test()